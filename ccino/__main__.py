@@ -4,7 +4,7 @@ from __future__ import absolute_import
 
 import sys
 
-from .cli import run
+from .cli import main
 
 
 if __name__ == '__main__':
@@ -13,4 +13,4 @@ if __name__ == '__main__':
     sys.argv[0] = 'python -m ccino'
 
     # Run the command line interface
-    run()
+    main()
@@ -0,0 +1,232 @@
+"""Pick the tests affected by changes from the lines each test ran."""
+
+from __future__ import absolute_import
+
+import difflib
+import hashlib
+import os
+
+from .fixtures import Hook
+
+
+# Context of the lines run while loading the tests, before any test.
+LOAD_CONTEXT = ''
+
+
+def hash_lines(path):
+    """Get short hashes of the lines of a file.
+
+    Args:
+        path (str): The file.
+
+    Returns:
+        :obj:`list` or :obj:`None`: The hashes, or None if the file
+        cannot be read.
+    """
+
+    try:
+        with open(path, 'rb') as source_file:
+            lines = source_file.read().splitlines()
+    except (IOError, OSError):
+        return None
+
+    return [hashlib.sha1(line).hexdigest()[:8] for line in lines]
+
+
+def _is_local(path):
+    if 'site-packages' in path or 'dist-packages' in path:
+        return False
+
+    return not os.path.relpath(path).startswith(os.pardir)
+
+
+class CoverageRecorder(object):
+    """Records the lines each test and hook runs with coverage.py.
+
+    Every test and hook runs in a coverage.py dynamic context named
+    after its id. Lines run before the first one (while loading the
+    tests) are in the ``LOAD_CONTEXT`` context.
+    """
+
+    def __init__(self, cov):
+        """Create a new CoverageRecorder.
+
+        Args:
+            cov (:obj:`coverage.Coverage`): The coverage to record
+                with. It should be started before the tests are
+                loaded.
+        """
+
+        self._cov = cov
+
+    def switch(self, runnable):
+        """Record the lines run from now on for a runnable.
+
+        Args:
+            runnable (:obj:`ccino.fixtures.Runnable`): The test or hook
+                about to run.
+        """
+
+        self._cov.switch_context(runnable.id)
+
+    def get_map(self):
+        """Get the lines recorded so far.
+
+        Only files inside the working directory are kept, with paths
+        relative to it.
+
+        Returns:
+            dict: Line hashes of each file under ``'files'`` and the
+            line numbers each context ran in each file under
+            ``'contexts'``.
+        """
+
+        data = self._cov.get_data()
+
+        files = {}
+        contexts = {}
+
+        for path in data.measured_files():
+            if not _is_local(path):
+                continue
+
+            hashes = hash_lines(path)
+
+            if hashes is None:
+                continue
+
+            name = os.path.relpath(path)
+            files[name] = hashes
+
+            for line, names in data.contexts_by_lineno(path).items():
+                for context in names:
+                    contexts.setdefault(context, {}) \
+                            .setdefault(name, []).append(line)
+
+        for lines in contexts.values():
+            for name in lines:
+                lines[name].sort()
+
+        return {'files': files, 'contexts': contexts}
+
+
+def changed_lines(files):
+    """Find the recorded lines that changed in the working tree.
+
+    The old and new lines are matched up, so lines that only moved are
+    not changed. The lines around inserted lines are changed.
+
+    Args:
+        files (dict): Recorded line hashes by file.
+
+    Returns:
+        dict: Sets of changed line numbers (in the recorded file) by
+        file, or None for files that are gone.
+    """
+
+    changed = {}
+
+    for name, old in files.items():
+        new = hash_lines(name)
+
+        if new is None:
+            changed[name] = None
+            continue
+
+        if new == old:
+            continue
+
+        lines = set()
+        matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+
+        for tag, start, end, _, _ in matcher.get_opcodes():
+            if tag == 'equal':
+                continue
+
+            if start == end:
+                lines.update((start, start + 1))
+            else:
+                lines.update(range(start + 1, end + 1))
+
+        changed[name] = lines
+
+    return changed
+
+
+def _ran_changed(lines_by_file, changed):
+    for name, lines in lines_by_file.items():
+        if name not in changed:
+            continue
+
+        if changed[name] is None or not changed[name].isdisjoint(lines):
+            return True
+
+    return False
+
+
+def _get_file(test):
+    code = getattr(test.func, '__code__', None)
+
+    if code is None:
+        return None
+
+    return os.path.relpath(os.path.abspath(code.co_filename))
+
+
+def affected(root, tests, coverage_map):
+    """Pick the tests affected by changes since a map was recorded.
+
+    A test is picked if it was not recorded, or if lines that it or a
+    hook of its suites ran have changed. Changes to lines run while
+    loading pick the tests of the changed file if it has tests, and
+    every test otherwise.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+        tests (List[:obj:`ccino.fixtures.Test`]): The tests.
+        coverage_map (dict): A map from ``CoverageRecorder.get_map``.
+
+    Returns:
+        List[int]: Indexes of the picked tests in ``tests``, in order.
+    """
+
+    contexts = coverage_map['contexts']
+    changed = changed_lines(coverage_map['files'])
+
+    if not changed:
+        return [i for i, test in enumerate(tests) if test.id not in contexts]
+
+    test_files = set(_get_file(test) for test in tests)
+    changed_test_files = set()
+
+    for name, lines in contexts.get(LOAD_CONTEXT, {}).items():
+        if not _ran_changed({name: lines}, changed):
+            continue
+
+        # Every test may depend on a changed module.
+        if name not in test_files:
+            return list(range(len(tests)))
+
+        changed_test_files.add(name)
+
+    changed_suites = set()
+
+    for runnable in root.walk():
+        if isinstance(runnable, Hook) and \
+                _ran_changed(contexts.get(runnable.id, {}), changed):
+            changed_suites.add(runnable.parent)
+
+    picked = []
+
+    for i, test in enumerate(tests):
+        suite = test.parent
+
+        while suite is not None and suite not in changed_suites:
+            suite = suite.parent
+
+        if test.id not in contexts or suite is not None or \
+                _get_file(test) in changed_test_files or \
+                _ran_changed(contexts[test.id], changed):
+            picked.append(i)
+
+    return picked
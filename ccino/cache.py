@@ -0,0 +1,83 @@
+"""Persistent values kept between test runs."""
+
+from __future__ import absolute_import
+
+import json
+import os
+
+from .util import get_temp_path, make_dirs
+
+
+DEFAULT_CACHE_DIR = '.ccino_cache'
+
+
+# os.rename does not overwrite on Windows.
+_replace = getattr(os, 'replace', os.rename)
+
+
+class Cache(object):
+    """Directory of JSON values that survive between runs.
+
+    Each key is stored in its own file so unrelated values can be
+    written without rewriting everything else. Missing or corrupt
+    values are treated as if they were never set.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_DIR):
+        """Create a new Cache.
+
+        The directory is not created until a value is set.
+
+        Keyword Args:
+            path (str): The cache directory.
+        """
+
+        self._path = path
+
+    def _file(self, key):
+        return os.path.join(self._path, key + '.json')
+
+    def get(self, key, default=None):
+        """Get a cached value.
+
+        Args:
+            key (str): The value name.
+
+        Keyword Args:
+            default (Object): Returned if the value is not cached.
+
+        Returns:
+            Object: The cached value.
+        """
+
+        try:
+            with open(self._file(key), 'r') as cache_file:
+                return json.load(cache_file)
+        except (IOError, OSError, ValueError):
+            return default
+
+    def set(self, key, value):
+        """Cache a value.
+
+        The value is written to a temporary file first so readers
+        never see a partially written value.
+
+        Args:
+            key (str): The value name.
+            value (Object): A JSON serializable value.
+        """
+
+        make_dirs(self._path)
+
+        path = self._file(key)
+        temp_path = get_temp_path(path)
+
+        with open(temp_path, 'w') as cache_file:
+            json.dump(value, cache_file)
+
+        _replace(temp_path, path)
+
+    @property
+    def path(self):
+        """str: The cache directory."""
+        return self._path
@@ -0,0 +1,319 @@
+"""Cases of parametrized tests streamed from data files."""
+
+from __future__ import absolute_import
+
+import csv
+import io
+import json
+import mmap
+import os
+import re
+import struct
+from array import array
+
+from .util import get_temp_path
+
+
+# Formats by file extension.
+FORMATS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl'
+}
+
+# Cases are parsed this many at a time.
+CHUNK_LINES = 4096
+
+# os.rename does not overwrite on Windows.
+_replace = getattr(os, 'replace', os.rename)
+
+_MAGIC = b'ccino-index-2\n'
+
+# Modification time in nanoseconds, size, and the offset type code.
+_HEADER = struct.Struct('<qQc')
+
+# Starts of the lines that are not blank.
+_LINE_START = re.compile(br'^(?!\r?$)', re.M)
+
+# Python 2 has no 'Q' arrays, but 'L' has 8 bytes on 64 bit systems.
+try:
+    _LARGE_TYPECODE = array('Q').typecode
+except ValueError:
+    _LARGE_TYPECODE = 'L'
+
+
+def _get_stamp(path):
+    """Get what tells whether a file changed: its modification time in
+    nanoseconds and its size.
+    """
+
+    stat = os.stat(path)
+    mtime = getattr(stat, 'st_mtime_ns', None)
+
+    if mtime is None:
+        mtime = int(stat.st_mtime * 1e9)
+
+    return mtime, stat.st_size
+
+
+class CaseFile(object):
+    """Cases of a parametrized test in a CSV or JSON Lines file, with one
+    case in each row or line.
+
+    The file is memory-mapped and cases are parsed a chunk at a time
+    while the test runs, so it never has to fit in memory. Where each
+    case starts is kept in an index next to the file (named like the
+    file with a leading dot and ``.ccino-index`` after it), which is
+    made again when the modification time or size of the file changes.
+    With the index, a range of cases is read without parsing the cases
+    before it.
+
+    The first row of a CSV file names the columns and is not a case.
+    Rows are tuples of strings, and quoted fields can span lines. Lines
+    of a JSON Lines file are JSON values, with arrays as tuples. A
+    tuple is split over the arguments of the test. Blank lines are
+    left out.
+    """
+
+    def __init__(self, path, format=None):
+        """Create a new CaseFile.
+
+        Nothing is read until the cases are needed.
+
+        Args:
+            path (str): The file.
+
+        Keyword Args:
+            format (str): ``'csv'`` or ``'jsonl'``. Defaults to the
+                format of the file extension.
+
+        Raises:
+            ValueError: If the format is unknown.
+        """
+
+        if format is None:
+            format = FORMATS.get(os.path.splitext(path)[1].lower())
+
+        if format not in ('csv', 'jsonl'):
+            raise ValueError('unknown format of cases {!r}'.format(format))
+
+        self._path = path
+        self._format = format
+
+        self._stamp = None
+        self._offsets = None
+
+    @property
+    def path(self):
+        """str: The file."""
+        return self._path
+
+    @property
+    def format(self):
+        """str: ``'csv'`` or ``'jsonl'``."""
+        return self._format
+
+    @property
+    def index_path(self):
+        """str: The file the index is kept in."""
+
+        directory, name = os.path.split(self._path)
+
+        return os.path.join(directory, '.' + name + '.ccino-index')
+
+    def _get_offsets(self, mapped=None):
+        """Get where each case (and the header of a CSV file) starts,
+        loading or making the index if the file changed.
+        """
+
+        stamp = _get_stamp(self._path)
+
+        if self._offsets is not None and self._stamp == stamp:
+            return self._offsets
+
+        offsets = self._load_index(stamp)
+
+        if offsets is None:
+            offsets = self._make_index(stamp, mapped)
+
+        self._stamp = stamp
+        self._offsets = offsets
+
+        return offsets
+
+    def _load_index(self, stamp):
+        try:
+            with open(self.index_path, 'rb') as index_file:
+                if index_file.read(len(_MAGIC)) != _MAGIC:
+                    return None
+
+                mtime, size, typecode = _HEADER.unpack(
+                        index_file.read(_HEADER.size))
+
+                if (mtime, size) != stamp:
+                    return None
+
+                offsets = array(str(typecode.decode('ascii')))
+                data = index_file.read()
+
+                if len(data) % offsets.itemsize:
+                    return None
+
+                # Python 2 arrays only have the older name.
+                if hasattr(offsets, 'frombytes'):
+                    offsets.frombytes(data)
+                else:
+                    offsets.fromstring(data)
+        except (IOError, OSError, ValueError, struct.error):
+            return None
+
+        return offsets
+
+    def _make_index(self, stamp, mapped=None):
+        # Offsets of files under 4 GiB take half the space.
+        offsets = array('I' if stamp[1] < 2 ** 32 else _LARGE_TYPECODE)
+
+        if mapped is not None:
+            self._find_starts(mapped, offsets)
+        elif stamp[1]:
+            with open(self._path, 'rb') as case_file:
+                mapped = mmap.mmap(case_file.fileno(), 0,
+                        access=mmap.ACCESS_READ)
+
+                try:
+                    self._find_starts(mapped, offsets)
+                finally:
+                    mapped.close()
+
+        self._save_index(stamp, offsets)
+
+        return offsets
+
+    def _find_starts(self, mapped, offsets):
+        if self._format != 'csv':
+            offsets.extend(match.start() for match in
+                    _LINE_START.finditer(mapped))
+            return
+
+        # Quoted fields can span lines, so rows end where the reader
+        # says they do.
+        end = [0]
+
+        def read_lines():
+            mapped.seek(0)
+
+            for line in iter(mapped.readline, b''):
+                end[0] += len(line)
+                yield line.decode('utf-8')
+
+        start = 0
+
+        for row in csv.reader(read_lines()):
+            if row:
+                offsets.append(start)
+
+            start = end[0]
+
+    def _save_index(self, stamp, offsets):
+        """Save the index next to the file, if the directory can be
+        written to. It is kept in memory either way.
+        """
+
+        path = self.index_path
+        temp_path = get_temp_path(path)
+
+        try:
+            with open(temp_path, 'wb') as index_file:
+                index_file.write(_MAGIC)
+                index_file.write(_HEADER.pack(stamp[0], stamp[1],
+                        offsets.typecode.encode('ascii')))
+
+                if hasattr(offsets, 'tobytes'):
+                    index_file.write(offsets.tobytes())
+                else:
+                    index_file.write(offsets.tostring())
+
+            _replace(temp_path, path)
+        except (IOError, OSError):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def __len__(self):
+        """Count the cases, which only needs the index.
+
+        Raises:
+            IOError: If the file cannot be read.
+        """
+
+        count = len(self._get_offsets())
+
+        if self._format == 'csv' and count:
+            count -= 1
+
+        return count
+
+    def __iter__(self):
+        return self.read()
+
+    def read(self, start=0, stop=None):
+        """Iterate over a range of cases.
+
+        Keyword Args:
+            start (int): The position of the first case.
+            stop (:obj:`int` or :obj:`None`): The position after the
+                last case, or None to read to the end of the file.
+
+        Yields:
+            Object: The next case.
+
+        Raises:
+            IOError: If the file cannot be read.
+        """
+
+        with open(self._path, 'rb') as case_file:
+            if not os.fstat(case_file.fileno()).st_size:
+                return
+
+            mapped = mmap.mmap(case_file.fileno(), 0,
+                    access=mmap.ACCESS_READ)
+
+            try:
+                for case in self._read(mapped, start, stop):
+                    yield case
+            finally:
+                mapped.close()
+
+    def _read(self, mapped, start, stop):
+        offsets = self._get_offsets(mapped)
+
+        # The header of a CSV file is row 0.
+        first = 1 if self._format == 'csv' else 0
+
+        start = min(start + first, len(offsets))
+        stop = len(offsets) if stop is None else \
+                min(stop + first, len(offsets))
+
+        for chunk_start in range(start, stop, CHUNK_LINES):
+            chunk_stop = min(chunk_start + CHUNK_LINES, stop)
+            end = offsets[chunk_stop] if chunk_stop < len(offsets) else \
+                    len(mapped)
+
+            text = mapped[offsets[chunk_start]:end].decode('utf-8')
+
+            for case in self._parse(text):
+                yield case
+
+    def _parse(self, text):
+        if self._format == 'csv':
+            # Line breaks inside quoted fields are kept.
+            for row in csv.reader(io.StringIO(text, newline='')):
+                if row:
+                    yield tuple(row)
+        else:
+            for line in text.split('\n'):
+                if line and line != '\r':
+                    value = json.loads(line)
+
+                    yield tuple(value) if isinstance(value, list) else value
@@ -0,0 +1,106 @@
+"""Pick the test files affected by changes since a git revision."""
+
+from __future__ import absolute_import
+
+import os
+import subprocess
+import sys
+
+from .exceptions import CcinoException
+from .imports import StaticImportGraph, _is_under
+from .util import find_modules
+
+
+def _git(args):
+    try:
+        process = subprocess.Popen(['git'] + args, stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE)
+    except OSError as e:
+        raise CcinoException('Could not run git: {}'.format(e))
+
+    output, error = process.communicate()
+
+    if process.returncode != 0:
+        raise CcinoException('git {} failed: {}'.format(args[0],
+                error.decode('utf-8', 'replace').strip()))
+
+    return output.decode(sys.getfilesystemencoding())
+
+
+def get_changed_files(ref):
+    """Get the files changed since a git revision.
+
+    Changes that are not committed and files git does not track yet
+    (but does not ignore) are included.
+
+    Args:
+        ref (str): The git revision, such as ``'HEAD'`` or
+            ``'origin/master'``.
+
+    Returns:
+        Set[str]: Absolute paths of the changed files.
+
+    Raises:
+        :obj:`ccino.exceptions.CcinoException`: If git failed, for
+            example because ref does not exist.
+    """
+
+    top = _git(['rev-parse', '--show-toplevel']).strip()
+
+    names = _git(['diff', '--name-only', '-z', ref, '--']).split('\0')
+    names += _git(['ls-files', '--others', '--exclude-standard',
+            '--full-name', '-z']).split('\0')
+
+    return set(os.path.join(top, name) for name in names if name)
+
+
+def select_changed(paths, recursive, ref, cache=None):
+    """Get the test files that are or import (even indirectly) a file
+    changed since a git revision.
+
+    Imports are found by parsing the files without importing them.
+    Modules are found in the working directory, the directories of the
+    paths and the directories of ``sys.path`` inside the working
+    directory.
+
+    Args:
+        paths (List[str]): The files and directories to load tests
+            from.
+        recursive (bool): Whether to load subdirectories.
+        ref (str): The git revision.
+
+    Keyword Args:
+        cache (:obj:`ccino.cache.Cache`): Keeps the parsed imports
+            between runs, so only files changed since are parsed.
+
+    Returns:
+        List[str]: The affected test files in the order they would be
+        loaded.
+
+    Raises:
+        :obj:`ccino.exceptions.CcinoException`: If git failed.
+    """
+
+    changed = get_changed_files(ref)
+
+    tests = [os.path.abspath(path) for path in find_modules(paths, recursive)]
+
+    cwd = os.getcwd()
+    roots = [cwd] + [os.path.dirname(os.path.abspath(path))
+            for path in paths]
+    roots += [os.path.abspath(path) for path in sys.path
+            if path and _is_under(os.path.abspath(path), cwd)]
+
+    # Every root is checked for every imported name.
+    roots = sorted(set(roots), key=roots.index)
+
+    parsed = cache.get('imports', {}) if cache is not None else {}
+
+    graph = StaticImportGraph(tests, roots, parsed)
+
+    if cache is not None and graph.changed:
+        cache.set('imports', graph.parsed)
+
+    affected = graph.affected(changed)
+
+    return [path for path in tests if path in affected]
@@ -1,23 +1,37 @@
 from __future__ import absolute_import
 
+import multiprocessing
 import os
 import platform
+import re
 import sys
 
 import click
-import coverage
 import yaml
 
 from . import main_runner
+from .affected import CoverageRecorder
+from .cache import DEFAULT_CACHE_DIR, Cache
+from .changed import select_changed
+from .collect import collect_paths
+from .distributed import parse_address, serve_worker
+from .exceptions import CcinoException
+from .persist import FixtureCache
 from .reporters import get_reporter_names, get_reporter_desc
 from .runner import insert_into_globals, insert_into_builtins
-from .util import load_module
+from .serve import DEFAULT_SOCKET, connect, serve as serve_tests
+from .tags import parse_tags
+from .util import load_paths
 from .version import __version__
+from .watch import watch
 
 
 DEFAULT_CONFIG = 'ccino.yml'
 DEFAULT_REPORTER = 'default'
 
+# Seconds in each unit a time budget can end in.
+TIME_UNITS = {'s': 1, 'm': 60, 'h': 3600}
+
 
 settings = {
     'help_option_names': ['-h', '--help'],
@@ -76,14 +90,9 @@ def check_reporter(name):
 
     reporters = get_reporter_names()
 
-    script = sys.argv[0]
-
-    if not script.startswith('python'):
-        script = os.path.basename(script)
-
     if not name in reporters:
         msg = '"{}"" not found. Use "{} --reporters" to list all reporters.' \
-                .format(name, script)
+                .format(name, get_script_name())
 
         raise click.BadParameter(msg, param_hint='"reporter"')
 
@@ -115,29 +124,150 @@ def to_bool(value):
     raise ValueError('value must be \'True\' or \'False\' or a bool')
 
 
-def load_dir(path, recursive):
-    """Load a directory.
+def check_shard(ctx, param, value):
+    """Check if a shard is a valid I/N shard.
+
+    Args:
+        ctx (:obj:`click.Context`): The click context.
+        param (str): The paramater name.
+        value (str): The paramter value.
+
+    Returns:
+        :obj:`tuple` or :obj:`None`: The shard index and count.
+    """
+
+    if value is None:
+        return None
+
+    index, _, count = str(value).partition('/')
+
+    if not index.isdigit() or not count.isdigit() or \
+            not 1 <= int(index) <= int(count):
+        raise click.BadParameter('shard must be I/N with I from 1 to N')
+
+    return int(index), int(count)
+
+
+def check_time_budget(ctx, param, value):
+    """Check if a time budget is a number of seconds, minutes or hours.
+
+    Args:
+        ctx (:obj:`click.Context`): The click context.
+        param (str): The paramater name.
+        value (str): The paramter value, such as ``'90'``, ``'90s'``,
+            ``'5m'`` or ``'1h'``.
+
+    Returns:
+        :obj:`float` or :obj:`None`: The time budget in seconds.
+    """
+
+    if value is None:
+        return None
+
+    value = str(value).strip()
+    scale = TIME_UNITS.get(value[-1:])
+
+    if scale is not None:
+        value = value[:-1]
+    else:
+        scale = 1
+
+    try:
+        seconds = float(value) * scale
+    except ValueError:
+        seconds = -1
+
+    if not seconds > 0:
+        raise click.BadParameter('time budget must be a positive number '
+                'of seconds, optionally ending in s, m or h')
+
+    return seconds
+
+
+def check_grep(ctx, param, value):
+    """Check if a grep pattern is a valid regular expression.
+
+    Args:
+        ctx (:obj:`click.Context`): The click context.
+        param (str): The paramater name.
+        value (str): The paramter value.
+
+    Returns:
+        :obj:`str` or :obj:`None`: The pattern.
+    """
+
+    if value is None:
+        return None
+
+    try:
+        re.compile(value)
+    except re.error as e:
+        raise click.BadParameter('invalid regular expression: {}'.format(e))
+
+    return value
+
+
+def check_tags(ctx, param, value):
+    """Check if a tag expression is valid.
 
     Args:
-        path (str): The path to load.
-        recursive (bool): Whether to load subdirectories.
+        ctx (:obj:`click.Context`): The click context.
+        param (str): The paramater name.
+        value (str): The paramter value.
 
     Returns:
-        int: The number of modules loaded.
+        :obj:`str` or :obj:`None`: The expression.
     """
 
-    loaded = 0
+    if value is None:
+        return None
 
-    for inner_path in os.listdir(path):
-        inner_path = os.path.join(path, inner_path)
+    try:
+        parse_tags(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    return value
 
-        if os.path.isfile(inner_path) and inner_path.endswith('.py'):
-            load_module(inner_path)
-            loaded += 1
-        elif os.path.isdir(inner_path) and recursive:
-            loaded += load_dir(inner_path, recursive)
 
-    return loaded
+def get_script_name():
+    """Get the name ccino was run with for messages.
+
+    Returns:
+        str: The script name.
+    """
+
+    script = sys.argv[0]
+
+    if not script.startswith('python'):
+        script = os.path.basename(script)
+
+    return script
+
+
+def without_option(args, name):
+    """Remove an option that takes a value from arguments.
+
+    Args:
+        args (List[str]): The command line arguments.
+        name (str): The long option name, such as ``'--connect'``.
+
+    Returns:
+        List[str]: The arguments without the option and its value.
+    """
+
+    result = []
+    skip_value = False
+
+    for arg in args:
+        if skip_value:
+            skip_value = False
+        elif arg == name:
+            skip_value = True
+        elif not arg.startswith(name + '='):
+            result.append(arg)
+
+    return result
 
 
 # Make the click cli.
@@ -150,6 +280,9 @@ def load_dir(path, recursive):
         help='Stop running after a test failure.')
 @click.option('--no-bail', '-B', 'bail', flag_value='False',
         help='Don\'t stop running after a test failure.')
+@click.option('--bail-on-hook-failure', flag_value='True',
+        help='Stop running after a hook failure, instead of skipping the '
+        'rest of its suite.')
 @click.option('--reporter', '-R', metavar='<name>',
         help='Specify the reporter to use.')
 @click.option('--color', '-c', 'color', flag_value='True',
@@ -177,6 +310,62 @@ def load_dir(path, recursive):
         help='Show context in stack trace if possible.')
 @click.option('--cover', flag_value='True',
         help='Output coverage information using coverage.py.')
+@click.option('--isolate', flag_value='True',
+        help='Run each test in its own process.')
+@click.option('--jobs', '-j', metavar='<n>', type=int,
+        help='Run top level suites in <n> processes.')
+@click.option('--workers', metavar='<addresses>',
+        help='Run top level suites on these comma separated workers.')
+@click.option('--shard', metavar='<i/n>', callback=check_shard,
+        help='Only run shard <i> of <n> of the tests.')
+@click.option('--shard-durations', metavar='<file>',
+        type=click.Path(exists=True, resolve_path=True),
+        help='Balance the shards with the durations in this JSON file.')
+@click.option('--grep', '-g', metavar='<pattern>', callback=check_grep,
+        help='Only run tests whose id matches the regular expression.')
+@click.option('--tags', '-t', metavar='<expr>', callback=check_tags,
+        help='Only run tests whose tags match, like "db and not slow".')
+@click.option('--id', 'ids', metavar='<id>', multiple=True,
+        help='Only run the test or suite with this id, or the cases of a '
+        'test like "suite::test[10:20]" (repeatable).')
+@click.option('--lf', '--last-failed', 'last_failed', flag_value='True',
+        help='Only run the tests that failed last time.')
+@click.option('--ff', '--failed-first', 'failed_first', flag_value='True',
+        help='Run the tests that failed last time first.')
+@click.option('--record-coverage', flag_value='True',
+        help='Record the lines each test runs for --affected.')
+@click.option('--affected', flag_value='True',
+        help='Only run the tests affected by changes to the lines they ran.')
+@click.option('--changed-since', metavar='<ref>',
+        help='Only run test files importing files changed since git <ref>.')
+@click.option('--time-budget', metavar='<time>', callback=check_time_budget,
+        help='Only run the tests most likely to fail that fit in <time>.')
+@click.option('--journal', metavar='<file>', type=click.Path(dir_okay=False,
+        resolve_path=True),
+        help='Append the result of each finished test to <file>.')
+@click.option('--resume', metavar='<file>', type=click.Path(dir_okay=False,
+        resolve_path=True),
+        help='Skip the tests that finished in the journal <file> and keep '
+        'appending to it.')
+@click.option('--cache-results', 'cache_results', flag_value='True',
+        help='Report test files that passed with the same code as passed '
+        'without running them.')
+@click.option('--no-cache-results', 'cache_results', flag_value='False',
+        help='Run every test, even ones that passed with the same code.')
+@click.option('--results-dir', metavar='<dir>',
+        type=click.Path(file_okay=False, resolve_path=True),
+        help='Directory to keep results of passed test files in.')
+@click.option('--clear-fixture-cache', flag_value='True',
+        help='Remove the fixture values kept on disk before running.')
+@click.option('--cache-dir', metavar='<dir>',
+        type=click.Path(file_okay=False, resolve_path=True),
+        help='Directory to keep results between runs in.')
+@click.option('--list', '-l', 'list_tests', flag_value='True',
+        help='List the ids of the tests that would run and exit.')
+@click.option('--watch', '-w', flag_value='True',
+        help='Run tests again when their files change.')
+@click.option('--connect', metavar='<socket>',
+        help='Run in a server started with "serve".')
 @click.option('--reporters', is_flag=True, callback=print_reporters,
         expose_value=False, is_eager=True,
         help='List available reporters and exit.')
@@ -184,6 +373,17 @@ def load_dir(path, recursive):
         expose_value=False, is_eager=True,
         help='Show the current version and exit.')
 def run(files, **options):
+    # Everything else happens in the server.
+    if options['connect'] is not None:
+        args = without_option(sys.argv[1:], '--connect')
+
+        try:
+            code = connect(options['connect'], args, get_script_name())
+        except CcinoException as e:
+            raise click.ClickException(str(e))
+
+        sys.exit(code)
+
     open_files = []
 
     if options['config'] is None:
@@ -206,6 +406,10 @@ def run(files, **options):
         if options['bail'] is None and 'bail' in config:
             options['bail'] = config['bail']
 
+        if options['bail_on_hook_failure'] is None and \
+                'bail_on_hook_failure' in config:
+            options['bail_on_hook_failure'] = config['bail_on_hook_failure']
+
         if options['reporter'] is None and 'reporter' in config:
             options['reporter'] = config['reporter']
 
@@ -227,6 +431,68 @@ def run(files, **options):
         if options['builtins'] is None and 'builtins' in config:
             options['builtins'] = config['builtins']
 
+        if options['isolate'] is None and 'isolate' in config:
+            options['isolate'] = config['isolate']
+
+        if options['jobs'] is None and 'jobs' in config:
+            options['jobs'] = config['jobs']
+
+        if options['workers'] is None and 'workers' in config:
+            options['workers'] = config['workers']
+
+        if options['watch'] is None and 'watch' in config:
+            options['watch'] = config['watch']
+
+        if options['shard'] is None and 'shard' in config:
+            options['shard'] = check_shard(None, None, config['shard'])
+
+        if options['shard_durations'] is None and \
+                'shard_durations' in config:
+            options['shard_durations'] = config['shard_durations']
+
+        if options['grep'] is None and 'grep' in config:
+            options['grep'] = check_grep(None, None, config['grep'])
+
+        if options['tags'] is None and 'tags' in config:
+            options['tags'] = check_tags(None, None, config['tags'])
+
+        if not options['ids'] and 'ids' in config:
+            ids = config['ids']
+
+            options['ids'] = ids if isinstance(ids, list) else [ids]
+
+        if options['last_failed'] is None and 'last_failed' in config:
+            options['last_failed'] = config['last_failed']
+
+        if options['failed_first'] is None and 'failed_first' in config:
+            options['failed_first'] = config['failed_first']
+
+        if options['record_coverage'] is None and \
+                'record_coverage' in config:
+            options['record_coverage'] = config['record_coverage']
+
+        if options['affected'] is None and 'affected' in config:
+            options['affected'] = config['affected']
+
+        if options['changed_since'] is None and 'changed_since' in config:
+            options['changed_since'] = config['changed_since']
+
+        if options['time_budget'] is None and 'time_budget' in config:
+            options['time_budget'] = check_time_budget(None, None,
+                    config['time_budget'])
+
+        if options['cache_results'] is None and 'cache_results' in config:
+            options['cache_results'] = config['cache_results']
+
+        if options['journal'] is None and 'journal' in config:
+            options['journal'] = config['journal']
+
+        if options['results_dir'] is None and 'results_dir' in config:
+            options['results_dir'] = config['results_dir']
+
+        if options['cache_dir'] is None and 'cache_dir' in config:
+            options['cache_dir'] = config['cache_dir']
+
         open_files.append(config_file)
 
     if files == tuple():
@@ -237,6 +503,10 @@ def run(files, **options):
 
         main_runner.bail(bail)
 
+    if options['bail_on_hook_failure'] is not None:
+        main_runner.bail_on_hook_failure(
+                to_bool(options['bail_on_hook_failure']))
+
     if options['reporter'] is not None:
         reporter = check_reporter(options['reporter'])
 
@@ -264,6 +534,71 @@ def run(files, **options):
 
         main_runner.exc_context(exc_context)
 
+    if options['isolate'] is not None:
+        isolate = to_bool(options['isolate'])
+
+        main_runner.isolate(isolate)
+
+    if options['jobs'] is not None:
+        jobs = int(options['jobs'])
+
+        # Use every CPU if the number of jobs is not positive.
+        if jobs < 1:
+            jobs = multiprocessing.cpu_count()
+
+        main_runner.jobs(jobs)
+
+    if options['shard'] is not None:
+        main_runner.shard(*options['shard'],
+                durations=options['shard_durations'])
+
+    if options['grep'] is not None:
+        main_runner.grep(options['grep'])
+
+    if options['tags'] is not None:
+        main_runner.tags(options['tags'])
+
+    if options['ids']:
+        main_runner.ids(options['ids'])
+
+    if options['last_failed'] is not None:
+        main_runner.last_failed(to_bool(options['last_failed']))
+
+    if options['failed_first'] is not None:
+        main_runner.failed_first(to_bool(options['failed_first']))
+
+    if options['affected'] is not None:
+        main_runner.affected(to_bool(options['affected']))
+
+    if options['time_budget'] is not None:
+        main_runner.time_budget(options['time_budget'])
+
+    if options['resume'] is not None:
+        main_runner.journal(options['resume'], resume=True)
+    elif options['journal'] is not None:
+        main_runner.journal(options['journal'])
+
+    cache = Cache(options['cache_dir'] or DEFAULT_CACHE_DIR)
+
+    main_runner.cache(cache)
+
+    fixture_cache = FixtureCache(os.path.join(cache.path, 'fixtures'))
+
+    if options['clear_fixture_cache'] is not None and \
+            to_bool(options['clear_fixture_cache']):
+        fixture_cache.clear()
+
+    main_runner.fixture_cache(fixture_cache)
+
+    if options['cache_results'] is not None and \
+            to_bool(options['cache_results']):
+        results_dir = options['results_dir']
+
+        if results_dir is None:
+            results_dir = os.path.join(cache.path, 'results')
+
+        main_runner.results(results_dir)
+
     insert_into_globals(main_runner)
 
     if options['builtins'] is None:
@@ -272,22 +607,69 @@ def run(files, **options):
     cov = None
     success = True
 
-    if options['cover'] is not None:
-        cov = coverage.Coverage()
+    use_cover = options['cover'] is not None and to_bool(options['cover'])
+    record = options['record_coverage'] is not None and \
+            to_bool(options['record_coverage'])
+
+    if use_cover or record:
+        # coverage is slow to import and only needed here.
+        import coverage
+
+        # Only the report needs a data file.
+        if use_cover:
+            cov = coverage.Coverage()
+        else:
+            cov = coverage.Coverage(data_file=None)
+
+        if record:
+            main_runner.record_coverage(CoverageRecorder(cov))
+
         cov.start()
 
     recursive = options['recursive'] is not None and \
             to_bool(options['recursive'])
 
-    loaded = 0
+    use_watch = options['watch'] is not None and to_bool(options['watch'])
+
+    if options['changed_since'] is not None:
+        try:
+            files = select_changed(files, recursive,
+                    options['changed_since'], cache)
+        except CcinoException as e:
+            raise click.ClickException(str(e))
+
+        recursive = False
+
+        if not files:
+            click.echo('No test files changed since {}.'
+                    .format(options['changed_since']))
+            return
+
+    if options['list_tests'] is not None and to_bool(options['list_tests']):
+        # Files are read without running them where possible.
+        for path, reason in collect_paths(files, recursive,
+                main_runner.root):
+            click.echo('ccino: imported {} ({})'.format(
+                os.path.relpath(path), reason), err=True)
+
+        ids = [test.id for test in main_runner.plan()]
+
+        if ids:
+            click.echo('\n'.join(ids))
+
+        return
 
     # Load in all the modules specified.
-    for path in files:
-        if os.path.isfile(path):
-            load_module(path)
-            loaded += 1
-        elif os.path.isdir(path):
-            loaded += load_dir(path, recursive)
+    loaded = load_paths(files, recursive)
+
+    # Watched runs load a few files at a time, so they stay local.
+    if options['workers'] is not None and not use_watch:
+        workers = options['workers']
+
+        if not isinstance(workers, list):
+            workers = [w.strip() for w in workers.split(',') if w.strip()]
+
+        main_runner.workers(workers, files, recursive)
 
     # If no modules were loaded, don't try and print nothing.
     if loaded == 0:
@@ -297,6 +679,11 @@ def run(files, **options):
     # Run the tests.
     try:
         success = main_runner.run_tests()
+    except CcinoException as e:
+        if cov is not None:
+            cov.stop()
+
+        raise click.ClickException(str(e))
     except Exception as e:
         if cov is not None:
             cov.stop()
@@ -305,12 +692,95 @@ def run(files, **options):
     else:
         if cov is not None:
             cov.stop()
+
+        if use_cover:
             cov.save()
 
             cov.html_report()
 
-        if not success:
+        if use_watch:
+            watch(main_runner, files, recursive)
+        elif not success:
             sys.exit(1)
     finally:
         for file in open_files:
             file.close()
+
+
+def check_address(ctx, param, value):
+    """Check if an address is a valid HOST:PORT address.
+
+    Args:
+        ctx (:obj:`click.Context`): The click context.
+        param (str): The paramater name.
+        value (str): The paramter value.
+
+    Returns:
+        Tuple[str, int]: The host and port.
+    """
+
+    try:
+        return parse_address(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+@click.command(context_settings=settings, options_metavar='[options]')
+@click.option('--listen', metavar='<host:port>', required=True,
+        callback=check_address,
+        help='Address to accept coordinators on.')
+def worker(listen):
+    """Run tests handed out by a coordinator (ccino --workers)."""
+
+    serve_worker(*listen)
+
+
+@click.command(context_settings=settings, options_metavar='[options]')
+@click.option('--socket', 'path', metavar='<path>', default=DEFAULT_SOCKET,
+        show_default=True, help='Unix socket to accept clients on.')
+@click.option('--preload', metavar='<module>', multiple=True,
+        help='Import a module up front. Can be given more than once.')
+@click.option('--config', metavar='<file>',
+        type=click.Path(exists=True, resolve_path=True),
+        help='Specify the config file.')
+def serve(path, preload, config):
+    """Keep modules imported to run tests from (ccino --connect)."""
+
+    if config is None:
+        config = DEFAULT_CONFIG
+
+    if not preload and os.path.isfile(config):
+        with click.open_file(config, 'r') as config_file:
+            values = yaml.safe_load(config_file.read()) or {}
+
+        preload = values.get('preload', [])
+
+        if not isinstance(preload, list):
+            preload = [preload]
+
+    try:
+        serve_tests(path, preload)
+    except CcinoException as e:
+        raise click.ClickException(str(e))
+
+
+COMMANDS = {
+    'worker': worker,
+    'serve': serve
+}
+
+
+def main():
+    """Run the command line interface.
+
+    If the first argument names a command in ``COMMANDS`` it is run,
+    otherwise the tests are run with ``run``.
+    """
+
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        command = sys.argv[1]
+
+        COMMANDS[command](sys.argv[2:],
+                prog_name=get_script_name() + ' ' + command)
+    else:
+        run()
@@ -0,0 +1,425 @@
+"""Collect tests from their source without running it."""
+
+from __future__ import absolute_import
+
+import ast
+import re
+
+from .exceptions import NotStatic
+from .fixtures import Hook, Suite, Test
+from .util import find_modules, load_module
+
+
+# What each decorator ccino puts into the builtins adds.
+KINDS = {
+    'suite': 'suite',
+    'describe': 'suite',
+    'test': 'test',
+    'it': 'test',
+    'suite_setup': 'suite_setup',
+    'before': 'suite_setup',
+    'suite_teardown': 'suite_teardown',
+    'after': 'suite_teardown',
+    'setup': 'setup',
+    'before_each': 'setup',
+    'teardown': 'teardown',
+    'after_each': 'teardown'
+}
+
+# Decorators that only change how a fixture runs.
+MODIFIERS = ('skip', 'tag', 'depends_on', 'raises', 'returns', 'concurrent',
+        'gather')
+
+# The keyword argument each kind takes its name with.
+NAME_KEYWORDS = {
+    'suite': 'name',
+    'test': 'desc',
+    'suite_setup': 'desc',
+    'suite_teardown': 'desc',
+    'setup': 'desc',
+    'teardown': 'desc'
+}
+
+_NAMES = '|'.join(sorted(list(KINDS) + list(MODIFIERS), key=len,
+        reverse=True))
+
+# Every use of ccino's names found in the text, including the ones
+# binding them. Strings and comments can match as well, which only
+# means the tree is checked.
+USE_PATTERN = re.compile(r'(?<![\w.])(?:{0})\b'.format(_NAMES))
+
+FUNCTION_DEFS = tuple(getattr(ast, name) for name in
+        ('FunctionDef', 'AsyncFunctionDef') if hasattr(ast, name))
+
+# Nodes whose body has its own names.
+SCOPES = FUNCTION_DEFS + (ast.ClassDef, ast.Lambda)
+
+
+try:
+    STRING_TYPES = (str, unicode)
+except NameError:
+    STRING_TYPES = (str,)
+
+
+class StaticFunction(object):
+    """Stand-in for a fixture function that was not run.
+
+    It carries what the decorators would have set on the function, so
+    selection works on collected fixtures like it does on loaded ones.
+    Collected fixtures cannot be run.
+
+    Attributes:
+        path (str): The file the function is in.
+        lineno (int): The line the function starts on.
+    """
+
+    def __init__(self, name, path, lineno):
+        """Create a new StaticFunction.
+
+        Args:
+            name (str): The name of the function.
+            path (str): The file the function is in.
+            lineno (int): The line the function starts on.
+        """
+
+        self.__name__ = name
+        self.path = path
+        self.lineno = lineno
+
+
+def _get_decorator(node):
+    """Get the name and arguments of a decorator.
+
+    Returns:
+        :obj:`tuple` or :obj:`None`: The name, positional and keyword
+        arguments, or None if it is not a plain name or call of one.
+    """
+
+    if isinstance(node, ast.Name):
+        return node.id, [], {}
+
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+        if getattr(node, 'starargs', None) or getattr(node, 'kwargs', None):
+            raise NotStatic('unpacked decorator arguments', node.lineno)
+
+        keywords = {}
+
+        for keyword in node.keywords:
+            if keyword.arg is None:
+                raise NotStatic('unpacked decorator arguments', node.lineno)
+
+            keywords[keyword.arg] = keyword.value
+
+        for arg in node.args:
+            if type(arg).__name__ == 'Starred':
+                raise NotStatic('unpacked decorator arguments', node.lineno)
+
+        return node.func.id, node.args, keywords
+
+    return None
+
+
+def _literal(node):
+    try:
+        return ast.literal_eval(node)
+    except (TypeError, ValueError):
+        raise NotStatic('decorator argument is not a literal', node.lineno)
+
+
+def _get_callee(node):
+    """Get what a decorator is or calls."""
+    return node.func if isinstance(node, ast.Call) else node
+
+
+class _Collector(object):
+    """Adds the fixtures of a module to a root suite."""
+
+    def __init__(self, path, root):
+        self._path = path
+        self._root = root
+
+        # Decorators that were followed, by id.
+        self._accepted = set()
+
+        # Functions of the suites that were followed, by id.
+        self._suites = set()
+
+    def collect(self, tree, source):
+        # Everything is added to a suite first, so nothing is added to
+        # the root suite unless the whole file can be collected.
+        staging = Suite(None, None, 'staging')
+
+        self._collect_body(tree.body, staging)
+
+        # Walking the whole tree is slow, so it is only done when the
+        # names are used more often than they were followed.
+        if len(USE_PATTERN.findall(source)) != len(self._accepted):
+            self._check(tree, True)
+
+        for hooks, add in ((staging._suite_setups,
+                self._root.add_suite_setup), (staging._setups,
+                self._root.add_setup), (staging._teardowns,
+                self._root.add_teardown), (staging._suite_teardowns,
+                self._root.add_suite_teardown)):
+            for hook in hooks:
+                add(hook)
+
+        for test in staging.tests:
+            if isinstance(test, Suite):
+                self._root.add_suite(test)
+            else:
+                self._root.add_test(test)
+
+        return len(staging.tests)
+
+    def _collect_body(self, body, suite):
+        for node in body:
+            if not isinstance(node, FUNCTION_DEFS) or \
+                    not node.decorator_list:
+                continue
+
+            decorators = []
+
+            for decorator in node.decorator_list:
+                callee = _get_callee(decorator)
+
+                # The runner could be the one with the builtins.
+                if isinstance(callee, ast.Attribute) and callee.attr in KINDS:
+                    raise NotStatic('decorator of a runner', decorator.lineno)
+
+                parsed = _get_decorator(decorator)
+
+                if parsed is not None and (parsed[0] in KINDS or
+                        parsed[0] in MODIFIERS):
+                    decorators.append((decorator, parsed))
+
+            kinds = [parsed for _, parsed in decorators
+                    if parsed[0] in KINDS]
+
+            # Modifiers alone are checked (and refused) later.
+            if not kinds:
+                continue
+
+            if len(kinds) > 1:
+                raise NotStatic('function added more than once', node.lineno)
+
+            for decorator, _ in decorators:
+                self._accepted.add(id(decorator))
+
+            kind = KINDS[kinds[0][0]]
+            func = StaticFunction(node.name, self._path, node.lineno)
+
+            self._modify(func, [parsed for _, parsed in decorators
+                    if parsed[0] in MODIFIERS], node.lineno)
+
+            name = self._get_name(kind, kinds[0], node.lineno)
+
+            if kind == 'suite':
+                self._suites.add(id(node))
+
+                child = Suite(func, suite, name)
+                suite.add_suite(child)
+
+                self._collect_body(node.body, child)
+            elif kind == 'test':
+                suite.add_test(Test(func, name=name))
+            else:
+                getattr(suite, 'add_' + kind)(Hook(func, name=name))
+
+    def _get_name(self, kind, parsed, lineno):
+        _, args, keywords = parsed
+        keyword = NAME_KEYWORDS[kind]
+
+        if len(args) > 1 or set(keywords) - set([keyword]):
+            raise NotStatic('unknown decorator arguments', lineno)
+
+        if args:
+            name = _literal(args[0])
+        elif keyword in keywords:
+            name = _literal(keywords[keyword])
+        else:
+            return None
+
+        if name is not None and not isinstance(name, STRING_TYPES):
+            raise NotStatic('name is not a string', lineno)
+
+        return name
+
+    def _modify(self, func, modifiers, lineno):
+        for name, args, keywords in modifiers:
+            if name == 'skip':
+                condition = True
+
+                if args:
+                    condition = _literal(args[0])
+                elif 'condition' in keywords:
+                    condition = _literal(keywords['condition'])
+
+                if condition:
+                    func._skip = True
+            elif name == 'tag':
+                if keywords:
+                    raise NotStatic('unknown decorator arguments', lineno)
+
+                tags = tuple(_literal(arg) for arg in args)
+
+                func._tags = getattr(func, '_tags', ()) + tags
+            elif name == 'depends_on':
+                if keywords:
+                    raise NotStatic('unknown decorator arguments', lineno)
+
+                ids = tuple(_literal(arg) for arg in args)
+
+                func._depends_on = getattr(func, '_depends_on', ()) + ids
+            elif name in ('concurrent', 'gather'):
+                # The number of workers does not change the tree.
+                func._concurrent = True
+
+                if name == 'gather':
+                    func._gather = True
+
+    def _check(self, node, followed):
+        """Make sure every use of ccino's names was followed and none of
+        them are bound where followed decorators could see it.
+
+        Args:
+            node (:obj:`ast.AST`): The node to check the children of.
+            followed (bool): Whether the node is the module or a suite
+                that was followed.
+        """
+
+        for child in ast.iter_child_nodes(node):
+            decorators = getattr(child, 'decorator_list', ())
+
+            for decorator in decorators:
+                callee = _get_callee(decorator)
+
+                if isinstance(callee, ast.Name) and (callee.id in KINDS or
+                        callee.id in MODIFIERS) and \
+                        id(decorator) not in self._accepted:
+                    raise NotStatic('decorator cannot be followed',
+                            decorator.lineno)
+
+            if isinstance(child, ast.Call) and \
+                    id(child) not in self._accepted and \
+                    isinstance(child.func, ast.Name) and \
+                    (child.func.id in KINDS or child.func.id in MODIFIERS):
+                raise NotStatic('{}() called directly'.format(child.func.id),
+                        child.lineno)
+
+            for name in _get_bound_names(child, followed):
+                if name in KINDS or name in MODIFIERS:
+                    raise NotStatic('{} is bound'.format(name),
+                            getattr(child, 'lineno', node.lineno))
+
+            if isinstance(child, SCOPES):
+                self._check(child, id(child) in self._suites)
+            else:
+                self._check(child, followed)
+
+
+def _get_bound_names(node, followed):
+    """Get the names a node binds.
+
+    Names bound inside functions that are not followed suites are only
+    seen there, unless they are declared global or nonlocal.
+
+    Args:
+        node (:obj:`ast.AST`): The node.
+        followed (bool): Whether the node is directly in the module or
+            a suite that was followed.
+
+    Returns:
+        List[str]: The names.
+    """
+
+    if isinstance(node, (ast.Global, getattr(ast, 'Nonlocal', ast.Global))):
+        return node.names
+
+    if not followed:
+        return []
+
+    if isinstance(node, ast.Name):
+        return [] if isinstance(node.ctx, ast.Load) else [node.id]
+
+    if isinstance(node, ast.alias):
+        return [] if node.name == '*' else \
+                [node.asname or node.name.split('.')[0]]
+
+    if isinstance(node, ast.arguments):
+        # Python 2 keeps these as strings and the others as names.
+        return [name for name in (node.vararg, node.kwarg)
+                if isinstance(name, STRING_TYPES)]
+
+    # Function and class names, parameters, exception names and
+    # captures of match statements.
+    for field in ('name', 'arg', 'rest'):
+        name = getattr(node, field, None)
+
+        if isinstance(name, STRING_TYPES) and not isinstance(node,
+                ast.keyword):
+            return [name]
+
+    return []
+
+
+def collect_file(path, root):
+    """Add the fixtures of a test file to a root suite without running
+    it.
+
+    Only the decorators ccino puts into the builtins are followed, on
+    functions in the module or directly inside suites, with literal
+    arguments.
+
+    Args:
+        path (str): The test file.
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite to
+            add to.
+
+    Returns:
+        int: The number of top level suites and tests added.
+
+    Raises:
+        :obj:`ccino.exceptions.NotStatic`: If the file defines fixtures
+            in a way that cannot be followed. Nothing is added then.
+        SyntaxError: If the file is not valid Python.
+    """
+
+    with open(path) as source_file:
+        source = source_file.read()
+
+    tree = ast.parse(source, path)
+
+    return _Collector(path, root).collect(tree, source)
+
+
+def collect_paths(paths, recursive, root):
+    """Add the fixtures of files and directories to a root suite,
+    importing the files that cannot be collected statically.
+
+    Imported files add their fixtures with the builtins, so they have
+    to go to the same root suite.
+
+    Args:
+        paths (List[str]): The files and directories to collect.
+        recursive (bool): Whether to collect subdirectories.
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+
+    Returns:
+        List[Tuple[str, str]]: The files that were imported, with the
+        reason.
+    """
+
+    imported = []
+
+    for path in find_modules(paths, recursive):
+        try:
+            collect_file(path, root)
+        except NotStatic as e:
+            imported.append((path, 'line {:d}: {}'.format(e.lineno, e)))
+            load_module(path)
+        except SyntaxError as e:
+            imported.append((path, 'line {}: {}'.format(e.lineno, e.msg)))
+            load_module(path)
+
+    return imported
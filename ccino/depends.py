@@ -0,0 +1,194 @@
+"""Tests that depend on other tests or suites passing first."""
+
+from __future__ import absolute_import
+
+import heapq
+
+from .exceptions import CcinoException
+from .fixtures import Suite, Test
+
+
+def _find_inside(suite, names):
+    for name in names:
+        if not isinstance(suite, Suite):
+            return None
+
+        for child in suite.tests:
+            if child.name == name:
+                suite = child
+                break
+        else:
+            return None
+
+    return suite
+
+
+def _find(test, path):
+    """Find what a dependency path refers to.
+
+    The path is looked up inside the suites around the test, starting
+    with the closest one, so siblings can be named on their own.
+    """
+
+    names = path.split('::')
+    suite = test.parent
+
+    while suite is not None:
+        found = _find_inside(suite, names)
+
+        if found is not None:
+            return found
+
+        suite = suite.parent
+
+    raise CcinoException('{!r} depends on unknown {!r}'.format(test.id, path))
+
+
+def _get_ancestors(runnable):
+    ancestors = []
+
+    while runnable is not None:
+        ancestors.append(runnable)
+        runnable = runnable.parent
+
+    return ancestors
+
+
+def _add_edge(graphs, before, after):
+    """Make the suites or tests containing before and after (below the
+    suite containing both) run in that order.
+    """
+
+    after_chain = _get_ancestors(after)
+    common = set(after_chain)
+
+    previous = None
+
+    for runnable in _get_ancestors(before):
+        if runnable in common:
+            break
+
+        previous = runnable
+
+    suite = runnable
+
+    if before is after:
+        raise CcinoException('{!r} depends on itself'.format(after.id))
+
+    if previous is None:
+        raise CcinoException('{!r} depends on a suite it is in'
+                .format(after.id))
+
+    later = after_chain[after_chain.index(suite) - 1]
+
+    graphs.setdefault(suite, set()).add((previous, later))
+
+
+def _sort(suite, edges):
+    """Order the tests of a suite so the edges are kept, moving as
+    little as possible.
+    """
+
+    tests = suite.tests
+    indexes = dict((id(test), i) for i, test in enumerate(tests))
+
+    following = [[] for _ in tests]
+    waiting = [0] * len(tests)
+
+    for before, after in edges:
+        following[indexes[id(before)]].append(indexes[id(after)])
+        waiting[indexes[id(after)]] += 1
+
+    # The earliest test that can run next always goes first.
+    ready = [i for i in range(len(tests)) if not waiting[i]]
+    heapq.heapify(ready)
+
+    order = []
+
+    while ready:
+        i = heapq.heappop(ready)
+        order.append(i)
+
+        for j in following[i]:
+            waiting[j] -= 1
+
+            if not waiting[j]:
+                heapq.heappush(ready, j)
+
+    if len(order) < len(tests):
+        stuck = [tests[i].id for i in range(len(tests)) if waiting[i]]
+
+        raise CcinoException('dependency cycle between {}'
+                .format(', '.join(repr(name) for name in stuck)))
+
+    suite._tests = [tests[i] for i in order]
+
+    return order != sorted(order)
+
+
+def resolve_dependencies(root):
+    """Find the prerequisites of tests decorated with ``depends_on``
+    and order the tree so they run first.
+
+    Prerequisites are moved ahead of the tests that need them in the
+    closest suite containing both. Otherwise the order is kept.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+
+    Returns:
+        bool: Whether anything was moved.
+
+    Raises:
+        :obj:`ccino.exceptions.CcinoException`: If a dependency is
+            unknown, is a suite the test is in, or the dependencies
+            form a cycle.
+    """
+
+    for runnable in root.walk():
+        paths = getattr(runnable.func, '_depends_on', None)
+
+        if paths and isinstance(runnable, Test):
+            runnable.depends_on(_find(runnable, path) for path in paths)
+
+    return order_dependencies(root)
+
+
+def order_dependencies(root):
+    """Move the prerequisites of tests ahead of them again, after the
+    tree was reordered.
+
+    Prerequisites that are no longer in the tree are ignored.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite,
+            after ``resolve_dependencies``.
+
+    Returns:
+        bool: Whether anything was moved.
+
+    Raises:
+        :obj:`ccino.exceptions.CcinoException`: If the dependencies
+            form a cycle.
+    """
+
+    dependents = [runnable for runnable in root.walk()
+            if isinstance(runnable, Test) and runnable.dependencies]
+
+    if not dependents:
+        return False
+
+    runnables = set(root.walk())
+    graphs = {}
+
+    for test in dependents:
+        for dependency in test.dependencies:
+            if dependency in runnables:
+                _add_edge(graphs, dependency, test)
+
+    moved = False
+
+    for suite, edges in graphs.items():
+        moved = _sort(suite, edges) or moved
+
+    return moved
@@ -0,0 +1,584 @@
+"""Run the top level tests and suites on workers over TCP."""
+
+from __future__ import absolute_import
+
+import hashlib
+import json
+import os
+import socket
+import sys
+import traceback
+
+from .depends import resolve_dependencies
+from .exceptions import CcinoBail, CcinoException
+from .fixtures.provider import ProviderCache, resolve_providers
+from .journal import mark_done
+from .parallel import Scheduler, WorkerSession, can_fork
+from .results import mark_cached, mark_cached_cases
+from .selection import leave_out, limit_cases, select
+from .util import load_paths
+from .util.event_loop import EventLoop
+from .util.timer import now
+
+
+# Seconds to wait when connecting to a worker.
+CONNECT_TIMEOUT = 10
+
+# Times a unit is tried before its worker disconnecting is a failure.
+MAX_ATTEMPTS = 2
+
+
+def parse_address(address):
+    """Split a ``'HOST:PORT'`` address.
+
+    Args:
+        address (str): The address.
+
+    Returns:
+        Tuple[str, int]: The host and port.
+
+    Raises:
+        ValueError: If the address is not valid.
+    """
+
+    host, _, port = address.rpartition(':')
+
+    if not host or not port.isdigit():
+        raise ValueError('address must be HOST:PORT')
+
+    return host.strip('[]'), int(port)
+
+
+def fingerprint(root):
+    """Get a hash of every runnable under a root suite.
+
+    Workers only run units for a coordinator that collected the same
+    tree, since events refer to runnables by their position.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+
+    Returns:
+        str: The hash.
+    """
+
+    digest = hashlib.sha1()
+
+    for runnable in root.walk():
+        digest.update(runnable.id.encode('utf-8') + b'\n')
+
+    return digest.hexdigest()
+
+
+class Channel(object):
+    """Newline separated JSON messages over a socket.
+
+    Tuples are sent as lists.
+    """
+
+    def __init__(self, sock):
+        """Create a new Channel.
+
+        Args:
+            sock (:obj:`socket.socket`): A connected socket.
+        """
+
+        self._sock = sock
+        self._buffer = b''
+
+    def send(self, message):
+        line = json.dumps(message, separators=(',', ':')) + '\n'
+
+        self._sock.sendall(line.encode('utf-8'))
+
+    def recv(self):
+        """Receive the next message.
+
+        Raises:
+            EOFError: If the other side closed the connection.
+        """
+
+        while b'\n' not in self._buffer:
+            data = self._sock.recv(65536)
+
+            if not data:
+                raise EOFError()
+
+            self._buffer += data
+
+        line, self._buffer = self._buffer.split(b'\n', 1)
+
+        return json.loads(line.decode('utf-8'))
+
+    def buffered(self):
+        """bool: Whether a message can be received without waiting."""
+        return b'\n' in self._buffer
+
+    def fileno(self):
+        return self._sock.fileno()
+
+    def close(self):
+        self._sock.close()
+
+
+class _UnitChannel(object):
+    """Turns unit requests from the coordinator into unit indexes and
+    the indexes of prerequisites that failed.
+
+    The coordinator asks for units by index and by their path of
+    suite names. The path has to match, otherwise the trees differ.
+    """
+
+    def __init__(self, channel, root):
+        self._channel = channel
+        self._root = root
+
+    def send(self, message):
+        self._channel.send(message)
+
+    def recv(self):
+        message = self._channel.recv()
+
+        if message is None:
+            return None
+
+        unit = message['unit']
+        units = self._root.tests
+
+        if unit >= len(units) or list(units[unit].path) != message['path']:
+            raise CcinoException(
+                'No unit at {}'.format('::'.join(message['path']))
+            )
+
+        return unit, message['failed']
+
+
+def serve_worker(host, port):
+    """Run units for coordinators that connect, until interrupted.
+
+    Each coordinator connection is handled in a forked process (where
+    available) so every session starts from a clean interpreter.
+
+    Args:
+        host (str): The host to listen on.
+        port (int): The port to listen on. 0 picks a free port.
+    """
+
+    info = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)[0]
+
+    server = socket.socket(info[0], socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(info[4])
+    server.listen(16)
+
+    address = server.getsockname()
+
+    sys.stderr.write('ccino worker listening on {}:{:d}\n'
+            .format(address[0], address[1]))
+    sys.stderr.flush()
+
+    try:
+        while True:
+            conn = server.accept()[0]
+
+            if not can_fork():
+                _serve_session(conn)
+                continue
+
+            _reap_sessions()
+
+            if os.fork() == 0:
+                server.close()
+                code = 0
+
+                try:
+                    _serve_session(conn)
+                except Exception:
+                    traceback.print_exc()
+                    code = 1
+                finally:
+                    os._exit(code)
+
+            conn.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+def _reap_sessions():
+    try:
+        while os.waitpid(-1, os.WNOHANG)[0]:
+            pass
+    except OSError:
+        pass
+
+
+def _serve_session(sock):
+    """Load the coordinator's tests and run the units it hands out.
+
+    The first message names the paths to load. Root suite setup hooks
+    run once the tests are loaded, and root suite teardown hooks run
+    after the coordinator stops the session. Their events are sent as
+    unit None.
+    """
+
+    from .runner import Runner, insert_into_globals, insert_into_builtins
+
+    channel = Channel(sock)
+
+    try:
+        request = channel.recv()
+    except EOFError:
+        return
+
+    os.chdir(request['cwd'])
+
+    if request['cwd'] not in sys.path:
+        sys.path.insert(0, request['cwd'])
+
+    runner = Runner()
+
+    insert_into_globals(runner)
+    insert_into_builtins(runner)
+
+    try:
+        load_paths(request['paths'], request['recursive'])
+    except Exception:
+        channel.send((None, 'error', traceback.format_exc()))
+        return
+
+    root = runner.root
+    options = dict(request['options'], loop=EventLoop(), coverage=None,
+            providers=None)
+
+    # Tests are numbered after being ordered like the coordinator does.
+    resolve_dependencies(root)
+
+    if resolve_providers(root):
+        options['providers'] = ProviderCache(root)
+
+    if request['selected'] is not None:
+        select(root, request['selected'])
+
+    limit_cases(root, request['case_ranges'])
+
+    mark_cached(root, request['cached'])
+    mark_cached_cases(root, request['cached_cases'])
+    mark_done(root, request['resumed'])
+    leave_out(root, request['left_out'])
+
+    channel.send((None, 'loaded', fingerprint(root)))
+
+    session = WorkerSession(_UnitChannel(channel, root), root, options)
+
+    try:
+        if not session.run_hooks(root.run_suite_setups):
+            session.run()
+
+        session.run_hooks(root.run_suite_teardowns)
+        session.close()
+    except EOFError:
+        pass
+    finally:
+        # Values are still finished if the coordinator went away.
+        if options['providers'] is not None:
+            options['providers'].close()
+
+        options['loop'].close()
+        channel.close()
+
+
+class _RemoteWorker(object):
+    """Coordinator side handle of a worker session."""
+
+    def __init__(self, address, units):
+        self.address = address
+        self.unit = None
+
+        self._units = units
+
+        sock = socket.create_connection(parse_address(address),
+                CONNECT_TIMEOUT)
+        sock.settimeout(None)
+
+        self._channel = Channel(sock)
+
+    def send(self, message):
+        self._channel.send(message)
+
+    def assign(self, unit, failed):
+        self.unit = unit
+        self._channel.send({
+            'unit': unit,
+            'path': list(self._units[unit].path),
+            'failed': failed
+        })
+
+    def stop(self):
+        self.unit = None
+        self._channel.send(None)
+
+    def recv(self):
+        return self._channel.recv()
+
+    def fileno(self):
+        return self._channel.fileno()
+
+    def buffered(self):
+        return self._channel.buffered()
+
+    def close(self):
+        self._channel.close()
+
+
+def _warn(message):
+    sys.stderr.write('ccino: {}\n'.format(message))
+
+
+class _RemoteScheduler(Scheduler):
+    """Scheduler that runs units on worker sessions over TCP.
+
+    Units are only reported once they finish, so the unit of a worker
+    that disconnects can be run again by another worker.
+    """
+
+    stream = False
+
+    def __init__(self, root, reporter, options, durations, addresses,
+            request):
+        super(_RemoteScheduler, self).__init__(root, reporter, options,
+                durations)
+
+        self._addresses = addresses
+        self._request = request
+        self._fingerprint = fingerprint(root)
+        self._reported = False
+        self._idle = []
+        self._attempts = [0] * len(self.units)
+
+    def start(self):
+        for address in self._addresses:
+            worker = self._connect(address, report=not self._reported)
+
+            if worker is not None:
+                self.add_worker(worker)
+
+        if not self.workers:
+            raise CcinoException('No workers could be used.')
+
+    def _connect(self, address, report):
+        """Start a session on a worker.
+
+        Args:
+            address (str): The worker address.
+            report (bool): Whether to report the root suite setup
+                hooks run by the worker.
+
+        Returns:
+            :obj:`_RemoteWorker` or :obj:`None`: The worker, or None if
+            it could not be used.
+
+        Raises:
+            :obj:`ccino.exceptions.CcinoBail`: If a reported root
+                suite setup hook failed.
+        """
+
+        try:
+            worker = _RemoteWorker(address, self.units)
+        except (IOError, OSError, ValueError) as e:
+            _warn('could not use worker {}: {}'.format(address, e))
+            return None
+
+        try:
+            worker.send(self._request)
+
+            unit, kind, payload = worker.recv()
+
+            if kind == 'error':
+                raise CcinoException(payload)
+
+            if payload != self._fingerprint:
+                raise CcinoException('worker loaded different tests')
+
+            bailed = self._read_hooks(worker, report)
+        except (EOFError, IOError, OSError, CcinoException) as e:
+            _warn('could not use worker {}: {}'.format(address, e))
+            worker.close()
+            return None
+
+        self._reported = self._reported or report
+
+        if bailed:
+            worker.close()
+
+            if report:
+                raise CcinoBail()
+
+            _warn('root suite hooks failed on worker {}'.format(address))
+            return None
+
+        return worker
+
+    def _read_hooks(self, worker, report, end='hooks_done'):
+        """Read the events of root suite hooks run by a worker.
+
+        Keyword Args:
+            end (str): The message kind after the last event.
+
+        Returns:
+            bool: Whether a hook bailed.
+        """
+
+        bailed = False
+
+        # Otherwise the worker skips the tests after a failed hook.
+        bail = self._options['bail'] or self._options['bail_on_hook_failure']
+
+        while True:
+            unit, kind, payload = worker.recv()
+
+            if kind == end:
+                return bailed
+
+            if kind == 'hook_fail' and bail:
+                bailed = True
+
+            if report:
+                self.handle(kind, payload)
+
+    def idle(self, worker):
+        # Keep idle workers around in case a unit has to be run again.
+        self._idle.append(worker)
+
+    def lost(self, worker):
+        unit = worker.unit
+
+        if worker in self._idle:
+            self._idle.remove(worker)
+
+        self.remove_worker(worker)
+
+        self._attempts[unit] += 1
+
+        # A unit that keeps taking its worker down is a failure.
+        if self._attempts[unit] < MAX_ATTEMPTS:
+            _warn('lost worker {}, running its unit again'
+                    .format(worker.address))
+
+            self.requeue(unit)
+        else:
+            self.crash(unit, 'worker {} disconnected'.format(worker.address))
+
+        # Sessions are separate processes so the worker may still be
+        # there to start a new one.
+        replacement = self._connect(worker.address, report=False)
+
+        if replacement is not None:
+            self.add_worker(replacement)
+        elif self._idle and self.remaining:
+            self.hand_out(self._idle.pop())
+
+        if not self.workers and self.remaining:
+            raise CcinoException('All workers were lost.')
+
+    def finish(self):
+        """Stop the workers and report the root suite teardown hooks
+        of one of them, along with finishing its values.
+        """
+
+        report = True
+
+        for worker in list(self.workers):
+            if worker.unit is not None:
+                continue
+
+            try:
+                worker.stop()
+                self._read_hooks(worker, report)
+                self._read_hooks(worker, report, end='closed')
+            except (EOFError, IOError, OSError):
+                continue
+
+            report = False
+
+
+def run_distributed(root, reporter, options, addresses, paths, recursive,
+        durations=None, selected=None, cached=(), left_out=(), resumed=(),
+        case_ranges=(), cached_cases=()):
+    """Run a root suite with its top level units on remote workers.
+
+    Every worker loads the same paths (so the coordinator and workers
+    need the same files at the same location) and runs the root suite
+    hooks itself. Units are handed out like ``run_parallel`` does and
+    reported in the order they were added. A unit whose worker
+    disconnects is run again on another worker.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+        reporter (:obj:`ccino.reporters.base.BaseReporter`): The
+            reporter to call for printing.
+        options (dict): ccino runner options.
+        addresses (List[str]): ``'HOST:PORT'`` addresses of workers
+            started with ``ccino worker``.
+        paths (List[str]): The files and directories the tests were
+            loaded from.
+        recursive (bool): Whether subdirectories were loaded.
+
+    Keyword Args:
+        durations (dict): Previous durations in seconds by runnable
+            id, used to start the longest units first.
+        selected (List[int]): Indexes of the tests the root suite was
+            pruned to with ``ccino.selection.select``, or None if it
+            was not pruned. Workers prune their tests the same way.
+        cached (List[int]): Indexes of the units in ``root.tests``
+            that are reported as passed without running. Workers mark
+            them the same way.
+        left_out (List[int]): Indexes of the tests skipped with
+            ``ccino.selection.leave_out``. Workers skip them the same
+            way.
+        resumed (List[Tuple[int, tuple]]): Tests reported with their
+            results from a journal, from ``ccino.journal.find_done``.
+            Workers report them the same way.
+        case_ranges (List[Tuple[int, int, int]]): Ranges of cases
+            parametrized tests are limited to, from
+            ``ccino.selection.get_case_ranges``. Workers limit them the
+            same way.
+        cached_cases (List[Tuple[int, list]]): Cases of cached
+            parametrized tests, from ``ccino.results.get_cached_cases``.
+            Workers report them the same way.
+
+    Raises:
+        :obj:`ccino.exceptions.CcinoBail`: If the runner needs to
+            stop all tests immediately.
+        :obj:`ccino.exceptions.CcinoException`: If no workers could
+            be used.
+    """
+
+    start = now()
+
+    reporter.base_suite_start(root)
+
+    request = {
+        'cwd': os.getcwd(),
+        'paths': [os.path.abspath(path) for path in paths],
+        'recursive': recursive,
+        'selected': selected,
+        'cached': list(cached),
+        'left_out': list(left_out),
+        'resumed': list(resumed),
+        'case_ranges': list(case_ranges),
+        'cached_cases': list(cached_cases),
+        'options': {
+            'bail': options['bail'],
+            'bail_on_hook_failure': options['bail_on_hook_failure'],
+            'isolate': options['isolate']
+        }
+    }
+
+    _RemoteScheduler(root, reporter, options, durations or {}, addresses,
+            request).run()
+
+    root.duration = now() - start
+
+    reporter.base_suite_end(root)
@@ -20,3 +20,30 @@ class TestDidNotReturn(CcinoException):
 
 class UnknownSignature(CcinoException):
     pass
+
+
+class IsolatedFailure(CcinoException):
+    """A test run in a separate process failed.
+
+    Attributes:
+        exc_info (tuple): The failure as plain exception information
+            from ``ccino.reporters.base.get_exception_info``.
+    """
+
+    def __init__(self, exc_info):
+        super(IsolatedFailure, self).__init__(exc_info[0])
+
+        self.exc_info = exc_info
+
+
+class NotStatic(CcinoException):
+    """A test file cannot be collected without running it.
+
+    Attributes:
+        lineno (int): The line that could not be followed.
+    """
+
+    def __init__(self, message, lineno):
+        super(NotStatic, self).__init__(message)
+
+        self.lineno = lineno
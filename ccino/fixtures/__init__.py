@@ -3,5 +3,6 @@
 from __future__ import absolute_import
 
 from .hook import Hook
+from .provider import Provider
 from .suite import Suite
-from .test import Test
+from .test import Case, Test
@@ -2,12 +2,14 @@ from __future__ import absolute_import
 
 from ..exceptions import CcinoBail, UnknownSignature
 from .runnable import Runnable
-from ..util import get_num_args
+from ..util.timer import now
 
 
 class Hook(Runnable):
     """Runnable class for preparing test envionrments."""
 
+    __slots__ = ()
+
     def run(self, reporter, options):
         """Run the hook.
 
@@ -19,8 +21,8 @@ class Hook(Runnable):
         Raises:
             :obj:`ccino.exceptions.UnknownSignature`: If func has
                 an unsupported number of arguments.
-            :obj:`ccino.exceptions.CcinoBail`: If the runner needs to
-                stop all tests immediately.
+            :obj:`ccino.exceptions.CcinoBail`: If the hook failed and
+                the runner bails on hook failures.
         """
 
         super(Hook, self).run(reporter, options)
@@ -30,21 +32,33 @@ class Hook(Runnable):
 
         # If func has one argument pass this object in.
 
-        num_arguments = get_num_args(self.func)
+        num_arguments = self.num_arguments
 
-        if num_arguments > 1:
+        if num_arguments > 1 and self.arguments is None:
             raise UnknownSignature()
 
+        start = now()
+
         try:
-            if num_arguments == 0:
-                result = self.func()
-            else:
-                result = self.func(self)
+            result = self._call(num_arguments, options)
         except Exception as e:
+            self.duration = now() - start
+            self.mark_failed()
+
             reporter.base_hook_fail(self)
 
-            # Bail if an error occured (even with the bail option set
-            # to False).
-            raise CcinoBail()
+            if options['bail'] or options['bail_on_hook_failure']:
+                raise CcinoBail()
+
+            # Otherwise only the suite of the hook is given up on.
+            self.parent.give_up()
         else:
+            self.duration = now() - start
+
             reporter.base_hook_pass(self)
+        finally:
+            providers = options['providers']
+
+            # Values taken by suite hooks only last as long as the hook.
+            if providers is not None:
+                providers.end_test(self, reporter)
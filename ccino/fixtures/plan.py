@@ -0,0 +1,137 @@
+from __future__ import absolute_import
+
+from ..util.timer import now
+
+
+# Kinds of plan steps.
+SUITE_START = 0
+SUITE_END = 1
+# A test with the setup and teardown hooks around it.
+RUN = 2
+CONCURRENT = 3
+# A suite setup or suite teardown hook.
+HOOK = 4
+
+
+class Plan(object):
+    """Flat list of what running a suite does, in order.
+
+    A plan is made by ``Suite.compile`` with the skipped suites, the
+    setup and teardown hooks around each test, and the checks that
+    only depend on the functions already worked out, so running it is
+    a single loop over its steps.
+    """
+
+    def __init__(self, steps=None, hooks=None):
+        """Create a new Plan.
+
+        Keyword Args:
+            steps (List[tuple]): ``(kind, runnable)`` pairs.
+            hooks (dict): The setup and teardown hooks around the
+                tests of each suite, as a pair of lists by suite.
+        """
+
+        self.steps = steps if steps is not None else []
+        self.hooks = hooks if hooks is not None else {}
+
+    def add(self, kind, runnable):
+        """Add a step to the end of the plan.
+
+        Args:
+            kind (int): What to do with the runnable.
+            runnable (:obj:`ccino.fixtures.Runnable`): The runnable.
+        """
+
+        self.steps.append((kind, runnable))
+
+    def run(self, reporter, options):
+        """Run the steps of the plan.
+
+        Args:
+            reporter (:obj:`ccino.reporters.base.BaseReporter`): The
+                reporter to call for printing.
+            options (dict): ccino runner options.
+
+        Raises:
+            :obj:`ccino.exceptions.UnknownSignature`: If a test has an
+                unsupported number of function arguments.
+            :obj:`ccino.exceptions.CcinoBail`: If the runner needs to
+                stop all tests immediately.
+        """
+
+        starts = []
+        recorder = options['coverage']
+
+        for kind, runnable in self.steps:
+            if kind == RUN:
+                self._run_test(runnable, reporter, options)
+            elif kind == HOOK:
+                if recorder is not None:
+                    recorder.switch(runnable)
+
+                runnable.run(reporter, options)
+            elif kind == SUITE_START:
+                starts.append(now())
+                runnable._running = True
+                reporter.base_suite_start(runnable)
+            elif kind == SUITE_END:
+                runnable.duration = now() - starts.pop()
+                runnable._running = False
+
+                if options['providers'] is not None:
+                    options['providers'].end_suite(runnable, reporter)
+
+                reporter.base_suite_end(runnable)
+            elif recorder is not None:
+                # Lines run on threads at once cannot be told apart.
+                for test in runnable.tests:
+                    runnable.run_child(test, reporter, options)
+            else:
+                runnable._run_concurrently(reporter, options)
+
+    def _run_test(self, test, reporter, options):
+        """Run a test with the setup and teardown hooks around it."""
+
+        recorder = options['coverage']
+        providers = options['providers']
+
+        if providers is not None:
+            providers.start_test(test)
+
+        # Tests skipped before they run (like ones left out of a time
+        # budget or after a hook failed) do not need their hooks.
+        if test.skipped or test.cached or test.parent.skipped:
+            setups, teardowns = (), ()
+        else:
+            setups, teardowns = self.hooks[test.parent]
+
+        for setup in setups:
+            if recorder is not None:
+                recorder.switch(setup)
+
+            setup.run(reporter, options)
+
+            # A failing setup gives up on the rest of its suite, but
+            # the teardowns still run.
+            if test.skipped:
+                break
+
+        if recorder is not None:
+            recorder.switch(test)
+
+        test.run(reporter, options)
+
+        for teardown in teardowns:
+            if recorder is not None:
+                recorder.switch(teardown)
+
+            teardown.run(reporter, options)
+
+        if providers is not None:
+            providers.end_test(test, reporter)
+
+            if test.parent.is_root:
+                providers.end_suite(test, reporter)
+
+    def __len__(self):
+        return len(self.steps)
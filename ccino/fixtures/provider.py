@@ -0,0 +1,531 @@
+from __future__ import absolute_import
+
+import inspect
+import os
+import sys
+import threading
+import traceback
+from types import GeneratorType
+
+from ..exceptions import CcinoException
+from ..util import get_func_args
+from ..util.event_loop import get_event_loop, iscoroutine
+from .runnable import Runnable
+from .suite import Suite
+
+
+# Scopes from the shortest lived to the longest lived.
+SCOPES = ('test', 'suite', 'file', 'session')
+
+
+class Provider(Runnable):
+    """Runnable class for values passed to tests and hooks by the
+    names of their arguments.
+
+    The function builds the value and can take other values by the
+    names of its arguments as well. If it is a generator, the value is
+    what it yields first and the rest of it runs when the scope of the
+    value ends.
+    """
+
+    __slots__ = ('_scope', '_persist', '_inputs')
+
+    def __init__(self, func, parent=None, name=None, scope='test',
+            persist=False, inputs=()):
+        """Create a new Provider.
+
+        Args:
+            func (Callable): The function building the value.
+
+        Keyword Args:
+            parent (:obj:`ccino.fixtures.Runnable` or :obj:`None`):
+                The suite the provider was added to.
+            name (str): The argument name the value is passed by.
+            scope (str): How long a value is kept, one of ``SCOPES``.
+            persist (bool): Whether values are kept on disk between
+                runs.
+            inputs (Iterable[str]): Files the values are built from,
+                relative to the file of func. Values are built again
+                when they change.
+
+        Raises:
+            ValueError: If the scope is unknown, or func is a generator
+                function and the values are kept on disk.
+            :obj:`ccino.exceptions.AlreadyRunnableException`: If a
+                runnable has already been made with func.
+        """
+
+        if scope not in SCOPES:
+            raise ValueError('unknown fixture scope {!r}'.format(scope))
+
+        # Values loaded from disk have nothing to finish.
+        if persist and inspect.isgeneratorfunction(func):
+            raise ValueError('fixtures kept on disk cannot be generators')
+
+        super(Provider, self).__init__(func, parent, name)
+
+        self._scope = scope
+        self._persist = persist
+        self._inputs = tuple(inputs)
+
+    def build(self, arguments, options):
+        """Build a value.
+
+        Args:
+            arguments (list): The values func takes.
+            options (dict): ccino runner options.
+
+        Returns:
+            tuple: The value and the generator to finish when its scope
+            ends, or None.
+        """
+
+        result = self.func(*arguments)
+
+        # asyncio counts generators as coroutines on older Pythons.
+        if isinstance(result, GeneratorType):
+            return next(result), result
+
+        if iscoroutine(result):
+            result = get_event_loop(options).run(result)
+
+        return result, None
+
+    @property
+    def scope(self):
+        """str: How long a value is kept, one of ``SCOPES``."""
+        return self._scope
+
+    @property
+    def persist(self):
+        """bool: Whether values are kept on disk between runs."""
+        return self._persist
+
+    @property
+    def inputs(self):
+        """Tuple[str]: Files the values are built from."""
+        return self._inputs
+
+
+def _get_file(runnable):
+    """Get the file of the top level suite or test a runnable is in."""
+
+    while runnable.parent is not None and runnable.parent.parent is not None:
+        runnable = runnable.parent
+
+    code = getattr(runnable.func, '__code__', None)
+
+    return code.co_filename if code is not None else None
+
+
+class ProviderCache(object):
+    """Values of providers built during a run, by scope.
+
+    A value is built the first time it is needed in its scope, and its
+    generator is finished when the scope ends: after the hooks of a
+    test, at the end of a suite, after the last top level suite or
+    test of a file, or at the end of the run. Values are only finished
+    by the process that built them, so session values built before
+    workers are forked (see ``build_session``) are shared by them and
+    finished once.
+    """
+
+    def __init__(self, root, store=None):
+        """Create a new ProviderCache.
+
+        Args:
+            root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+
+        Keyword Args:
+            store (:obj:`ccino.persist.FixtureCache`): Where values of
+                providers with ``persist`` are kept between runs. They
+                are built every run without one.
+        """
+
+        self._root = root
+        self._store = store
+        self._last_units = None
+
+        # (scope, key) pairs to lists of (provider, value, generator,
+        # pid, stored key) in the order they were built.
+        self._values = {}
+        self._found = {}
+
+        # Locks of the values being built, by (scope key, provider), so
+        # values with different keys are built at the same time.
+        self._building = {}
+
+        self._lock = threading.RLock()
+        self._local = threading.local()
+
+    def _get_key(self, scope, runnable):
+        test = getattr(self._local, 'test', None) or runnable
+
+        if scope == 'test':
+            return test
+
+        if scope == 'suite':
+            return test.parent
+
+        if scope == 'file':
+            return _get_file(test)
+
+        return None
+
+    def get(self, provider, runnable, options):
+        """Get the value of a provider for a runnable, building it if
+        needed.
+
+        Args:
+            provider (:obj:`Provider`): The provider.
+            runnable (:obj:`ccino.fixtures.Runnable`): The test or hook
+                the value is passed to.
+            options (dict): ccino runner options.
+
+        Returns:
+            Object: The value.
+        """
+
+        return self._get_entry(provider, runnable, options)[1]
+
+    def _get_entry(self, provider, runnable, options):
+        scope_key = (provider.scope,
+                self._get_key(provider.scope, runnable))
+        key = (scope_key, provider)
+
+        with self._lock:
+            found = self._found.get(key)
+
+            if found is not None:
+                return found
+
+            building = self._building.setdefault(key, threading.Lock())
+
+        # Threads needing the same value wait for the first one to
+        # build it.
+        with building:
+            found = self._found.get(key)
+
+            if found is not None:
+                return found
+
+            try:
+                # What the provider takes is kept for the same runnable.
+                entries = [self._get_entry(argument, runnable, options)
+                        for argument in provider.arguments or ()]
+
+                arguments = [entry[1] for entry in entries]
+
+                if provider.persist and self._store is not None:
+                    entry = self._load(provider, entries, arguments, options)
+                else:
+                    value, generator = provider.build(arguments, options)
+                    entry = (provider, value, generator, os.getpid(), None)
+
+                with self._lock:
+                    self._values.setdefault(scope_key, []).append(entry)
+                    self._found[key] = entry
+            finally:
+                with self._lock:
+                    self._building.pop(key, None)
+
+            return entry
+
+    def _load(self, provider, entries, arguments, options):
+        """Load the value of a provider from the store, or build and
+        save it.
+        """
+
+        # Values kept as well are told apart by their keys, which is
+        # faster than pickling them again.
+        key = self._store.get_key(provider, [[entry[4]] if entry[4] else
+                [None, entry[1]] for entry in entries])
+
+        found, value = False, None
+
+        if key is not None:
+            found, value = self._store.load(key)
+
+        if not found:
+            value = provider.build(arguments, options)[0]
+
+            if key is not None and not self._store.save(key, value):
+                key = None
+
+        return (provider, value, None, os.getpid(), key)
+
+    def build_session(self, options):
+        """Build the session values anything in the root suite takes.
+
+        Worker processes forked afterwards use these instead of each
+        building their own. Values that cannot be built are left to
+        be built (and fail) where they are taken.
+
+        Args:
+            options (dict): ccino runner options.
+        """
+
+        runnables = list(self._root.walk())
+        providers = [provider for suite in runnables
+                if isinstance(suite, Suite) for provider in suite.providers]
+
+        for runnable in runnables + providers:
+            if runnable.skipped:
+                continue
+
+            for provider in runnable.arguments or ():
+                if provider is None or provider.scope != 'session':
+                    continue
+
+                try:
+                    self._get_entry(provider, runnable, options)
+                except Exception:
+                    pass
+
+    def get_arguments(self, runnable, options):
+        """Get the arguments to call the function of a runnable with.
+
+        Args:
+            runnable (:obj:`ccino.fixtures.Runnable`): A runnable with
+                providers for its arguments.
+            options (dict): ccino runner options.
+
+        Returns:
+            list: The values, with the runnable itself for arguments
+            without a provider.
+        """
+
+        return [runnable if provider is None else
+                self.get(provider, runnable, options)
+                for provider in runnable.arguments]
+
+    def start_test(self, test):
+        """Build values for a test, and the hooks around it, from now
+        on.
+
+        Args:
+            test (:obj:`ccino.fixtures.Test`): The test.
+        """
+
+        self._local.test = test
+
+    def end_test(self, runnable, reporter):
+        """Finish the values built for a test or a suite hook.
+
+        Args:
+            runnable (:obj:`ccino.fixtures.Runnable`): The test or
+                hook.
+            reporter (:obj:`ccino.reporters.base.BaseReporter`): The
+                reporter to call if finishing a value fails.
+        """
+
+        if getattr(self._local, 'test', None) is runnable:
+            self._local.test = None
+
+        self._end(('test', runnable), reporter)
+
+    def end_suite(self, suite, reporter):
+        """Finish the values built for a suite, and for its file if it
+        is the last top level suite of the file.
+
+        Args:
+            suite (:obj:`ccino.fixtures.Runnable`): The suite, or a top
+                level test.
+            reporter (:obj:`ccino.reporters.base.BaseReporter`): The
+                reporter to call if finishing a value fails.
+        """
+
+        self._end(('suite', suite), reporter)
+
+        if suite.parent is self._root:
+            path = _get_file(suite)
+
+            if self._get_last_units().get(path) is suite:
+                self._end(('file', path), reporter)
+
+    def _get_last_units(self):
+        if self._last_units is None:
+            self._last_units = dict((_get_file(unit), unit)
+                    for unit in self._root.tests)
+
+        return self._last_units
+
+    def _end(self, scope_key, reporter):
+        with self._lock:
+            entries = self._values.pop(scope_key, None)
+
+            if not entries:
+                return
+
+            for entry in reversed(entries):
+                del self._found[(scope_key, entry[0])]
+
+                self._finish(entry, reporter)
+
+    def _finish(self, entry, reporter):
+        provider, _, generator, pid, _ = entry
+
+        # Forked processes only finish what they built.
+        if generator is None or pid != os.getpid():
+            return
+
+        try:
+            next(generator)
+        except StopIteration:
+            pass
+        except Exception:
+            provider.mark_failed()
+
+            if reporter is not None:
+                reporter.base_hook_fail(provider)
+            else:
+                sys.stderr.write('ccino: finishing fixture {!r} failed:\n'
+                        .format(provider.name))
+                traceback.print_exc()
+
+    def close(self, reporter=None):
+        """Finish every value that is left.
+
+        Keyword Args:
+            reporter (:obj:`ccino.reporters.base.BaseReporter`): The
+                reporter to call if finishing a value fails. Errors are
+                written to stderr without one.
+        """
+
+        with self._lock:
+            for scope in SCOPES:
+                for scope_key in [scope_key for scope_key in self._values
+                        if scope_key[0] == scope]:
+                    self._end(scope_key, reporter)
+
+
+def _find(suite, name):
+    while suite is not None:
+        provider = suite.get_provider(name)
+
+        if provider is not None:
+            return provider
+
+        suite = suite.parent
+
+    return None
+
+
+def _takes_arguments(func):
+    if func is None:
+        return False
+
+    code = getattr(func, '__code__', None)
+
+    # Reading the signature is slow, so most functions are passed by
+    # the number of arguments in their code.
+    if code is not None and not code.co_argcount and \
+            not getattr(code, 'co_kwonlyargcount', 0):
+        return False
+
+    return True
+
+
+def _resolve(runnable, start):
+    names = get_func_args(runnable.func)
+    providers = [_find(start, name) for name in names]
+
+    first = 0
+
+    # Parametrized tests take their cases by the leading arguments.
+    if getattr(runnable.func, '_params', None) is not None:
+        while first < len(providers) and providers[first] is None:
+            first += 1
+
+        if first == len(providers):
+            return False
+
+    elif not any(providers):
+        # Hooks and tests taking themselves.
+        if len(names) <= 1 and not isinstance(runnable, Provider):
+            return False
+
+        raise CcinoException('{!r} takes unknown fixture {!r}'
+                .format(runnable.id, names[0]))
+
+    for name, provider in zip(names[first:], providers[first:]):
+        if provider is None:
+            raise CcinoException('{!r} takes unknown fixture {!r}'
+                    .format(runnable.id, name))
+
+    runnable.inject(providers)
+
+    return True
+
+
+def _check_provider(provider, states, chain):
+    """Make sure the values a provider takes do not form a cycle and
+    last at least as long as its own.
+    """
+
+    state = states.get(provider)
+
+    if state == 'done':
+        return
+
+    if state == 'visiting':
+        names = [found.name for found in chain[chain.index(provider):]]
+
+        raise CcinoException('fixture cycle between {}'
+                .format(', '.join(repr(name) for name in names)))
+
+    states[provider] = 'visiting'
+    chain.append(provider)
+
+    for argument in provider.arguments or ():
+        if SCOPES.index(argument.scope) < SCOPES.index(provider.scope):
+            raise CcinoException('{} fixture {!r} takes {} fixture {!r}'
+                    .format(provider.scope, provider.name, argument.scope,
+                        argument.name))
+
+        _check_provider(argument, states, chain)
+
+    chain.pop()
+    states[provider] = 'done'
+
+
+def resolve_providers(root):
+    """Find the providers of the arguments of tests, hooks and other
+    providers.
+
+    Arguments are looked up in the suites around the runnable, starting
+    with the closest one. A hook or test with a single argument that
+    has no provider is passed itself, like before.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+
+    Returns:
+        bool: Whether anything takes values of providers.
+
+    Raises:
+        :obj:`ccino.exceptions.CcinoException`: If an argument has no
+            provider, the providers form a cycle, or a provider takes a
+            value with a shorter scope than its own.
+    """
+
+    found = False
+    providers = []
+
+    for runnable in root.walk():
+        if isinstance(runnable, Suite):
+            for provider in runnable.providers:
+                if _takes_arguments(provider.func):
+                    _resolve(provider, provider.parent)
+
+                providers.append(provider)
+
+        if _takes_arguments(runnable.func):
+            found = _resolve(runnable, runnable.parent) or found
+
+    states = {}
+
+    for provider in providers:
+        _check_provider(provider, states, [])
+
+    return found
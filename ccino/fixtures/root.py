@@ -10,6 +10,8 @@ class RootSuite(Suite):
         Only one of these should exist.
     """
 
+    __slots__ = ()
+
     def __init__(self):
         """Create a new RootSuite."""
         super(RootSuite, self).__init__(None, None, 'root')
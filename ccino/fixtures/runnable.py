@@ -1,6 +1,14 @@
 from __future__ import absolute_import
 
+try:
+    from sys import intern
+except ImportError:
+    # intern is a builtin in Python 2.
+    pass
+
 from ..exceptions import AlreadyRunnableException
+from ..util import get_num_args
+from ..util.event_loop import get_event_loop, iscoroutine
 
 
 class Runnable(object):
@@ -11,8 +19,16 @@ class Runnable(object):
 
     This class checks to make sure a function cannot be assigned to
     multiple Runnable objects.
+
+    Attributes:
+        duration (:obj:`float` or :obj:`None`): Seconds the last run
+            took, or None if it has not been timed.
     """
 
+    # Trees can hold millions of runnables, so they have no __dict__.
+    __slots__ = ('_func', '_parent', '_name', '_skip', '_cached',
+            '_failed', '_num_arguments', '_arguments', 'duration')
+
     def __init__(self, func, parent=None, name=None):
         """Create a new Runnable.
 
@@ -40,7 +56,17 @@ class Runnable(object):
         self._parent = parent
         self._name = name or func.__name__
 
+        # Names are often repeated between suites, like 'setup'.
+        if isinstance(self._name, str):
+            self._name = intern(self._name)
+
         self._skip = False
+        self._cached = False
+        self._failed = False
+        self._num_arguments = None
+        self._arguments = None
+
+        self.duration = None
 
     def run(self, reporter, options):
         """Run the runnable.
@@ -57,19 +83,97 @@ class Runnable(object):
             options (dict): ccino runner options.
         """
 
+        self.check_skip()
+
+    def check_skip(self):
+        """Skip the runnable if func has been marked as skipped."""
+
         if not self.skipped and hasattr(self.func, '_skip') and \
                 self.func._skip == True:
             self.skip()
 
+    def _call(self, num_arguments, options):
+        """Call func, passing in the runnable if it takes an argument.
+
+        Arguments with providers are passed their values instead. If
+        func is a coroutine function, the coroutine is run to
+        completion on the event loop shared by the run.
+
+        Args:
+            num_arguments (int): The number of arguments func takes.
+            options (dict): ccino runner options.
+
+        Returns:
+            Object: What func returned.
+        """
+
+        if self._arguments is not None:
+            result = self.func(*options['providers'].get_arguments(self,
+                    options))
+        elif num_arguments == 0:
+            result = self.func()
+        else:
+            result = self.func(self)
+
+        if iscoroutine(result):
+            result = get_event_loop(options).run(result)
+
+        return result
+
+    def inject(self, providers):
+        """Pass values of providers to func by argument.
+
+        Args:
+            providers (List[:obj:`ccino.fixtures.Provider`]): The
+                provider of each argument of func, or None to pass the
+                runnable itself.
+        """
+
+        self._arguments = tuple(providers)
+
     def skip(self):
         """Skip the runnable."""
         self._skip = True
 
+    def mark_cached(self):
+        """Report the runnable as passed without running it."""
+        self._cached = True
+
+    def mark_failed(self):
+        """Mark the runnable and the suites around it as failed."""
+
+        runnable = self
+
+        while runnable is not None and not runnable._failed:
+            runnable._failed = True
+            runnable = runnable.parent
+
     @property
     def func(self):
         """Callable: The function to be exectuted on run."""
         return self._func
 
+    @property
+    def num_arguments(self):
+        """int: The number of arguments func takes.
+
+        This is read from func the first time it is needed.
+        """
+
+        if self._num_arguments is None:
+            self._num_arguments = get_num_args(self.func)
+
+        return self._num_arguments
+
+    @property
+    def arguments(self):
+        """Tuple[:obj:`ccino.fixtures.Provider`] or :obj:`None`: The
+        providers of the arguments of func, or None if func does not
+        take values of providers.
+        """
+
+        return self._arguments
+
     @property
     def parent(self):
         """:obj:`ccino.fixtures.Runnable` or :obj:`None`: The parent
@@ -87,7 +191,64 @@ class Runnable(object):
         """str: The name of the runnable."""
         return self._name
 
+    @property
+    def path(self):
+        """Tuple[str]: The names of the runnable and its parents,
+        starting below the root suite.
+        """
+
+        names = []
+        runnable = self
+
+        while runnable is not None and runnable.parent is not None:
+            names.append(runnable.name)
+            runnable = runnable.parent
+
+        return tuple(reversed(names))
+
+    @property
+    def id(self):
+        """str: Stable hierarchical identifier of the runnable.
+
+        This is the path joined with ``'::'`` and stays the same
+        between runs as long as the names do not change.
+        """
+
+        return '::'.join(self.path)
+
+    @property
+    def tags(self):
+        """FrozenSet[str]: The tags of the runnable and its parents,
+        added with the ``tag`` decorator.
+        """
+
+        tags = set()
+        runnable = self
+
+        while runnable is not None:
+            tags.update(getattr(runnable.func, '_tags', ()))
+            runnable = runnable.parent
+
+        return frozenset(tags)
+
     @property
     def skipped(self):
         """bool: Whether or not the runnable has been skipped."""
         return self._skip
+
+    @property
+    def failed(self):
+        """bool: Whether the runnable failed in this run, or anything
+        inside it did. Tests left out because a prerequisite failed
+        count as failed as well.
+        """
+
+        return self._failed
+
+    @property
+    def cached(self):
+        """bool: Whether the runnable passed in an earlier run and is
+        reported as passed without running.
+        """
+
+        return self._cached
@@ -1,8 +1,19 @@
 from __future__ import absolute_import
 
-from ..exceptions import UnknownSignature
+import sys
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None
+
+from ..exceptions import CcinoBail, UnknownSignature
+from ..reporters.event import EventRecorder
+from .plan import CONCURRENT, HOOK, Plan, RUN, SUITE_END, SUITE_START
 from .runnable import Runnable
-from ..util import get_num_args
+from ..util import get_num_args, redirect_print
+from ..util.capture_print import CaptureStream
+from ..util.event_loop import get_event_loop
 
 
 class Suite(Runnable):
@@ -12,8 +23,15 @@ class Suite(Runnable):
     with the ``add_suite_setup``, ``add_suite_teardown``,
     ``add_setup``, and ``add_teardown`` methods, and suites are added
     with the ``add_suite`` method.
+
+    Hooks (and providers, added with ``add_provider``) are kept in
+    tuples, so a suite without hooks of a kind shares the empty tuple
+    instead of allocating a list for them.
     """
 
+    __slots__ = ('_tests', '_suite_setups', '_suite_teardowns', '_setups',
+            '_teardowns', '_providers', '_running')
+
     def __init__(self, func, parent=None, name=None):
         """Create a new Suite.
 
@@ -32,13 +50,15 @@ class Suite(Runnable):
 
         super(Suite, self).__init__(func, parent, name)
 
-        self._func = func
-
         self._tests = []
-        self._suite_setups = []
-        self._suite_teardowns = []
-        self._setups = []
-        self._teardowns = []
+        self._suite_setups = ()
+        self._suite_teardowns = ()
+        self._setups = ()
+        self._teardowns = ()
+        self._providers = ()
+
+        # Whether the suite started running and has not ended yet.
+        self._running = False
 
     def add_test(self, test):
         """Add a test to the suite.
@@ -63,7 +83,7 @@ class Suite(Runnable):
         """
 
         hook.parent = self
-        self._suite_setups.append(hook)
+        self._suite_setups += (hook, )
 
     def add_suite_teardown(self, hook):
         """Add a suite teardown Hook to the suite.
@@ -75,7 +95,7 @@ class Suite(Runnable):
         """
 
         hook.parent = self
-        self._suite_teardowns.append(hook)
+        self._suite_teardowns += (hook, )
 
     def add_setup(self, hook):
         """Add a setup Hook to the suite.
@@ -87,7 +107,7 @@ class Suite(Runnable):
         """
 
         hook.parent = self
-        self._setups.append(hook)
+        self._setups += (hook, )
 
     def add_teardown(self, hook):
         """Add a teardown Hook to the suite.
@@ -99,7 +119,37 @@ class Suite(Runnable):
         """
 
         hook.parent = self
-        self._teardowns.append(hook)
+        self._teardowns += (hook, )
+
+    def add_provider(self, provider):
+        """Add a Provider to the suite.
+
+        Its values can be taken by everything inside the suite.
+
+        Args:
+            provider (:obj:`ccino.fixtures.Provider`): The provider to
+                add.
+        """
+
+        provider.parent = self
+        self._providers += (provider, )
+
+    def get_provider(self, name):
+        """Get the provider added to the suite with a name.
+
+        Args:
+            name (str): The argument name of the provider.
+
+        Returns:
+            :obj:`ccino.fixtures.Provider` or :obj:`None`: The provider
+            added last with the name, or None if there is none.
+        """
+
+        for provider in reversed(self._providers):
+            if provider.name == name:
+                return provider
+
+        return None
 
     def add_suite(self, suite):
         """Add a another suite inside the suite.
@@ -128,6 +178,8 @@ class Suite(Runnable):
         7. Read in the next test and go to 3.
         8. Suite teardown hooks are run in the order they are added.
 
+        The suite is compiled into a plan first, which is then run.
+
         Args:
             reporter (:obj:`ccino.reporters.base.BaseReporter`): The
                 reporter to call for printing.
@@ -141,42 +193,323 @@ class Suite(Runnable):
                 stop all tests immediately.
         """
 
-        super(Suite, self).run(reporter, options)
+        self.compile().run(reporter, options)
+
+    def compile(self):
+        """Flatten the suite and everything inside it into a plan.
+
+        Skipped suites are worked out and the setup and teardown hooks
+        of each suite are gathered once, so running the plan does not
+        look them up again for every test.
+
+        Returns:
+            :obj:`ccino.fixtures.plan.Plan`: The plan for running the
+            suite.
+        """
+
+        setups, teardowns = self._get_hook_chains(self.parent)
+
+        plan = Plan()
+        self._compile(plan, setups, teardowns)
+
+        return plan
+
+    def _get_hook_chains(self, suite):
+        """Get the setup and teardown hooks of a suite and its parents,
+        starting with the highest level suites.
+        """
+
+        setups = []
+        teardowns = []
+
+        while suite is not None:
+            setups[:0] = suite._setups
+            teardowns[:0] = suite._teardowns
+            suite = suite.parent
+
+        return setups, teardowns
 
-        reporter.base_suite_start(self)
+    def _compile(self, plan, setups, teardowns):
+        self.check_skip()
 
-        if not self.skipped:
+        run_hooks = not self.skipped and not self.cached
+
+        plan.add(SUITE_START, self)
+
+        if run_hooks:
+            for suite_setup in self._suite_setups:
+                plan.add(HOOK, suite_setup)
+
+        if self.concurrency and run_hooks and \
+                ThreadPoolExecutor is not None:
+            plan.add(CONCURRENT, self)
+        else:
+            # The chains are only copied when the suite adds to them.
+            if self._setups:
+                setups = setups + list(self._setups)
+
+            if self._teardowns:
+                teardowns = teardowns + list(self._teardowns)
+
+            plan.hooks[self] = (setups, teardowns)
+
+            for test in self._tests:
+                self._compile_child(plan, test, setups, teardowns)
+
+        if run_hooks:
+            for suite_teardown in self._suite_teardowns:
+                plan.add(HOOK, suite_teardown)
+
+        plan.add(SUITE_END, self)
+
+    def _compile_child(self, plan, test, setups, teardowns):
+        if self.skipped:
+            test.skip()
+
+        if self.cached:
+            test.mark_cached()
+
+        if isinstance(test, Suite):
+            test._compile(plan, setups, teardowns)
+            return
+
+        # The hooks are looked up when the test runs, since a failing
+        # hook can skip it after the plan was made.
+        plan.add(RUN, test)
+
+    def run_suite_setups(self, reporter, options):
+        """Run the suite setup hooks unless the suite is skipped or
+        cached.
+
+        Args:
+            reporter (:obj:`ccino.reporters.base.BaseReporter`): The
+                reporter to call for printing.
+            options (dict): ccino runner options.
+        """
+
+        if not self.skipped and not self.cached:
             for suite_setup in self._suite_setups:
                 suite_setup.run(reporter, options)
 
+    def run_suite_teardowns(self, reporter, options):
+        """Run the suite teardown hooks unless the suite is skipped or
+        cached.
+
+        Args:
+            reporter (:obj:`ccino.reporters.base.BaseReporter`): The
+                reporter to call for printing.
+            options (dict): ccino runner options.
+        """
+
+        if not self.skipped and not self.cached:
+            for suite_teardown in self._suite_teardowns:
+                suite_teardown.run(reporter, options)
+
+    def run_child(self, test, reporter, options):
+        """Run a single test or suite inside the suite.
+
+        Tests are surrounded by the setup and teardown hooks of this
+        suite and all of its parents. Suites are simply run.
+
+        Args:
+            test (:obj:`ccino.fixtures.Runnable`): The test or suite
+                to run. It must have been added to this suite.
+            reporter (:obj:`ccino.reporters.base.BaseReporter`): The
+                reporter to call for printing.
+            options (dict): ccino runner options.
+        """
+
+        setups, teardowns = self._get_hook_chains(self)
+
+        plan = Plan(hooks={self: (setups, teardowns)})
+        self._compile_child(plan, test, setups, teardowns)
+        plan.run(reporter, options)
+
+    def _run_concurrently(self, reporter, options):
+        """Run the tests inside the suite on a thread pool.
+
+        Consecutive tests are run together on the pool while suites
+        inside are run on their own in between. A test depending on a
+        test of the current batch starts a new batch, so it only runs
+        once its prerequisites are done. The results of each test
+        (including its hooks and printed text) are recorded and
+        reported in the order the tests were added.
+        """
+
+        batch = []
+
         for test in self._tests:
-            is_suite = isinstance(test, Suite)
+            if isinstance(test, Suite):
+                self._run_batch(batch, reporter, options)
+                batch = []
+
+                self.run_child(test, reporter, options)
+                continue
+
+            if any(dependency in batch for dependency in test.dependencies):
+                self._run_batch(batch, reporter, options)
+                batch = []
+
+            batch.append(test)
+
+        self._run_batch(batch, reporter, options)
+
+    def _run_batch(self, batch, reporter, options):
+        if not batch:
+            return
+
+        stream = CaptureStream(sys.stdout)
+        max_workers = self.concurrency
+
+        # Gathered tests only wait on the loop, so without a limit they
+        # all start at once. Otherwise True means use the
+        # ThreadPoolExecutor default.
+        if max_workers is True:
+            max_workers = len(batch) if self.gathered else None
+
+        # Async tests on the threads are awaited on the shared loop,
+        # which runs here while waiting for the results.
+        loop = get_event_loop(options)
+
+        with redirect_print(stream):
+            pool = ThreadPoolExecutor(max_workers)
+
+            futures = [
+                pool.submit(self._run_recorded, test, stream, options)
+                for test in batch
+            ]
 
-            open_suites = [self]
+            try:
+                for future in futures:
+                    recorder, bailed = loop.wait(future)
+                    recorder.replay(reporter)
 
-            while open_suites[-1].parent is not None:
-                open_suites.append(open_suites[-1].parent)
+                    if bailed:
+                        raise CcinoBail()
+            finally:
+                # Nothing after a bail should start.
+                for future in futures:
+                    future.cancel()
 
-            if not is_suite and not self.skipped:
-                for suite in reversed(open_suites):
-                    for setup in suite._setups:
-                        setup.run(reporter, options)
+                pool.shutdown(wait=True)
 
-            if self.skipped:
+    def _run_recorded(self, test, stream, options):
+        recorder = EventRecorder()
+
+        with stream.capture(recorder):
+            try:
+                self.run_child(test, recorder.reporter, options)
+            except CcinoBail:
+                return recorder, True
+
+        return recorder, False
+
+    def give_up(self):
+        """Skip what is left to run inside the suite after one of its
+        hooks failed.
+
+        The tests, suites and hooks inside are skipped, along with the
+        setup and suite setup hooks of the suite. Its teardown and suite
+        teardown hooks still run, so what was set up is cleaned up. The
+        same goes for the suites inside that are running.
+        """
+
+        for hook in self._suite_setups + self._setups:
+            hook.skip()
+
+        for test in self._tests:
+            if not isinstance(test, Suite):
                 test.skip()
+            elif test._running:
+                test.give_up()
+            else:
+                for runnable in test.walk():
+                    runnable.skip()
 
-            test.run(reporter, options)
+    def walk(self):
+        """Iterate over the suite and everything inside it.
 
-            if not is_suite and not self.skipped:
-                for suite in reversed(open_suites):
-                    for teardown in suite._teardowns:
-                        teardown.run(reporter, options)
+        The suite is yielded first, followed by its hooks and then
+        its tests and suites (recursively) in the order they were
+        added.
 
-        if not self.skipped:
-            for suite_teardown in self._suite_teardowns:
-                suite_teardown.run(reporter, options)
+        Yields:
+            :obj:`ccino.fixtures.Runnable`: The next runnable.
+        """
+
+        yield self
+
+        for hooks in (self._suite_setups, self._setups, self._teardowns,
+                self._suite_teardowns):
+            for hook in hooks:
+                yield hook
+
+        for test in self._tests:
+            if isinstance(test, Suite):
+                for runnable in test.walk():
+                    yield runnable
+            else:
+                yield test
+
+    def prune(self, keep):
+        """Remove the tests inside the suite that should not run.
+
+        Suites inside are pruned as well and removed if they are left
+        without tests.
 
-        reporter.base_suite_end(self)
+        Args:
+            keep (Callable): Called with each test, returns whether
+                the test should be kept.
+
+        Returns:
+            int: The number of tests left inside the suite.
+        """
+
+        tests = []
+        count = 0
+
+        for test in self._tests:
+            if isinstance(test, Suite):
+                left = test.prune(keep)
+            else:
+                left = 1 if keep(test) else 0
+
+            if left:
+                tests.append(test)
+                count += left
+
+        self._tests = tests
+
+        return count
+
+    def reorder(self, first):
+        """Move some tests inside the suite ahead of the others.
+
+        Suites inside are reordered as well and moved ahead if any
+        test inside them is. Otherwise the order is kept.
+
+        Args:
+            first (Callable): Called with each test, returns whether
+                the test should be moved ahead.
+
+        Returns:
+            bool: Whether any test inside the suite was moved ahead.
+        """
+
+        ahead = []
+        behind = []
+
+        for test in self._tests:
+            if isinstance(test, Suite):
+                moved = test.reorder(first)
+            else:
+                moved = first(test)
+
+            (ahead if moved else behind).append(test)
+
+        self._tests = ahead + behind
+
+        return bool(ahead)
 
     def load(self):
         """Run func to allow fixtures to be added inside.
@@ -196,6 +529,36 @@ class Suite(Runnable):
         else:
             result = self.func(self)
 
+    @property
+    def concurrency(self):
+        """:obj:`int` or :obj:`bool` or :obj:`None`: The maximum number
+        of threads to run the tests in the suite on, True for the
+        default number, or None if they run one at a time.
+        """
+
+        return getattr(self.func, '_concurrent', None)
+
+    @property
+    def gathered(self):
+        """bool: Whether the suite was decorated with ``gather``."""
+        return getattr(self.func, '_gather', False)
+
+    @property
+    def providers(self):
+        """Tuple[:obj:`ccino.fixtures.Provider`]: The providers added
+        to the suite.
+        """
+
+        return self._providers
+
+    @property
+    def tests(self):
+        """List[:obj:`ccino.fixtures.Runnable`]: The tests and suites
+        inside the suite in the order they were added.
+        """
+
+        return self._tests
+
     @property
     def is_root(self):
         """bool: True if this is the root suite, otherwise False."""
@@ -1,53 +1,301 @@
 from __future__ import absolute_import
 
-from ..exceptions import CcinoBail, TestDidNotRaise, TestDidNotReturn, \
-        UnknownSignature
+import sys
+from itertools import count, islice
+
+from ..cases import CaseFile
+from ..exceptions import CcinoBail, IsolatedFailure, TestDidNotRaise, \
+        TestDidNotReturn, UnknownSignature
+from ..isolate import run_isolated
+from ..parallel import can_fork
+from ..reporters.base import get_exception_info
 from .runnable import Runnable
-from ..util import get_num_args
+from ..util.event_loop import get_event_loop, iscoroutine
+from ..util.timer import now
+
+
+try:
+    STRING_TYPES = (str, unicode)
+except NameError:
+    STRING_TYPES = (str,)
+
+
+# This custom exception can't be raised by anything else.
+class NoCustomException(Exception):
+    pass
+
+
+def _get_columns(values):
+    """Turn the values of a batch of cases into the arguments of a
+    batched test, one column of values per argument.
+
+    Columns are NumPy arrays if NumPy has been imported (importing it
+    here would slow down every run), lists otherwise.
+    """
+
+    if all(isinstance(value, tuple) for value in values):
+        columns = [list(column) for column in zip(*values)]
+    else:
+        columns = [values]
+
+    numpy = sys.modules.get('numpy')
+
+    if numpy is not None:
+        columns = [numpy.asarray(column) for column in columns]
+
+    return columns
+
+
+def _get_outcomes(result, size):
+    """Get the failures of a batch of cases from what the test
+    returned.
+
+    Returns:
+        List[Tuple[int, str]]: The position of each failed case and its
+        exception line.
+    """
+
+    if result is None:
+        return []
+
+    numpy = sys.modules.get('numpy')
+
+    # Only the failures of a boolean mask are looked at one by one.
+    if numpy is not None and isinstance(result, numpy.ndarray) and \
+            result.dtype == bool:
+        if result.shape != (size,):
+            raise ValueError('batch of {:d} cases returned a mask of shape '
+                    '{}'.format(size, result.shape))
+
+        return [(int(i), 'CaseFailed: the mask is false for the case\n')
+                for i in numpy.flatnonzero(~result)]
+
+    outcomes = list(result)
+
+    if len(outcomes) != size:
+        raise ValueError('batch of {:d} cases returned {:d} results'
+                .format(size, len(outcomes)))
+
+    failures = []
+
+    for i, outcome in enumerate(outcomes):
+        if isinstance(outcome, Exception):
+            failures.append((i, '{}: {}\n'.format(type(outcome).__name__,
+                    outcome)))
+        elif isinstance(outcome, STRING_TYPES):
+            if outcome:
+                failures.append((i, 'CaseFailed: {}\n'.format(outcome)))
+        elif outcome is not None and not outcome:
+            failures.append((i, 'CaseFailed: the mask is false for the '
+                    'case\n'))
+
+    return failures
 
 
 class Test(Runnable):
     """Runnable class representing a single unit."""
 
-    def run(self, reporter, options):
-        """Run the test.
+    __slots__ = ('_expectations', '_dependencies', '_cached_failure',
+            '_cached_cases', '_case_range')
+
+    def __init__(self, func, parent=None, name=None):
+        """Create a new Test.
 
         Args:
-            reporter (:obj:`ccino.reporters.base.BaseReporter`): The
-                reporter to call for printing.
-            options (dict): ccino runner options.
+            func (Callable): The function to run.
+
+        Keyword Args:
+            parent (:obj:`ccino.fixtures.Runnable` or :obj:`None`):
+                The parent runnable.
+            name (str): The name of the test.
 
         Raises:
-            :obj:`ccino.exceptions.UnknownSignature`: If func has
-                an unsupported number of arguments.
-            :obj:`ccino.exceptions.CcinoBail`: If the runner needs to
-                stop all tests immediately.
+            :obj:`ccino.exceptions.AlreadyRunnableException`: If a
+                runnable has already been made with func.
         """
 
-        super(Test, self).run(reporter, options)
+        super(Test, self).__init__(func, parent, name)
 
-        if self.skipped:
-            reporter.base_test_pending(self)
-            return
+        self._expectations = None
+        self._dependencies = ()
+        self._cached_failure = None
+        self._cached_cases = None
+        self._case_range = None
 
-        bail = options['bail']
+    def depends_on(self, dependencies):
+        """Set the tests and suites that have to pass first.
 
-        num_arguments = get_num_args(self.func)
+        Args:
+            dependencies (Iterable[:obj:`ccino.fixtures.Runnable`]):
+                The tests and suites.
+        """
 
-        if num_arguments > 1:
-            raise UnknownSignature()
+        self._dependencies = tuple(dependencies)
+
+    def mark_cached_failure(self, exc_info):
+        """Report the test as failed without running it.
+
+        Args:
+            exc_info (tuple): Exception information of the failure,
+                like from ``ccino.reporters.base.get_exception_info``.
+        """
+
+        self.mark_cached()
+        self._cached_failure = exc_info
+
+    def mark_cached_cases(self, cases):
+        """Report the cases of a parametrized test as passed without
+        running them.
+
+        Args:
+            cases (List[Tuple[int, str]]): The position and name of
+                each case.
+        """
+
+        self.mark_cached()
+        self._cached_cases = cases
+
+    @property
+    def dependencies(self):
+        """Tuple[:obj:`ccino.fixtures.Runnable`]: The tests and suites
+        that have to pass before the test runs.
+        """
+
+        return self._dependencies
+
+    @property
+    def params(self):
+        """:obj:`tuple` or :obj:`None`: The cases of the test and their
+        ids, added with the ``params`` decorator, or None if the test
+        is not parametrized.
+        """
+
+        return getattr(self.func, '_params', None)
+
+    @property
+    def batch_size(self):
+        """:obj:`int` or :obj:`None`: The number of cases the test
+        takes at a time, added with the ``batch`` decorator, or None if
+        it takes them one by one.
+        """
+
+        return getattr(self.func, '_batch', None)
+
+    @property
+    def case_range(self):
+        """:obj:`tuple` or :obj:`None`: The positions of the first case
+        to run and the one after the last (None for the end), or None to
+        run every case.
+        """
+
+        return self._case_range
+
+    def limit_cases(self, start, stop=None):
+        """Only run a range of the cases of a parametrized test.
+
+        Args:
+            start (int): The position of the first case.
+
+        Keyword Args:
+            stop (:obj:`int` or :obj:`None`): The position after the
+                last case, or None to run to the end.
+        """
+
+        self._case_range = (start, stop)
+
+    def count_cases(self):
+        """Count the cases of a test that takes them from a file,
+        which only needs the index of the file.
 
-        # This custom exception can't be raised by anything else.
-        class NoCustomException(Exception):
-            pass
+        Returns:
+            :obj:`int` or :obj:`None`: The number of cases, or None if
+            the test does not take its cases from a file or the file
+            cannot be read.
+        """
+
+        params = self.params
+
+        if params is None or not isinstance(params[0], CaseFile):
+            return None
+
+        try:
+            return len(params[0])
+        except (IOError, OSError, ValueError):
+            return None
+
+    def cases(self):
+        """Iterate over the cases of a parametrized test.
+
+        Cases are made one at a time as they are needed, so a generator
+        of cases is never held in memory as a whole.
+
+        Yields:
+            :obj:`Case`: The next case.
+        """
+
+        cases, ids = self.params
+
+        # Functions make the cases again for every run.
+        if callable(cases):
+            cases = cases()
+
+        start, stop = self._case_range or (0, None)
+
+        # Files of cases jump straight to the range with their index.
+        if isinstance(cases, CaseFile):
+            cases = cases.read(start, stop)
+        elif self._case_range is not None:
+            cases = islice(cases, start, stop)
+
+        if ids is None:
+            ids = count(start)
+        elif not callable(ids) and start:
+            ids = islice(ids, start, None)
+
+        names = None if callable(ids) else iter(ids)
+
+        for number, value in enumerate(cases, start):
+            if names is None:
+                case_id = ids(value)
+            else:
+                case_id = next(names, number)
+
+            yield Case(self, number, '{}[{}]'.format(self.name, case_id),
+                    value)
 
-        result = None
+    def case(self, number, name):
+        """Make a case of the test without its value, like one that
+        ran in another process.
+
+        Args:
+            number (int): The position of the case.
+            name (str): The name of the case.
+
+        Returns:
+            :obj:`Case`: The case.
+        """
+
+        return Case(self, number, name)
+
+    @property
+    def expectations(self):
+        """tuple: What func is expected to do, as the exception to
+        catch, whether it has to be raised, whether the return value
+        is checked, the expected return value, and whether the value
+        is approximate.
+
+        This is read from func the first time it is needed.
+        """
+
+        if self._expectations is not None:
+            return self._expectations
 
         catch_exc = NoCustomException
         should_raise = False
 
         cap_return = False
         return_value = None
+        returns_approx = False
 
         # If the function is supposed to raise an exception, get it.
         if hasattr(self.func, '_raises'):
@@ -62,48 +310,449 @@ class Test(Runnable):
             return_value = self.func._returns
             returns_approx = self.func._returns_approx
 
+        self._expectations = (catch_exc, should_raise, cap_return,
+                return_value, returns_approx)
+
+        return self._expectations
+
+    def run(self, reporter, options):
+        """Run the test.
+
+        Args:
+            reporter (:obj:`ccino.reporters.base.BaseReporter`): The
+                reporter to call for printing.
+            options (dict): ccino runner options.
+
+        Raises:
+            :obj:`ccino.exceptions.UnknownSignature`: If func has
+                an unsupported number of arguments.
+            :obj:`ccino.exceptions.CcinoBail`: If the runner needs to
+                stop all tests immediately.
+        """
+
+        super(Test, self).run(reporter, options)
+
+        if self.skipped:
+            reporter.base_test_pending(self)
+            return
+
+        for dependency in self._dependencies:
+            if dependency.failed:
+                # Tests depending on this one are left out as well.
+                self.mark_failed()
+
+                reporter.base_test_pending(self,
+                        '{} failed'.format(dependency.id))
+                return
+
+        if self.cached:
+            if self._cached_failure is not None:
+                self.mark_failed()
+
+                reporter.base_test_fail(self, self._cached_failure)
+            elif self._cached_cases is not None:
+                for number, name in self._cached_cases:
+                    reporter.base_test_pass(self.case(number, name))
+
+                if not self._cached_cases:
+                    reporter.base_test_pending(self, 'no cases')
+            else:
+                reporter.base_test_pass(self)
+
+            return
+
+        if self.params is not None:
+            self._run_cases(reporter, options)
+            return
+
+        num_arguments = self.num_arguments
+
+        if num_arguments > 1 and self.arguments is None:
+            raise UnknownSignature()
+
+        start = now()
+
         try:
-            # Run func and capture it's returning value.
-            try:
-                if num_arguments == 0:
-                    result = self.func()
-                else:
-                    result = self.func(self)
-
-            # If the exception is caught and it was supposed to be
-            # raised. Leave the outer try block and pass. Uncaught
-            # exceptions will cause the test to fail in the outer
-            # try block.
-            except catch_exc as e: pass
+            if options['isolate'] and can_fork():
+                run_isolated(self._check_isolated, num_arguments, options)
             else:
-                # If it should've raised an exception, fail in the
-                # outer try block.
-                if should_raise:
-                    raise TestDidNotRaise()
-
-                # If it should return an approximate value, check it.
-                elif cap_return and not returns_approx and \
-                        not result == return_value:
-                    raise TestDidNotReturn(
-                        'Expected test to return {}, actual: {}'
-                        .format(return_value, result)
-                    )
-
-                # If it should return a specific value, check it.
-                elif cap_return and returns_approx and \
-                        abs(result - return_value[0]) > return_value[1]:
-                    raise TestDidNotReturn(
-                        ('Expected test to return approximately {},' +
-                        ' actual: {}').format(return_value[0], result)
-                    )
+                self.check(num_arguments, options)
 
         # If an uncaught exception occurs, the test fails.
         except Exception as e:
-            reporter.base_test_fail(self)
+            self.duration = now() - start
+            self.mark_failed()
+
+            # Failures in another process come as plain information.
+            if isinstance(e, IsolatedFailure):
+                reporter.base_test_fail(self, e.exc_info)
+            else:
+                reporter.base_test_fail(self)
 
-            if bail:
+            if options['bail']:
                 raise CcinoBail()
 
         # If all goes well, the test passes.
         else:
+            self.duration = now() - start
+
+            reporter.base_test_pass(self)
+
+    def _run_cases(self, reporter, options):
+        """Run func once for every case, or for every batch of cases,
+        reporting each case like a test.
+        """
+
+        start = now()
+        ran = False
+
+        cases = self.cases()
+        size = self.batch_size
+
+        try:
+            if size is None:
+                for case in cases:
+                    ran = True
+                    case.run(reporter, options)
+            else:
+                for batch in iter(lambda: list(islice(cases, size)), []):
+                    ran = True
+                    self._run_batch(batch, reporter, options)
+
+        except CcinoBail:
+            raise
+
+        # Making the cases failed, which fails the test as a whole.
+        except Exception:
+            self.duration = now() - start
+            self.mark_failed()
+
+            reporter.base_test_fail(self)
+
+            if options['bail']:
+                raise CcinoBail()
+
+            return
+
+        self.duration = now() - start
+
+        if not ran:
+            reporter.base_test_pending(self, 'no cases')
+
+    def _run_batch(self, batch, reporter, options):
+        """Run func with a batch of cases and report every case."""
+
+        columns = _get_columns([case.value for case in batch])
+        failures = None
+
+        start = now()
+
+        try:
+            if options['isolate'] and can_fork():
+                failures = run_isolated(self._check_batch_isolated, columns,
+                        len(batch), options)
+            else:
+                failures = self.check_batch(columns, len(batch), options)
+
+        # Every case fails with what func raised.
+        except Exception as e:
+            if isinstance(e, IsolatedFailure):
+                exc_info = e.exc_info
+            else:
+                exc_info = get_exception_info()
+
+        duration = (now() - start) / len(batch)
+
+        if failures is not None:
+            # Failures point at func, since they were not raised.
+            code = self.func.__code__
+            trace = [(code.co_filename, code.co_firstlineno, code.co_name,
+                    None)]
+
+            failed = dict((i, (line, trace)) for i, line in failures)
+
+        for i, case in enumerate(batch):
+            case.duration = duration
+
+            if failures is None:
+                case.report(reporter, options, exc_info)
+            else:
+                case.report(reporter, options, failed.get(i))
+
+    def check_batch(self, columns, size, options):
+        """Run func with a batch of cases and find the ones that
+        failed.
+
+        This may run in a child process when tests are isolated.
+
+        Args:
+            columns (list): The values of the cases, one column for each
+                of the leading arguments of func.
+            size (int): The number of cases.
+            options (dict): ccino runner options.
+
+        Returns:
+            List[Tuple[int, str]]: The position of each failed case and
+            its exception line.
+
+        Raises:
+            Exception: If func raised, failing every case.
+        """
+
+        return _get_outcomes(self._call_case(columns, options), size)
+
+    def _check_batch_isolated(self, columns, size, options):
+        """Run check_batch in a child process, finishing the values of
+        providers built there before it exits.
+        """
+
+        try:
+            return self.check_batch(columns, size, options)
+        finally:
+            if options['providers'] is not None:
+                options['providers'].close()
+
+    def _check_isolated(self, num_arguments, options, values=None):
+        """Run check in a child process, finishing the values of
+        providers built there before it exits.
+        """
+
+        try:
+            self.check(num_arguments, options, values)
+        finally:
+            if options['providers'] is not None:
+                options['providers'].close()
+
+    def _call_case(self, values, options):
+        """Call func with the values of a case, and the values of
+        providers for the arguments after them.
+        """
+
+        if self._arguments is not None:
+            providers = options['providers']
+
+            values = list(values) + [providers.get(provider, self, options)
+                    for provider in self._arguments[len(values):]]
+
+        result = self.func(*values)
+
+        if iscoroutine(result):
+            result = get_event_loop(options).run(result)
+
+        return result
+
+    def check(self, num_arguments, options, values=None):
+        """Run func and check it did what it was expected to.
+
+        This may run in a child process when tests are isolated.
+
+        Args:
+            num_arguments (int): The number of arguments func takes.
+            options (dict): ccino runner options.
+
+        Keyword Args:
+            values (tuple): The values of a case to call func with.
+
+        Raises:
+            Exception: If the test failed.
+        """
+
+        catch_exc, should_raise, cap_return, return_value, returns_approx = \
+                self.expectations
+
+        # Run func and capture it's returning value.
+        try:
+            if values is None:
+                result = self._call(num_arguments, options)
+            else:
+                result = self._call_case(values, options)
+
+        # If the exception is caught and it was supposed to be raised,
+        # the test passes. Uncaught exceptions will cause the test to
+        # fail.
+        except catch_exc as e: pass
+        else:
+            # If it should've raised an exception, fail.
+            if should_raise:
+                raise TestDidNotRaise()
+
+            # If it should return an approximate value, check it.
+            elif cap_return and not returns_approx and \
+                    not result == return_value:
+                raise TestDidNotReturn(
+                    'Expected test to return {}, actual: {}'
+                    .format(return_value, result)
+                )
+
+            # If it should return a specific value, check it.
+            elif cap_return and returns_approx and \
+                    abs(result - return_value[0]) > return_value[1]:
+                raise TestDidNotReturn(
+                    ('Expected test to return approximately {},' +
+                    ' actual: {}').format(return_value[0], result)
+                )
+
+
+class Case(object):
+    """One case of a parametrized test, reported like a test of its
+    own.
+
+    Cases are not part of the tree. They are made while their test
+    runs and are dropped once reported, and only the ones that failed
+    keep their value, so running a test with many cases takes about as
+    much memory as running one.
+
+    Attributes:
+        test (:obj:`Test`): The parametrized test.
+        number (int): The position of the case in the cases of the test.
+        value (Object): The case, or None once it passed.
+        duration (:obj:`float` or :obj:`None`): Seconds the case took.
+    """
+
+    __slots__ = ('test', 'number', 'value', 'duration', '_name', '_failed')
+
+    def __init__(self, test, number, name, value=None):
+        """Create a new Case.
+
+        Args:
+            test (:obj:`Test`): The parametrized test.
+            number (int): The position of the case.
+            name (str): The name of the test with the id of the case.
+
+        Keyword Args:
+            value (Object): The case. A tuple is passed to the function
+                of the test as separate arguments.
+        """
+
+        self.test = test
+        self.number = number
+        self.value = value
+        self.duration = None
+
+        self._name = name
+        self._failed = False
+
+    def run(self, reporter, options):
+        """Run the test with the case.
+
+        Args:
+            reporter (:obj:`ccino.reporters.base.BaseReporter`): The
+                reporter to call for printing.
+            options (dict): ccino runner options.
+
+        Raises:
+            :obj:`ccino.exceptions.CcinoBail`: If the runner needs to
+                stop all tests immediately.
+        """
+
+        test = self.test
+        value = self.value
+
+        values = value if isinstance(value, tuple) else (value,)
+
+        start = now()
+
+        try:
+            if options['isolate'] and can_fork():
+                run_isolated(test._check_isolated, None, options, values)
+            else:
+                test.check(None, options, values)
+
+        except Exception as e:
+            self.duration = now() - start
+
+            if isinstance(e, IsolatedFailure):
+                self.report(reporter, options, e.exc_info)
+            else:
+                self.report(reporter, options, get_exception_info())
+
+        else:
+            self.duration = now() - start
+
+            self.report(reporter, options)
+
+    def report(self, reporter, options, exc_info=None):
+        """Report the case as passed, or as failed if there is
+        exception information.
+
+        Args:
+            reporter (:obj:`ccino.reporters.base.BaseReporter`): The
+                reporter to call for printing.
+            options (dict): ccino runner options.
+
+        Keyword Args:
+            exc_info (tuple): Exception information of the failure,
+                like from ``ccino.reporters.base.get_exception_info``.
+
+        Raises:
+            :obj:`ccino.exceptions.CcinoBail`: If the runner needs to
+                stop all tests immediately.
+        """
+
+        if exc_info is None:
+            self.value = None
+
             reporter.base_test_pass(self)
+            return
+
+        self._failed = True
+        self.test.mark_failed()
+
+        reporter.base_test_fail(self, exc_info)
+
+        if options['bail']:
+            raise CcinoBail()
+
+    @property
+    def name(self):
+        """str: The name of the test with the id of the case."""
+        return self._name
+
+    @property
+    def parent(self):
+        """:obj:`ccino.fixtures.Suite`: The suite of the test."""
+        return self.test.parent
+
+    @property
+    def path(self):
+        """Tuple[str]: The names of the case and the suites around it,
+        starting below the root suite.
+        """
+
+        return self.test.path[:-1] + (self._name,)
+
+    @property
+    def id(self):
+        """str: Identifier of the case, from its path like the ids of
+        runnables.
+        """
+
+        return '::'.join(self.path)
+
+    @property
+    def tags(self):
+        """FrozenSet[str]: The tags of the test."""
+        return self.test.tags
+
+    @property
+    def func(self):
+        """Callable: The function of the test."""
+        return self.test.func
+
+    @property
+    def skipped(self):
+        """bool: Cases are never skipped on their own."""
+        return False
+
+    @property
+    def cached(self):
+        """bool: Whether the case is reported without running, like
+        its test.
+        """
+
+        return self.test.cached
+
+    @property
+    def failed(self):
+        """bool: Whether the case failed."""
+        return self._failed
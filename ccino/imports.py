@@ -0,0 +1,373 @@
+"""Find which local files the test files import."""
+
+from __future__ import absolute_import
+
+import ast
+import os
+import sys
+
+
+def get_imports(path, package=None):
+    """Get the names of the modules a file imports.
+
+    Names in ``from module import name`` are included as
+    ``module.name`` as well, since they may be modules too. Parent
+    packages of imported modules are included since importing a
+    module runs them.
+
+    Args:
+        path (str): The Python file.
+
+    Keyword Args:
+        package (str): The package the file is in, used for relative
+            imports. Relative imports are skipped without it.
+
+    Returns:
+        Set[str]: The module names.
+    """
+
+    with open(path, 'rb') as source_file:
+        tree = ast.parse(source_file.read(), path)
+
+    names = set()
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ''
+
+            if node.level:
+                if package is None:
+                    continue
+
+                parts = package.split('.')
+
+                if node.level > 1:
+                    parts = parts[:1 - node.level]
+
+                base = '.'.join(parts + ([base] if base else []))
+
+            if base:
+                names.add(base)
+
+            for alias in node.names:
+                names.add(base + '.' + alias.name if base else alias.name)
+
+    parents = set()
+
+    for name in names:
+        while '.' in name:
+            name = name.rpartition('.')[0]
+            parents.add(name)
+
+    return names | parents
+
+
+def _get_source(module):
+    path = getattr(module, '__file__', None)
+
+    if not path:
+        return None
+
+    if path.endswith(('.pyc', '.pyo')):
+        path = path[:-1]
+
+    if not path.endswith('.py'):
+        return None
+
+    return os.path.abspath(path)
+
+
+def _is_under(path, directory):
+    return path == directory or path.startswith(directory + os.sep)
+
+
+def _get_mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _get_package(path, name):
+    if name is None:
+        return None
+
+    if os.path.basename(path) == '__init__.py':
+        return name
+
+    return name.rpartition('.')[0] or None
+
+
+class ImportGraph(object):
+    """Which local files import which, starting from test files.
+
+    Imported names are looked up in ``sys.modules``, so the graph is
+    built after the test files are loaded. A module is local if its
+    source is inside one of the root directories and not in an
+    installed package.
+    """
+
+    def __init__(self, paths, roots=None):
+        """Create a new ImportGraph.
+
+        Args:
+            paths (List[str]): The test files.
+
+        Keyword Args:
+            roots (List[str]): Directories with local modules.
+                Defaults to the working directory.
+        """
+
+        if roots is None:
+            roots = [os.getcwd()]
+
+        self._roots = [os.path.abspath(root) for root in roots]
+
+        self._imports = {}
+        self._names = {}
+
+        pending = [(os.path.abspath(path), None) for path in paths]
+
+        while pending:
+            path, name = pending.pop()
+
+            # A file can be both a test file and an imported module.
+            if name is not None:
+                self._names.setdefault(path, name)
+
+            if path in self._imports:
+                continue
+
+            self._imports[path] = set()
+
+            for imported_path, imported_name in self._read(path, name):
+                self._imports[path].add(imported_path)
+                pending.append((imported_path, imported_name))
+
+    def _read(self, path, name):
+        """Find the local modules a file imports."""
+
+        package = _get_package(path, name)
+
+        try:
+            imported = get_imports(path, package)
+        except (IOError, OSError, SyntaxError, ValueError):
+            return []
+
+        found = []
+
+        for imported_name in imported:
+            source = _get_source(sys.modules.get(imported_name))
+
+            if source is not None and source != path and \
+                    self._is_local(source):
+                found.append((source, imported_name))
+
+        return found
+
+    def _is_local(self, path):
+        if 'site-packages' in path or 'dist-packages' in path:
+            return False
+
+        return any(_is_under(path, root) for root in self._roots)
+
+    def affected(self, changed):
+        """Get the files that are or import (even indirectly) changed
+        files.
+
+        Args:
+            changed (Iterable[str]): The changed files.
+
+        Returns:
+            Set[str]: The affected files, including the changed files
+            that are in the graph.
+        """
+
+        importers = {}
+
+        for path, imports in self._imports.items():
+            for imported in imports:
+                importers.setdefault(imported, set()).add(path)
+
+        pending = [os.path.abspath(path) for path in changed]
+        affected = set()
+
+        while pending:
+            path = pending.pop()
+
+            if path in affected or path not in self._imports:
+                continue
+
+            affected.add(path)
+            pending.extend(importers.get(path, ()))
+
+        return affected
+
+    def imported(self, path):
+        """Get the files a file imports, even indirectly.
+
+        Args:
+            path (str): The file.
+
+        Returns:
+            Set[str]: The imported files, including the file itself if
+            it is in the graph.
+        """
+
+        pending = [os.path.abspath(path)]
+        imported = set()
+
+        while pending:
+            path = pending.pop()
+
+            if path in imported or path not in self._imports:
+                continue
+
+            imported.add(path)
+            pending.extend(self._imports[path])
+
+        return imported
+
+    def module_name(self, path):
+        """Get the module name of a local module.
+
+        Args:
+            path (str): The module file.
+
+        Returns:
+            :obj:`str` or :obj:`None`: The name in ``sys.modules``, or
+            None if the file is not an imported local module.
+        """
+
+        return self._names.get(os.path.abspath(path))
+
+    @property
+    def files(self):
+        """List[str]: Every file in the graph."""
+        return sorted(self._imports)
+
+
+class StaticImportGraph(ImportGraph):
+    """ImportGraph found without importing anything.
+
+    Imported names are looked up as files in the root directories
+    instead of in ``sys.modules``. The imports of each file are kept
+    with its modification time, so a graph made from an earlier one
+    only parses the files that changed since. Where the imports were
+    found is kept as well, unless a directory of the graph changed
+    (which is where new modules would appear).
+    """
+
+    def __init__(self, paths, roots=None, parsed=None):
+        """Create a new StaticImportGraph.
+
+        Args:
+            paths (List[str]): The test files.
+
+        Keyword Args:
+            roots (List[str]): Directories with local modules.
+                Defaults to the working directory.
+            parsed (dict): ``parsed`` of an earlier graph.
+        """
+
+        if roots is None:
+            roots = [os.getcwd()]
+
+        roots = [os.path.abspath(root) for root in roots]
+        parsed = parsed or {}
+
+        self._parsed = dict(parsed.get('files', {}))
+        self._found = {}
+
+        # Modules found before are still there if no directory changed.
+        self._same_layout = parsed.get('roots') == roots and all(
+            _get_mtime(directory) == mtime
+            for directory, mtime in parsed.get('directories', {}).items()
+        )
+
+        self._changed = not self._same_layout
+
+        super(StaticImportGraph, self).__init__(paths, roots)
+
+    def _read(self, path, name):
+        """Find the local modules a file imports."""
+
+        package = _get_package(path, name)
+        mtime = _get_mtime(path)
+
+        if mtime is None:
+            return []
+
+        entry = self._parsed.get(path)
+
+        if entry is not None and entry[0] == mtime and entry[1] == package:
+            if self._same_layout:
+                return entry[3]
+
+            imported = entry[2]
+        else:
+            try:
+                imported = sorted(get_imports(path, package))
+            except (IOError, OSError, SyntaxError, ValueError):
+                imported = []
+
+        found = []
+
+        for imported_name in imported:
+            source = self._find(imported_name)
+
+            if source is not None and source != path and \
+                    self._is_local(source):
+                found.append((source, imported_name))
+
+        self._parsed[path] = [mtime, package, imported, found]
+        self._changed = True
+
+        return found
+
+    def _find(self, name):
+        """Get the file of a module in the roots, or None."""
+
+        if name in self._found:
+            return self._found[name]
+
+        source = None
+
+        for root in self._roots:
+            base = os.path.join(root, *name.split('.'))
+
+            for path in (base + '.py', os.path.join(base, '__init__.py')):
+                if os.path.isfile(path):
+                    source = path
+                    break
+
+            if source is not None:
+                break
+
+        self._found[name] = source
+
+        return source
+
+    @property
+    def parsed(self):
+        """dict: What was found for the files in the graph, to make
+        later graphs with.
+        """
+
+        directories = set(self._roots)
+        directories.update(os.path.dirname(path) for path in self._imports)
+
+        return {
+            'roots': self._roots,
+            'directories': dict((directory, _get_mtime(directory))
+                    for directory in directories),
+            'files': dict((path, self._parsed[path])
+                    for path in self._imports if path in self._parsed)
+        }
+
+    @property
+    def changed(self):
+        """bool: Whether anything was parsed or looked up again."""
+        return self._changed
@@ -0,0 +1,109 @@
+"""Run tests in forked processes so they cannot affect the run."""
+
+from __future__ import absolute_import
+
+import os
+import pickle
+import sys
+
+from .exceptions import IsolatedFailure
+from .parallel import _CapturedOutput
+from .reporters.base import get_exception_info
+from .util import redirect_print
+
+
+def _describe_status(status):
+    if os.WIFSIGNALED(status):
+        return 'test process was killed by signal {:d}' \
+                .format(os.WTERMSIG(status))
+
+    return 'test process exited with code {:d}' \
+            .format(os.WEXITSTATUS(status))
+
+
+def _write_all(fd, data):
+    while data:
+        data = data[os.write(fd, data):]
+
+
+def _child(fd, func, args):
+    """Call func and send what it printed, raised and returned over
+    fd.
+
+    This never returns.
+    """
+
+    code = 0
+
+    try:
+        output = _CapturedOutput()
+        exc_info = None
+        result = None
+
+        with redirect_print(output):
+            try:
+                result = func(*args)
+            except Exception:
+                exc_info = get_exception_info()
+
+        _write_all(fd, pickle.dumps((output.take(), exc_info, result),
+                pickle.HIGHEST_PROTOCOL))
+    except BaseException:
+        code = 1
+    finally:
+        try:
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def run_isolated(func, *args):
+    """Call a function in a forked child process.
+
+    The child starts with everything this process has loaded (shared
+    copy-on-write) and whatever it changes is thrown away when it
+    exits. Text printed in the child is written to stdout here.
+
+    Args:
+        func (Callable): The function to call.
+        *args: The arguments to call func with.
+
+    Returns:
+        Object: What func returned, which has to be picklable.
+
+    Raises:
+        :obj:`ccino.exceptions.IsolatedFailure`: If func raised an
+            exception or the child died before it returned.
+    """
+
+    # Pending text would be written by both processes otherwise.
+    sys.stderr.flush()
+
+    read_fd, write_fd = os.pipe()
+
+    pid = os.fork()
+
+    if pid == 0:
+        os.close(read_fd)
+        _child(write_fd, func, args)
+
+    os.close(write_fd)
+
+    with os.fdopen(read_fd, 'rb') as pipe:
+        data = pipe.read()
+
+    status = os.waitpid(pid, 0)[1]
+
+    if not data:
+        raise IsolatedFailure(
+            ('TestCrashed: {}\n'.format(_describe_status(status)), [])
+        )
+
+    text, exc_info, result = pickle.loads(data)
+
+    sys.stdout.write(text)
+
+    if exc_info is not None:
+        raise IsolatedFailure(exc_info)
+
+    return result
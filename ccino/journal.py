@@ -0,0 +1,255 @@
+"""Journal of finished tests so an interrupted run can be resumed."""
+
+from __future__ import absolute_import
+
+import json
+import os
+from collections import deque
+
+from .fixtures import Suite
+from .selection import get_tests
+from .util import make_dirs
+from .util.timer import now
+
+
+# The journal is synced to disk after this many tests, or after this
+# many seconds, whichever comes first.
+SYNC_EVERY = 100
+SYNC_INTERVAL = 1.0
+
+
+class Journal(object):
+    """File the result of each finished test is appended to.
+
+    Every line is a JSON object with the id of a test, its result and,
+    for failures, the exception information from
+    ``ccino.reporters.base.get_exception_info``. Every line is handed to
+    the operating system right away, so it survives the process being
+    killed, while syncing to disk is done in batches. A machine going
+    down loses at most the last batch.
+    """
+
+    def __init__(self, path, sync_every=SYNC_EVERY,
+            sync_interval=SYNC_INTERVAL):
+        """Create a new Journal.
+
+        The file is not opened until ``open`` is called.
+
+        Args:
+            path (str): The journal file.
+
+        Keyword Args:
+            sync_every (int): The number of tests between syncs.
+            sync_interval (float): The seconds between syncs.
+        """
+
+        self._path = path
+        self._sync_every = sync_every
+        self._sync_interval = sync_interval
+
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = None
+
+    def read(self):
+        """Read the results written so far.
+
+        A line cut off by the run being killed is ignored, along with
+        anything else that cannot be read.
+
+        Returns:
+            dict: Lists of ``(result, exc_info)`` pairs by test id, in
+            the order they were written.
+        """
+
+        records = {}
+
+        try:
+            with open(self._path, 'r') as journal_file:
+                for line in journal_file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+
+                    if not isinstance(record, dict) or \
+                            record.get('result') not in ('pass', 'fail'):
+                        continue
+
+                    records.setdefault(record.get('id'), []).append(
+                            (record['result'], record.get('error')))
+        except (IOError, OSError):
+            pass
+
+        return records
+
+    def open(self, append=False):
+        """Open the file to write results to.
+
+        Keyword Args:
+            append (bool): Whether to keep the results already in the
+                file instead of starting over.
+        """
+
+        directory = os.path.dirname(self._path)
+
+        if directory:
+            make_dirs(directory)
+
+        self._file = open(self._path, 'a' if append else 'w')
+
+        # A line cut off at the end would swallow the next one.
+        if append and not self._ends_line():
+            self._file.write('\n')
+
+        self._unsynced = 0
+        self._last_sync = now()
+
+    def _ends_line(self):
+        with open(self._path, 'rb') as journal_file:
+            journal_file.seek(0, os.SEEK_END)
+
+            if not journal_file.tell():
+                return True
+
+            journal_file.seek(-1, os.SEEK_END)
+
+            return journal_file.read(1) == b'\n'
+
+    def record(self, test, result, exc_info=None):
+        """Write the result of a finished test.
+
+        Args:
+            test (:obj:`ccino.fixtures.Test`): The test.
+            result (str): ``'pass'`` or ``'fail'``.
+
+        Keyword Args:
+            exc_info (tuple): Exception information of a failure.
+        """
+
+        if self._file is None:
+            return
+
+        record = {'id': test.id, 'result': result}
+
+        if exc_info is not None:
+            record['error'] = [exc_info[0], [list(trace)
+                    for trace in exc_info[1]]]
+
+        self._file.write(json.dumps(record, sort_keys=True) + '\n')
+        self._file.flush()
+        self._unsynced += 1
+
+        if self._unsynced >= self._sync_every or \
+                now() - self._last_sync >= self._sync_interval:
+            self.sync()
+
+    def sync(self):
+        """Make sure everything written so far is on disk."""
+
+        if self._file is None or not self._unsynced:
+            return
+
+        os.fsync(self._file.fileno())
+
+        self._unsynced = 0
+        self._last_sync = now()
+
+    def close(self):
+        """Sync and close the file."""
+
+        if self._file is None:
+            return
+
+        self.sync()
+        self._file.close()
+        self._file = None
+
+    @property
+    def path(self):
+        """str: The journal file."""
+        return self._path
+
+
+def find_done(tests, records):
+    """Find the tests that finished in an earlier run.
+
+    Tests with the same id are matched with their results in order.
+
+    Args:
+        tests (List[:obj:`ccino.fixtures.Test`]): The tests, from
+            ``ccino.selection.get_tests``.
+        records (dict): Results by id from ``Journal.read``.
+
+    Returns:
+        List[Tuple[int, tuple]]: Indexes of the finished tests, with
+        the exception information of the ones that failed (None for
+        ones that passed).
+    """
+
+    left = dict((test_id, deque(results))
+            for test_id, results in records.items())
+
+    done = []
+
+    for i, test in enumerate(tests):
+        results = left.get(test.id)
+
+        if results:
+            result, error = results.popleft()
+
+            if result == 'fail':
+                done.append((i, (error[0], [tuple(trace)
+                        for trace in error[1]])))
+            else:
+                done.append((i, None))
+
+    return done
+
+
+def _mark_suites(suite):
+    """Mark the suites inside that only have finished tests as cached,
+    so their suite hooks do not run.
+
+    Returns:
+        bool: Whether everything inside the suite finished.
+    """
+
+    done = bool(suite.tests)
+
+    for test in suite.tests:
+        if isinstance(test, Suite) and not test.cached:
+            finished = _mark_suites(test)
+        else:
+            finished = test.cached
+
+        done = finished and done
+
+    if done:
+        suite.mark_cached()
+
+    return done
+
+
+def mark_done(root, done):
+    """Report tests that finished in an earlier run with their old
+    results instead of running them.
+
+    Hooks only run for the tests that are left.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+        done (List[Tuple[int, tuple]]): Finished tests from
+            ``find_done``.
+    """
+
+    tests = get_tests(root)
+
+    for index, exc_info in done:
+        if exc_info is None:
+            tests[index].mark_cached()
+        else:
+            tests[index].mark_cached_failure(exc_info)
+
+    if done:
+        _mark_suites(root)
@@ -0,0 +1,769 @@
+"""Run the top level tests and suites in worker processes."""
+
+from __future__ import absolute_import, division
+
+import bisect
+import multiprocessing
+import select
+import sys
+from collections import deque
+
+from .exceptions import CcinoBail, CcinoException
+from .reporters.base import get_exception_info
+from .reporters.event import EventReporter, dispatch_event
+from .util.timer import now
+
+
+# Seconds to wait for worker messages before checking on the workers.
+POLL_INTERVAL = 0.1
+
+
+def can_fork():
+    """Check if worker processes can be forked on this platform.
+
+    Returns:
+        bool: Whether forking is supported.
+    """
+
+    if hasattr(multiprocessing, 'get_all_start_methods'):
+        return 'fork' in multiprocessing.get_all_start_methods()
+
+    return sys.platform != 'win32'
+
+
+def _get_context():
+    if hasattr(multiprocessing, 'get_context'):
+        return multiprocessing.get_context('fork')
+
+    return multiprocessing
+
+
+def schedule(units, durations):
+    """Order units so the longest ones start first.
+
+    Handing the longest remaining unit to whichever worker frees up
+    first (the longest processing time rule) keeps the workers
+    finishing at about the same time. Units without a recorded
+    duration are assumed to take the average duration, and ties keep
+    the order the units were added in.
+
+    Args:
+        units (List[:obj:`ccino.fixtures.Runnable`]): The units.
+        durations (dict): Previous durations in seconds by runnable
+            id.
+
+    Returns:
+        List[int]: The unit indexes in the order to start them.
+    """
+
+    known = [durations[unit.id] for unit in units if unit.id in durations]
+    average = sum(known) / len(known) if known else 0
+
+    estimates = [durations.get(unit.id, average) for unit in units]
+
+    return sorted(range(len(units)), key=lambda i: -estimates[i])
+
+
+def _get_runnables(root):
+    """Get the runnables events refer to: everything in ``root.walk()``
+    followed by the providers of the suites, whose values can fail to
+    be finished.
+    """
+
+    runnables = list(root.walk())
+
+    return runnables + [provider for runnable in runnables
+            for provider in getattr(runnable, 'providers', ())]
+
+
+def _get_starts(root, indexes):
+    """Get where each unit starts in ``root.walk()``, followed by where
+    the last one ends. Units are walked one after the other, so each
+    one ends where the next one starts.
+    """
+
+    starts = [indexes[id(unit)] for unit in root.tests]
+
+    return starts + [len(list(root.walk()))]
+
+
+class _CapturedOutput(object):
+    """Stream that holds printed text until it is taken."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, string):
+        self._parts.append(string)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        text = ''.join(self._parts)
+        self._parts = []
+
+        return text
+
+
+class WorkerSession(object):
+    """Worker side of running units for a scheduler.
+
+    Units are read from ``conn`` as indexes into the root's tests
+    along with the indexes of prerequisites that failed in other units
+    (None means stop) and every reporter event is sent back as
+    ``(unit, kind, payload)`` with the runnable replaced by its index
+    in ``root.walk()``, or for cases of parametrized tests, the index
+    of their test with their number and name. Printed text is sent as
+    ``'stdout'`` messages right before the next event so the order is
+    kept. Once a unit is done, the indexes of its runnables that
+    failed are sent with ``'done'``. Providers are sent by their index
+    after everything in ``root.walk()``, in the order of their suites.
+
+    Args:
+        conn: Connection with ``send`` and ``recv`` methods.
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+        options (dict): ccino runner options.
+    """
+
+    def __init__(self, conn, root, options):
+        self._conn = conn
+        self._root = root
+        self._options = options
+
+        self._runnables = _get_runnables(root)
+        self._indexes = dict(
+            (id(runnable), i) for i, runnable in enumerate(self._runnables)
+        )
+        self._starts = _get_starts(root, self._indexes)
+        self._output = _CapturedOutput()
+        self._unit = None
+
+        self.reporter = EventReporter(self._emit)
+
+    def send(self, kind, payload=None):
+        """Send a message about the current unit.
+
+        Args:
+            kind (str): The message kind.
+
+        Keyword Args:
+            payload (Object): The message data.
+        """
+
+        text = self._output.take()
+
+        if text:
+            self._conn.send((self._unit, 'stdout', text))
+
+        self._conn.send((self._unit, kind, payload))
+
+    def _emit(self, kind, runnable, exc_info):
+        index = self._indexes.get(id(runnable))
+        case = None
+
+        # Cases of parametrized tests are not in the tree, so they are
+        # sent by their test.
+        if index is None:
+            index = self._indexes[id(runnable.test)]
+            case = (runnable.number, runnable.name)
+
+        self.send(kind, (index, exc_info, runnable.duration, case))
+
+    def run_hooks(self, run):
+        """Run root suite hooks, sending their events as unit None.
+
+        Args:
+            run (Callable): The root suite method that runs the hooks.
+
+        Returns:
+            bool: Whether a hook bailed.
+        """
+
+        self._unit = None
+        sys.stdout = self._output
+
+        try:
+            run(self.reporter, self._options)
+        except CcinoBail:
+            return True
+        finally:
+            self.send('hooks_done')
+
+        return False
+
+    def run(self):
+        """Run units until told to stop."""
+
+        sys.stdout = self._output
+
+        while True:
+            message = self._conn.recv()
+
+            if message is None:
+                break
+
+            unit, failed = message
+            self._unit = unit
+
+            # Tests depending on them are left out like in a serial run.
+            for index in failed:
+                self._runnables[index].mark_failed()
+
+            try:
+                self._root.run_child(self._root.tests[unit], self.reporter,
+                        self._options)
+            except CcinoBail:
+                self.send('bail')
+            except Exception:
+                self.send('error', get_exception_info())
+
+            self.send('done', [index for index in
+                    range(self._starts[unit], self._starts[unit + 1])
+                    if self._runnables[index].failed])
+
+        self._unit = None
+
+    def close(self):
+        """Finish the values of providers built by this worker, sending
+        their events as unit None followed by ``'closed'``.
+        """
+
+        self._unit = None
+        sys.stdout = self._output
+
+        try:
+            if self._options['providers'] is not None:
+                self._options['providers'].close(self.reporter)
+        finally:
+            self.send('closed')
+
+
+def _work(conn, root, options):
+    session = WorkerSession(conn, root, options)
+
+    session.run()
+
+    # Values built by the worker are finished before it exits.
+    session.close()
+
+
+class _Worker(object):
+    """Parent side handle of a forked worker process.
+
+    Schedulers use workers through ``assign``, ``stop``, ``recv``,
+    ``fileno``, ``buffered``, and ``close``.
+
+    Attributes:
+        unit (:obj:`int` or :obj:`None`): The unit being run.
+    """
+
+    def __init__(self, context, root, options):
+        self.unit = None
+        self._conn, child_conn = context.Pipe()
+
+        self.process = context.Process(target=_work, args=(
+            child_conn, root, options
+        ))
+        self.process.daemon = True
+        self.process.start()
+
+        child_conn.close()
+
+    def assign(self, unit, failed):
+        self.unit = unit
+        self._conn.send((unit, failed))
+
+    def stop(self):
+        self.unit = None
+        self._conn.send(None)
+
+    def recv(self):
+        return self._conn.recv()
+
+    def fileno(self):
+        return self._conn.fileno()
+
+    def buffered(self):
+        return False
+
+    def close(self):
+        if self.process.is_alive():
+            self.process.terminate()
+
+        self.process.join()
+        self._conn.close()
+
+
+def run_parallel(root, reporter, options, jobs, durations=None):
+    """Run a root suite with its top level units in worker processes.
+
+    Each direct child of the root (a suite with everything inside it,
+    or a single test) is a unit. Root suite hooks and session values of
+    providers run in this process and workers are forked afterwards so
+    they inherit that state.
+    Events from the workers are fed into the reporter unit by unit
+    in the order the units were added, so the report matches a
+    serial run.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+        reporter (:obj:`ccino.reporters.base.BaseReporter`): The
+            reporter to call for printing.
+        options (dict): ccino runner options.
+        jobs (int): The number of worker processes.
+
+    Keyword Args:
+        durations (dict): Previous durations in seconds by runnable
+            id, used to start the longest units first.
+
+    Raises:
+        :obj:`ccino.exceptions.CcinoBail`: If the runner needs to
+            stop all tests immediately.
+    """
+
+    start = now()
+
+    reporter.base_suite_start(root)
+
+    root.run_suite_setups(reporter, options)
+
+    if root.tests:
+        if options['providers'] is not None:
+            options['providers'].build_session(options)
+
+        _ProcessScheduler(root, reporter, options, durations or {},
+                jobs).run()
+
+    root.run_suite_teardowns(reporter, options)
+
+    root.duration = now() - start
+
+    reporter.base_suite_end(root)
+
+
+class Scheduler(object):
+    """Hands units out to workers and reports their events in order.
+
+    Subclasses start workers in ``start`` (adding them with
+    ``add_worker``) and decide what happens to the unit of a worker
+    that is lost in ``lost``. Workers without anything left to run
+    are passed to ``idle``.
+
+    Units with prerequisites (from ``depends_on``) in other units are
+    only handed out once those units are done, along with the
+    prerequisites that failed.
+
+    Attributes:
+        stream (bool): Whether events of the earliest unfinished unit
+            are reported as they arrive. Otherwise each unit is
+            reported once it is finished.
+    """
+
+    stream = True
+
+    def __init__(self, root, reporter, options, durations):
+        """Create a new Scheduler.
+
+        Args:
+            root (:obj:`ccino.fixtures.root.RootSuite`): The root
+                suite.
+            reporter (:obj:`ccino.reporters.base.BaseReporter`): The
+                reporter to call for printing.
+            options (dict): ccino runner options.
+            durations (dict): Previous durations in seconds by
+                runnable id.
+        """
+
+        self._reporter = reporter
+        self._options = options
+
+        self.root = root
+        self.units = root.tests
+        self.runnables = _get_runnables(root)
+
+        # Reversed so the next unit to start can be popped off.
+        self._order = schedule(self.units, durations)
+        self._order.reverse()
+
+        self._prerequisites, self._after = self._find_prerequisites()
+        self._failed = set()
+
+        self.workers = []
+        self._waiting = []
+
+        self._limit = len(self.units)
+        self._head = 0
+        self._buffers = [deque() for _ in self.units]
+        self._finished = [False] * len(self.units)
+        self._open_suites = []
+        self._bailed = False
+
+    def _find_prerequisites(self):
+        """Find the prerequisites of each unit in other units, and the
+        units they are in.
+        """
+
+        indexes = dict(
+            (id(runnable), i) for i, runnable in enumerate(self.runnables)
+        )
+        self._starts = _get_starts(self.root, indexes)
+
+        prerequisites = [set() for _ in self.units]
+        after = [set() for _ in self.units]
+
+        for unit in range(len(self.units)):
+            start, end = self._starts[unit], self._starts[unit + 1]
+
+            for runnable in self.runnables[start:end]:
+                for dependency in getattr(runnable, 'dependencies', ()):
+                    index = indexes.get(id(dependency))
+
+                    # Prerequisites that are not running are ignored.
+                    if index is None or start <= index < end:
+                        continue
+
+                    prerequisites[unit].add(index)
+                    after[unit].add(bisect.bisect_right(self._starts,
+                            index) - 1)
+
+        return prerequisites, after
+
+    def start(self):
+        """Start the workers."""
+
+        raise NotImplementedError()
+
+    def finish(self):
+        """Called once every unit is reported, before the workers
+        are closed.
+        """
+
+        pass
+
+    def lost(self, worker):
+        """Handle a worker that stopped responding during its unit.
+
+        Args:
+            worker: The worker. Its unit is still set.
+        """
+
+        raise NotImplementedError()
+
+    def run(self):
+        """Run all units.
+
+        Raises:
+            :obj:`ccino.exceptions.CcinoBail`: If a unit bailed.
+        """
+
+        try:
+            self.start()
+
+            while self._head < self._limit:
+                self._receive()
+                self._report()
+
+            self.finish()
+        finally:
+            for worker in self.workers:
+                worker.close()
+
+        if self._bailed:
+            raise CcinoBail()
+
+    @property
+    def remaining(self):
+        """bool: Whether any units are left to hand out."""
+
+        while self._order and self._order[-1] >= self._limit:
+            self._order.pop()
+
+        return bool(self._order)
+
+    def add_worker(self, worker):
+        """Start handing units to a worker.
+
+        Args:
+            worker: The worker.
+        """
+
+        self.workers.append(worker)
+
+        self.hand_out(worker)
+
+    def remove_worker(self, worker):
+        """Stop using a worker and close it.
+
+        Args:
+            worker: The worker.
+        """
+
+        worker.unit = None
+        worker.close()
+
+        self.workers.remove(worker)
+
+        if worker in self._waiting:
+            self._waiting.remove(worker)
+
+    def requeue(self, unit):
+        """Throw away what was received for a unit and run it again.
+
+        Args:
+            unit (int): The unit index.
+        """
+
+        self._buffers[unit].clear()
+        self._finished[unit] = False
+
+        self._order.append(unit)
+
+    def crash(self, unit, reason):
+        """Report a unit as failed because its worker died.
+
+        Args:
+            unit (int): The unit index.
+            reason (str): Why the worker died.
+        """
+
+        # Nothing has been reported yet if units are not streamed.
+        if not self.stream:
+            self._buffers[unit].clear()
+
+        self._buffers[unit].append(('crash', reason))
+        self._buffers[unit].append(('done', None))
+
+        if self._options['bail'] and unit < self._limit:
+            self._limit = unit + 1
+
+        # Nothing is known about what ran, so all of it failed.
+        self._finish(unit, range(self._starts[unit], self._starts[unit + 1]))
+
+    def _finish(self, unit, failed):
+        """Mark a unit as done and hand out units that were waiting
+        for it.
+
+        Args:
+            unit (int): The unit index.
+            failed (Iterable[int]): Indexes of its runnables that
+                failed.
+        """
+
+        self._finished[unit] = True
+        self._failed.update(failed)
+
+        waiting = self._waiting
+        self._waiting = []
+
+        for worker in waiting:
+            self.hand_out(worker)
+
+    def idle(self, worker):
+        """Handle a worker that has no units left to run.
+
+        The default stops the worker.
+
+        Args:
+            worker: The worker.
+        """
+
+        worker.stop()
+
+    def hand_out(self, worker):
+        """Give a worker the next unit whose prerequisites are done,
+        or pass it to ``idle`` if there are no units left.
+
+        Args:
+            worker: The worker.
+        """
+
+        # Units after a bail are never started.
+        if not self.remaining:
+            worker.unit = None
+            self.idle(worker)
+            return
+
+        for position in range(len(self._order) - 1, -1, -1):
+            unit = self._order[position]
+
+            if unit < self._limit and all(self._finished[before]
+                    for before in self._after[unit]):
+                del self._order[position]
+
+                worker.assign(unit,
+                        sorted(self._prerequisites[unit] & self._failed))
+                return
+
+        # Prerequisites come first, so one of them is still running.
+        worker.unit = None
+        self._waiting.append(worker)
+
+    def _receive(self):
+        """Wait for worker messages and buffer them.
+
+        A worker that closes its connection before finishing its unit
+        is handed to ``lost``.
+        """
+
+        busy = [worker for worker in self.workers if worker.unit is not None]
+
+        ready = [worker for worker in busy if worker.buffered()]
+
+        if not ready:
+            ready = select.select(busy, [], [], POLL_INTERVAL)[0]
+
+        for worker in ready:
+            try:
+                unit, kind, payload = worker.recv()
+            except (EOFError, IOError, OSError, ValueError):
+                self.lost(worker)
+                continue
+
+            self._buffers[unit].append((kind, payload))
+
+            if kind == 'bail' and unit < self._limit:
+                self._limit = unit + 1
+            elif kind == 'done':
+                self.hand_out(worker)
+                self._finish(unit, payload)
+
+    def _report(self):
+        """Report everything buffered for the earliest unfinished
+        units.
+        """
+
+        while self._head < self._limit:
+            if not self.stream and not self._finished[self._head]:
+                return
+
+            messages = self._buffers[self._head]
+
+            while messages:
+                kind, payload = messages.popleft()
+
+                if kind == 'done':
+                    break
+
+                self.handle(kind, payload)
+            else:
+                return
+
+            self._head += 1
+
+    def handle(self, kind, payload):
+        """Feed a single worker message into the reporter.
+
+        Args:
+            kind (str): The message kind.
+            payload (Object): The message data.
+        """
+
+        reporter = self._reporter
+
+        if kind == 'stdout':
+            sys.stdout.write(payload)
+        elif kind == 'bail':
+            self._bailed = True
+        elif kind == 'error':
+            raise CcinoException(
+                'Error while running "{}" in a worker:\n{}'
+                .format(self.units[self._head].name, payload[0])
+            )
+        elif kind == 'crash':
+            exc_info = ('WorkerCrashed: {}\n'.format(payload), [])
+
+            if self._open_suites:
+                reporter.base_test_fail(self._open_suites[-1], exc_info)
+            else:
+                reporter.base_test_fail(self.units[self._head], exc_info)
+
+            while self._open_suites:
+                reporter.base_suite_end(self._open_suites.pop())
+
+            self._bailed = self._bailed or self._options['bail']
+        elif kind != 'hooks_done':
+            index, exc_info, duration, case = payload
+            runnable = self.runnables[index]
+
+            if case is not None:
+                runnable = runnable.case(case[0], case[1])
+
+                # The test itself is not reported, only its cases.
+                runnable.test.duration = (runnable.test.duration or 0) + \
+                        (duration or 0)
+
+                if kind == 'test_fail':
+                    runnable.test.mark_failed()
+
+            if duration is not None:
+                runnable.duration = duration
+
+            if kind == 'suite_start':
+                self._open_suites.append(runnable)
+            elif kind == 'suite_end':
+                self._open_suites.pop()
+
+            dispatch_event(reporter, kind, runnable, exc_info)
+
+
+class _ProcessScheduler(Scheduler):
+    """Scheduler that runs units in forked worker processes.
+
+    A worker that dies is reported as a failure of its unit and a new
+    worker takes its place.
+    """
+
+    def __init__(self, root, reporter, options, durations, jobs):
+        super(_ProcessScheduler, self).__init__(root, reporter, options,
+                durations)
+
+        self._jobs = jobs
+        self._context = _get_context()
+
+    def start(self):
+        # Anything buffered now would be written again by each worker.
+        for stream in (sys.stdout, sys.stderr):
+            if hasattr(stream, 'flush'):
+                stream.flush()
+
+        for _ in range(min(self._jobs, len(self.units))):
+            self._spawn()
+
+    def finish(self):
+        """Report what the stopped workers printed and the events of
+        finishing their values.
+        """
+
+        for worker in list(self.workers):
+            # Workers still running units after a bail are terminated.
+            if worker.unit is not None:
+                continue
+
+            if worker in self._waiting:
+                worker.stop()
+
+            try:
+                while True:
+                    unit, kind, payload = worker.recv()
+
+                    if kind == 'closed':
+                        break
+
+                    self.handle(kind, payload)
+            except (EOFError, IOError, OSError):
+                continue
+
+    def _spawn(self):
+        self.add_worker(_Worker(self._context, self.root, self._options))
+
+    def lost(self, worker):
+        unit = worker.unit
+
+        self.remove_worker(worker)
+
+        self.crash(unit, 'worker process exited with code {}'
+                .format(worker.process.exitcode))
+
+        if self.remaining:
+            self._spawn()
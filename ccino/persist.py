@@ -0,0 +1,292 @@
+"""Values of fixtures kept on disk between runs."""
+
+from __future__ import absolute_import
+
+import binascii
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import platform
+import struct
+
+from .cache import DEFAULT_CACHE_DIR
+from .util import get_temp_path, make_dirs
+from .version import __version__
+
+
+DEFAULT_FIXTURES_DIR = os.path.join(DEFAULT_CACHE_DIR, 'fixtures')
+
+# Values are evicted, least recently used first, above this many bytes.
+DEFAULT_MAX_SIZE = 2 * 1024 ** 3
+
+# Protocol 5 keeps large buffers (like the data of arrays) out of the
+# pickle so they are read straight into memory.
+PROTOCOL = min(pickle.HIGHEST_PROTOCOL, 5)
+
+# os.rename does not overwrite on Windows.
+_replace = getattr(os, 'replace', os.rename)
+
+_MAGIC = b'ccino-fixture-1\n'
+_LENGTH = struct.Struct('<Q')
+_SUFFIX = '.bin'
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+
+    try:
+        with open(path, 'rb') as input_file:
+            for chunk in iter(lambda: input_file.read(1 << 20), b''):
+                digest.update(chunk)
+    except (IOError, OSError):
+        return None
+
+    return digest.hexdigest()
+
+
+def _get_source(func):
+    try:
+        return inspect.getsource(func)
+    except (IOError, OSError, TypeError):
+        code = getattr(func, '__code__', None)
+
+        if code is None:
+            return func.__name__
+
+        return binascii.hexlify(code.co_code).decode('ascii')
+
+
+class FixtureCache(object):
+    """Directory of fixture values that survive between runs.
+
+    A value is kept under a hash of the source of its fixture, the
+    values the fixture takes, the contents of the input files it names,
+    and the Python and ccino versions. Every value is a file of its own
+    written atomically, so processes running at the same time can share
+    the directory. When the directory grows past its size limit, the
+    values used least recently are removed.
+    """
+
+    def __init__(self, path=DEFAULT_FIXTURES_DIR, max_size=DEFAULT_MAX_SIZE):
+        """Create a new FixtureCache.
+
+        The directory is not created until a value is saved.
+
+        Keyword Args:
+            path (str): The directory to keep values in.
+            max_size (int): The size limit of the directory in bytes.
+        """
+
+        self._path = path
+        self._max_size = max_size
+
+    def _file(self, key):
+        return os.path.join(self._path, key + _SUFFIX)
+
+    def get_key(self, provider, arguments):
+        """Get the key of a value.
+
+        Args:
+            provider (:obj:`ccino.fixtures.Provider`): The fixture.
+            arguments (list): The values the fixture takes, or the keys
+                of the ones that are kept as well, since those can be
+                large.
+
+        Returns:
+            :obj:`str` or :obj:`None`: The key, or None if the values
+            the fixture takes cannot be pickled.
+        """
+
+        try:
+            pickled = pickle.dumps(arguments, PROTOCOL)
+        except Exception:
+            return None
+
+        code = getattr(provider.func, '__code__', None)
+        directory = os.path.dirname(code.co_filename) if code else ''
+
+        inputs = [[path, _hash_file(os.path.join(directory, path))]
+                for path in provider.inputs]
+
+        source = json.dumps({
+            'python': [platform.python_implementation(),
+                    platform.python_version()],
+            'ccino': __version__,
+            'name': provider.name,
+            'source': _get_source(provider.func),
+            'arguments': hashlib.sha256(pickled).hexdigest(),
+            'inputs': inputs
+        }, sort_keys=True)
+
+        return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+    def load(self, key):
+        """Load a value.
+
+        Args:
+            key (str): The key from ``get_key``.
+
+        Returns:
+            tuple: Whether the value was found, and the value.
+        """
+
+        path = self._file(key)
+
+        try:
+            with open(path, 'rb') as value_file:
+                value = self._read(value_file)
+        except Exception:
+            # Missing, corrupt or written by something else.
+            return False, None
+
+        # The modification time tells which values were used last.
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        return True, value
+
+    def _read(self, value_file):
+        if value_file.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError('not a fixture value')
+
+        count = _LENGTH.unpack(value_file.read(_LENGTH.size))[0]
+        lengths = [_LENGTH.unpack(value_file.read(_LENGTH.size))[0]
+                for _ in range(count + 1)]
+
+        data = value_file.read(lengths[0])
+        buffers = []
+
+        for length in lengths[1:]:
+            buffer = bytearray(length)
+
+            if value_file.readinto(buffer) != length:
+                raise ValueError('fixture value is cut off')
+
+            buffers.append(buffer)
+
+        if buffers:
+            return pickle.loads(data, buffers=buffers)
+
+        return pickle.loads(data)
+
+    def save(self, key, value):
+        """Save a value, removing the least recently used ones if the
+        directory grows too large.
+
+        Args:
+            key (str): The key from ``get_key``.
+            value (Object): A value that can be pickled.
+
+        Returns:
+            bool: Whether the value could be saved.
+        """
+
+        try:
+            data, raw = self._pickle(value)
+        except Exception:
+            return False
+
+        make_dirs(self._path)
+
+        path = self._file(key)
+        temp_path = get_temp_path(path)
+
+        with open(temp_path, 'wb') as value_file:
+            value_file.write(_MAGIC)
+            value_file.write(_LENGTH.pack(len(raw)))
+            value_file.write(_LENGTH.pack(len(data)))
+
+            for buffer in raw:
+                value_file.write(_LENGTH.pack(buffer.nbytes))
+
+            value_file.write(data)
+
+            for buffer in raw:
+                value_file.write(buffer)
+
+        _replace(temp_path, path)
+
+        self._evict(path)
+
+        return True
+
+    def _pickle(self, value):
+        """Pickle a value, keeping large buffers out of band if
+        possible.
+
+        Returns:
+            tuple: The pickle and the list of buffers.
+        """
+
+        if PROTOCOL >= 5:
+            buffers = []
+            data = pickle.dumps(value, PROTOCOL,
+                    buffer_callback=buffers.append)
+
+            try:
+                return data, [buffer.raw() for buffer in buffers]
+            except BufferError:
+                # Buffers that are not contiguous are kept in band.
+                pass
+
+        return pickle.dumps(value, PROTOCOL), []
+
+    def _evict(self, kept):
+        """Remove the least recently used values above the size limit,
+        except the one just saved.
+        """
+
+        files = []
+        total = 0
+
+        for name in os.listdir(self._path):
+            if not name.endswith(_SUFFIX):
+                continue
+
+            path = os.path.join(self._path, name)
+
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            files.append((stat.st_mtime, path, stat.st_size))
+            total += stat.st_size
+
+        files.sort()
+
+        for _, path, size in files:
+            if total <= self._max_size:
+                break
+
+            if path == kept:
+                continue
+
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+
+            total -= size
+
+    def clear(self):
+        """Remove every value."""
+
+        if not os.path.isdir(self._path):
+            return
+
+        for name in os.listdir(self._path):
+            if name.endswith(_SUFFIX) or name.endswith('.tmp'):
+                try:
+                    os.remove(os.path.join(self._path, name))
+                except OSError:
+                    pass
+
+    @property
+    def path(self):
+        """str: The directory values are kept in."""
+        return self._path
@@ -5,8 +5,6 @@ import traceback
 
 import blessings
 
-from ..fixtures import Test, Hook
-
 
 WINDOWS = sys.platform == 'win32'
 
@@ -42,6 +40,25 @@ def format_seconds_short(seconds):
     return str(max(round_n(seconds * 1e6), 1)) + u'\u00B5s'
 
 
+def get_exception_info():
+    """Get the exception currently being handled in a plain form.
+
+    The result only contains strings, numbers, and lists so it can be
+    pickled or sent to another process and formatted there.
+
+    Returns:
+        Tuple[str, List[Tuple[str, int, str, str]]]: The formatted
+        exception line and the extracted traceback entries.
+    """
+
+    info = sys.exc_info()
+
+    exc = ''.join(traceback.format_exception_only(*info[0:2]))
+    tb = [tuple(trace) for trace in traceback.extract_tb(info[2])]
+
+    return exc, tb
+
+
 def override(func):
     """Override a BaseReporter method.
 
@@ -97,6 +114,8 @@ class BaseReporter(object):
         open_suites (List[`ccino.suite.Suite`]): The list of open
             suites.
         errors (List[str]): The list of error tracebacks.
+        notes (List[str]): Lines added to the summary after the
+            number of pending tests.
     """
 
     def __init__(self):
@@ -123,6 +142,10 @@ class BaseReporter(object):
 
         self.open_suites = []
         self.errors = []
+        self.notes = []
+
+        self._journal = None
+        self._results = None
 
     def color(self, use_color=None):
         """Force color output.
@@ -166,6 +189,27 @@ class BaseReporter(object):
             except UnicodeEncodeError as e:
                 self._stream.write(string.encode('utf-8'))
 
+    def journal(self, journal):
+        """Write the results of tests that ran to a journal.
+
+        Args:
+            journal (:obj:`ccino.journal.Journal` or :obj:`None`): The
+                journal, which has to be open.
+        """
+
+        self._journal = journal
+
+    def results(self, results):
+        """Tell a result cache about the tests that passed, so the
+        cases of parametrized tests can be reported again.
+
+        Args:
+            results (:obj:`ccino.results.ResultCache` or :obj:`None`):
+                The result cache.
+        """
+
+        self._results = results
+
     def mirror(self, on=True):
         """Mirror the output to stdout.
 
@@ -184,7 +228,7 @@ class BaseReporter(object):
 
         self._exc_context = show
 
-    def _get_last_exception(self):
+    def _get_last_exception(self, exc_info=None):
         """Get the last exception in a formatted traceback.
 
         The tracebacks here read backwards from normal Python
@@ -193,17 +237,21 @@ class BaseReporter(object):
 
         The tracebacks are formatted similarly to NodeJS tracebacks.
 
+        Keyword Args:
+            exc_info (tuple): Exception information from
+                ``get_exception_info`` to format instead of the
+                exception currently being handled.
+
         Returns:
             str: The formatted traceback.
         """
 
-        info = sys.exc_info()
+        if exc_info is None:
+            exc_info = get_exception_info()
 
-        exc = self.terminal.red(
-            ''.join(traceback.format_exception_only(*info[0:2]))
-        )
+        exc = self.terminal.red(exc_info[0])
 
-        tb = traceback.extract_tb(info[2])
+        tb = exc_info[1]
         tb_msg = ''
 
         for trace in reversed(tb):
@@ -265,31 +313,57 @@ class BaseReporter(object):
 
         self.num_passes += 1
 
+        # Tests reported without running are in the journal already or
+        # do not need to be.
+        if self._journal is not None and not test.cached:
+            self._journal.record(test, 'pass')
+
+        if self._results is not None and not test.cached:
+            self._results.passed(test)
+
         self.test_pass(test)
 
-    def base_test_fail(self, test):
+    def base_test_fail(self, test, exc_info=None):
         """Handle a failing test.
 
         Args:
             suite (:obj:`ccino.test.Test`): The test that failed.
+
+        Keyword Args:
+            exc_info (tuple): Exception information from
+                ``get_exception_info``. Defaults to the exception
+                currently being handled.
         """
 
         self.num_failures += 1
 
-        self.errors.append((test, self._get_last_exception()))
+        if exc_info is None:
+            exc_info = get_exception_info()
+
+        if self._journal is not None and not test.cached:
+            self._journal.record(test, 'fail', exc_info)
+
+        self.errors.append((test, self._get_last_exception(exc_info)))
 
         self.test_fail(test)
 
-    def base_test_pending(self, test):
+    def base_test_pending(self, test, reason=None):
         """Handle a pending test.
 
         Args:
             suite (:obj:`ccino.test.Test`): The test that is pending.
+
+        Keyword Args:
+            reason (str): Why the test was left out while running,
+                such as a prerequisite failing.
         """
 
         self.num_pending += 1
 
-        self.test_pending(test)
+        if reason is None:
+            self.test_pending(test)
+        else:
+            self.test_pending(test, reason)
 
     def base_hook_pass(self, hook):
         """Handle a passing hook.
@@ -300,16 +374,21 @@ class BaseReporter(object):
 
         self.hook_pass(hook)
 
-    def base_hook_fail(self, hook):
+    def base_hook_fail(self, hook, exc_info=None):
         """Handle a failing hook.
 
         Args:
             suite (:obj:`ccino.hook.Hook`): The hook that failed.
+
+        Keyword Args:
+            exc_info (tuple): Exception information from
+                ``get_exception_info``. Defaults to the exception
+                currently being handled.
         """
 
         self.num_failures += 1
 
-        self.errors.append((hook, self._get_last_exception()))
+        self.errors.append((hook, self._get_last_exception(exc_info)))
 
         self.hook_fail(hook)
 
@@ -365,11 +444,14 @@ class BaseReporter(object):
 
         pass
 
-    def test_pending(self, test):
+    def test_pending(self, test, reason=None):
         """Print when a test is pending.
 
         Args:
             suite (:obj:`ccino.test.Test`): The test that is pending.
+
+        Keyword Args:
+            reason (str): Why the test was left out while running.
         """
 
         pass
@@ -423,6 +505,9 @@ class BaseReporter(object):
                 '  {:d} pending\n'.format(self.num_pending)
             ))
 
+        for note in self.notes:
+            self.write(self.terminal.cyan('  ' + note + '\n'))
+
         # If any tests failed, print out how many.
         if self.num_failures:
             self.write(self.terminal.red(
@@ -42,10 +42,14 @@ class DebugReporter(BaseReporter):
         self.write(padding + 'test \'' + test.name + '\' failed ' + num + '\n')
 
     @override
-    def test_pending(self, test):
+    def test_pending(self, test, reason=None):
         padding = '  ' * (self.num_open_suites + 1)
 
-        self.write(padding + 'test \'' + test.name + '\' pending\n')
+        if reason is None:
+            self.write(padding + 'test \'' + test.name + '\' pending\n')
+        else:
+            self.write(padding + 'test \'' + test.name + '\' pending: ' +
+                    reason + '\n')
 
     @override
     def hook_pass(self, hook):
@@ -39,11 +39,16 @@ class DefaultReporter(BaseReporter):
         self.write(padding + number + ' ' + name + '\n')
 
     @override
-    def test_pending(self, test):
+    def test_pending(self, test, reason=None):
         padding = '  ' * (self.num_open_suites + 1)
         name = self.terminal.cyan('- ' + test.name)
 
-        message = padding + name + '\n'
+        message = padding + name
+
+        if reason is not None:
+            message += ' ' + self.terminal.bright_black('(' + reason + ')')
+
+        message += '\n'
 
         self.write(message)
 
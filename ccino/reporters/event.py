@@ -0,0 +1,134 @@
+from __future__ import absolute_import
+
+import sys
+
+from .base import BaseReporter, get_exception_info
+
+
+EVENT_KINDS = [
+    'suite_start',
+    'suite_end',
+    'test_pass',
+    'test_fail',
+    'test_pending',
+    'hook_pass',
+    'hook_fail'
+]
+
+
+def dispatch_event(reporter, kind, runnable, exc_info=None):
+    """Feed a recorded event into a reporter.
+
+    Args:
+        reporter (:obj:`ccino.reporters.base.BaseReporter`): The
+            reporter to call.
+        kind (str): One of ``EVENT_KINDS``.
+        runnable (:obj:`ccino.fixtures.Runnable`): The runnable the
+            event is about.
+
+    Keyword Args:
+        exc_info (tuple): Exception information for failures, or the
+            reason of a pending test.
+    """
+
+    handler = getattr(reporter, 'base_' + kind)
+
+    if kind.endswith('_fail') or exc_info is not None:
+        handler(runnable, exc_info)
+    else:
+        handler(runnable)
+
+
+class EventReporter(BaseReporter):
+    """Reporter that forwards events instead of printing them.
+
+    Each base method calls ``emit(kind, runnable, exc_info)`` so the
+    events can be sent somewhere else (such as another process) and
+    fed into a real reporter with ``dispatch_event``. Failures are
+    passed along as plain exception information from
+    ``get_exception_info``.
+
+    This is not intended to be selected as a normal reporter.
+    """
+
+    def __init__(self, emit):
+        """Create a new EventReporter.
+
+        Args:
+            emit (Callable): Called with the event kind, the runnable,
+                and the exception information (None unless the event
+                is a failure), or the reason of a pending test.
+        """
+
+        super(EventReporter, self).__init__()
+
+        self._emit = emit
+
+    def base_suite_start(self, suite):
+        self._emit('suite_start', suite, None)
+
+    def base_suite_end(self, suite):
+        self._emit('suite_end', suite, None)
+
+    def base_test_pass(self, test):
+        self._emit('test_pass', test, None)
+
+    def base_test_fail(self, test, exc_info=None):
+        self.num_failures += 1
+        self._emit('test_fail', test, exc_info or get_exception_info())
+
+    def base_test_pending(self, test, reason=None):
+        self._emit('test_pending', test, reason)
+
+    def base_hook_pass(self, hook):
+        self._emit('hook_pass', hook, None)
+
+    def base_hook_fail(self, hook, exc_info=None):
+        self.num_failures += 1
+        self._emit('hook_fail', hook, exc_info or get_exception_info())
+
+
+class EventRecorder(object):
+    """Records events and printed text to be reported later.
+
+    ``reporter`` is handed to runnables in place of a real reporter
+    and the recorder itself can be used as a stream so printed text
+    keeps its place between the events.
+
+    Attributes:
+        reporter (:obj:`EventReporter`): The reporter that records.
+        events (list): The recorded ``(kind, runnable, exc_info)``
+            events. Printed text is recorded with the kind
+            ``'stdout'`` and the text in place of the runnable.
+    """
+
+    def __init__(self):
+        """Create a new EventRecorder."""
+
+        self.events = []
+        self.reporter = EventReporter(self._record)
+
+    def _record(self, kind, runnable, exc_info):
+        self.events.append((kind, runnable, exc_info))
+
+    def write(self, string):
+        self.events.append(('stdout', string, None))
+
+    def flush(self):
+        pass
+
+    def replay(self, reporter):
+        """Feed the recorded events into a reporter.
+
+        Printed text is written to stdout.
+
+        Args:
+            reporter (:obj:`ccino.reporters.base.BaseReporter`): The
+                reporter to call.
+        """
+
+        for kind, runnable, exc_info in self.events:
+            if kind == 'stdout':
+                sys.stdout.write(runnable)
+            else:
+                dispatch_event(reporter, kind, runnable, exc_info)
@@ -0,0 +1,332 @@
+"""Report tests of unchanged files as passed without running them."""
+
+from __future__ import absolute_import
+
+import hashlib
+import json
+import os
+import platform
+
+from .cache import Cache, DEFAULT_CACHE_DIR
+from .cases import CaseFile
+from .fixtures import Case, Hook, Suite, Test
+from .imports import ImportGraph
+from .selection import get_tests
+from .version import __version__
+
+
+DEFAULT_RESULTS_DIR = os.path.join(DEFAULT_CACHE_DIR, 'results')
+
+
+def _get_file(runnable):
+    code = getattr(runnable.func, '__code__', None)
+
+    if code is None:
+        return None
+
+    return os.path.abspath(code.co_filename)
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+
+    try:
+        with open(path, 'rb') as source_file:
+            # Files of cases can be too big to read at once.
+            for chunk in iter(lambda: source_file.read(1 << 20), b''):
+                digest.update(chunk)
+    except (IOError, OSError):
+        return None
+
+    return digest.hexdigest()
+
+
+def _walk(unit):
+    """Iterate over a top level suite and everything inside it, or
+    over a top level test.
+    """
+
+    if isinstance(unit, Test):
+        return [unit]
+
+    return unit.walk()
+
+
+def _get_inputs(root, units):
+    """Get the data files units read: the files of the cases of their
+    tests and the inputs of the fixtures they can take.
+    """
+
+    inputs = set()
+    suites = [root]
+
+    for unit in units:
+        for runnable in _walk(unit):
+            if isinstance(runnable, Suite):
+                suites.append(runnable)
+            elif isinstance(runnable, Test) and runnable.params is not None \
+                    and isinstance(runnable.params[0], CaseFile):
+                inputs.add(os.path.abspath(runnable.params[0].path))
+
+    for suite in suites:
+        for provider in suite.providers:
+            directory = os.path.dirname(_get_file(provider) or '')
+
+            inputs.update(os.path.abspath(os.path.join(directory, path))
+                    for path in provider.inputs)
+
+    return inputs
+
+
+def mark_cached(root, units):
+    """Mark top level suites and tests as passed without running.
+
+    The root suite is marked as well if every unit is, so its hooks do
+    not run either.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+        units (Iterable[int]): Indexes of the units in ``root.tests``.
+    """
+
+    for unit in units:
+        root.tests[unit].mark_cached()
+
+    if root.tests and all(unit.cached for unit in root.tests):
+        root.mark_cached()
+
+
+def get_cached_cases(root):
+    """Get the cases cached parametrized tests are reported with.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+
+    Returns:
+        List[Tuple[int, list]]: Indexes of the tests in the list from
+        ``get_tests``, with the position and name of each case.
+    """
+
+    return [(i, test._cached_cases) for i, test in enumerate(get_tests(root))
+            if test._cached_cases is not None]
+
+
+def mark_cached_cases(root, cases):
+    """Report the cases of parametrized tests as passed without
+    running them.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+        cases (List[Tuple[int, list]]): Cases from
+            ``get_cached_cases``.
+    """
+
+    tests = get_tests(root)
+
+    for index, test_cases in cases:
+        tests[index].mark_cached_cases(test_cases)
+
+
+class ResultCache(object):
+    """Results of test files that passed, by a hash of what they run.
+
+    The key of a test file covers its contents, the local modules it
+    imports (even indirectly), the files of the root suite hooks, the
+    files of cases and fixture inputs its tests read, the Python and
+    ccino versions and the options. Every key is stored in a file of
+    its own, so the directory can be shared by machines running at the
+    same time. The cases of parametrized tests are kept with the
+    results, so they are reported one by one like in a real run.
+    """
+
+    def __init__(self, path=DEFAULT_RESULTS_DIR):
+        """Create a new ResultCache.
+
+        Keyword Args:
+            path (str): The directory to keep results in.
+        """
+
+        self._cache = Cache(path)
+        self._keys = {}
+        self._cases = {}
+
+    def _group(self, root):
+        """Get the units of each test file in the order they were
+        added.
+        """
+
+        groups = {}
+        order = []
+
+        for index, unit in enumerate(root.tests):
+            path = _get_file(unit)
+
+            if path is None:
+                continue
+
+            if path not in groups:
+                groups[path] = []
+                order.append(path)
+
+            groups[path].append(index)
+
+        return [(path, groups[path]) for path in order]
+
+    def _get_keys(self, root, groups, options):
+        hook_files = set()
+
+        for hooks in (root._suite_setups, root._setups, root._teardowns,
+                root._suite_teardowns):
+            for hook in hooks:
+                path = _get_file(hook)
+
+                if path is not None:
+                    hook_files.add(path)
+
+        paths = [path for path, _ in groups]
+
+        roots = [os.getcwd()] + [os.path.dirname(path) for path in paths]
+        graph = ImportGraph(paths + sorted(hook_files), roots)
+
+        common = set()
+
+        for path in hook_files:
+            common.update(graph.imported(path))
+
+        hashes = {}
+        keys = {}
+
+        common_inputs = _get_inputs(root, ())
+
+        for path, units in groups:
+            files = []
+            inputs = _get_inputs(root, [root.tests[unit] for unit in units])
+
+            for dependency in sorted(graph.imported(path) | common |
+                    common_inputs | inputs):
+                if dependency not in hashes:
+                    hashes[dependency] = _hash_file(dependency)
+
+                files.append([os.path.relpath(dependency),
+                        hashes[dependency]])
+
+            source = json.dumps({
+                'python': [platform.python_implementation(),
+                        platform.python_version()],
+                'ccino': __version__,
+                'options': options,
+                'files': files
+            }, sort_keys=True)
+
+            keys[path] = hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+        return keys
+
+    def apply(self, root, options):
+        """Mark the tests of files that passed before as cached.
+
+        Args:
+            root (:obj:`ccino.fixtures.root.RootSuite`): The root suite
+                about to run.
+            options (dict): Options that change the results, as JSON
+                values.
+
+        Returns:
+            List[int]: Indexes of the cached units in ``root.tests``.
+        """
+
+        groups = self._group(root)
+
+        self._keys = self._get_keys(root, groups, options)
+        self._cases = {}
+
+        cached = []
+
+        for path, units in groups:
+            value = self._cache.get(self._keys[path])
+
+            if value is None or value.get('tests') != \
+                    self._get_ids(root, units):
+                continue
+
+            cached.extend(units)
+
+            cases = value.get('cases', {})
+
+            for runnable in self._get_tests(root, units):
+                if runnable.id in cases:
+                    runnable.mark_cached_cases(
+                            [tuple(case) for case in cases[runnable.id]])
+
+        mark_cached(root, cached)
+
+        return cached
+
+    def passed(self, test):
+        """Keep a passed case of a parametrized test to be reported
+        again with the results of its file.
+
+        Args:
+            test (:obj:`ccino.fixtures.Runnable`): The test or case
+                that passed.
+        """
+
+        if isinstance(test, Case):
+            self._cases.setdefault(test.test, []).append(
+                    (test.number, test.name))
+
+    def _get_tests(self, root, units):
+        return [runnable for unit in units
+                for runnable in _walk(root.tests[unit])
+                if isinstance(runnable, Test)]
+
+    def _get_ids(self, root, units):
+        return [test.id for test in self._get_tests(root, units)]
+
+    def record(self, root, errors):
+        """Save the results of test files where every test passed.
+
+        Args:
+            root (:obj:`ccino.fixtures.root.RootSuite`): The root suite
+                that ran after ``apply``.
+            errors (list): ``(runnable, error)`` pairs of the failures of
+                the run, like ``BaseReporter.errors``.
+        """
+
+        failed = set(runnable.test if isinstance(runnable, Case) else runnable
+                for runnable, _ in errors)
+
+        # A failing root hook may have changed how anything ran.
+        if any(isinstance(runnable, Hook) and runnable.parent is root
+                for runnable in failed):
+            return
+
+        for path, units in self._group(root):
+            if path not in self._keys or root.tests[units[0]].cached:
+                continue
+
+            runnables = [runnable for unit in units
+                    for runnable in _walk(root.tests[unit])]
+
+            if failed.intersection(runnables):
+                continue
+
+            # Tests after a bail did not run.
+            if any(runnable.duration is None and not runnable.skipped
+                    for runnable in runnables if isinstance(runnable, Test)):
+                continue
+
+            tests = self._get_tests(root, units)
+
+            self._cache.set(self._keys[path], {
+                'tests': [test.id for test in tests],
+                'cases': dict((test.id, self._cases.get(test, []))
+                        for test in tests if test.params is not None)
+            })
+
+        self._cases = {}
+
+    @property
+    def path(self):
+        """str: The results directory."""
+        return self._cache.path
@@ -1,13 +1,33 @@
 from __future__ import absolute_import
 
+import json
+import os
+import re
 import sys
 
+from .affected import affected
+from .cache import Cache
+from .cases import CaseFile
+from .depends import order_dependencies, resolve_dependencies
+from .distributed import run_distributed
 from .exceptions import CcinoBail
+from .journal import Journal, find_done, mark_done
+from .parallel import can_fork, run_parallel
+from .persist import FixtureCache
+from .results import ResultCache, get_cached_cases
 from .reporters import get_reporter, get_reporter_names
-from .fixtures import Test, Hook, Suite
+from .reporters.base import format_seconds_short
+from .selection import IdTrie, get_case_ranges, get_tests, grep, \
+        last_failed, leave_out, match_tags, record_failures, record_history, \
+        select, shard, shard_cases, split_case_range, \
+        time_budget
+from .tags import parse_tags
+from .fixtures import Test, Hook, Provider, Suite
+from .fixtures.provider import ProviderCache, resolve_providers
 from .fixtures.root import RootSuite
 from .util import load_module, redirect_print, make_builtin
 from .util.decorator_wraps import combine_args_self
+from .util.event_loop import EventLoop
 from .util.timer import Timer
 
 
@@ -19,7 +39,7 @@ def _get_options_checker(options):
     """
 
     def check_options(key, default):
-        return key in options and getattr(options, key) or default
+        return options[key] if key in options else default
 
     return check_options
 
@@ -45,11 +65,43 @@ class Runner(object):
 
         self._verbosity = check_options('verbosity', 0)
         self._bail = check_options('bail', False)
+        self._bail_on_hook_failure = check_options('bail_on_hook_failure',
+                False)
         self._color = check_options('color', None)
         self._exc_context = check_options('exc_context', False)
         self._reporter = check_options('reporter', 'default')
         self._output = check_options('output', sys.stdout)
         self._stdout = check_options('stdout', sys.stdout)
+        self._jobs = check_options('jobs', 1)
+        self._cache = check_options('cache', None)
+        self._workers = check_options('workers', None)
+        self._shard = check_options('shard', None)
+        self._shard_durations = check_options('shard_durations', None)
+        self._isolate = check_options('isolate', False)
+        self._last_failed = check_options('last_failed', False)
+        self._failed_first = check_options('failed_first', False)
+        self._coverage = check_options('coverage', None)
+        self._affected = check_options('affected', False)
+        self._results = check_options('results', None)
+        self._time_budget = check_options('time_budget', None)
+        self._grep = check_options('grep', None)
+        self._tags = None
+        self._ids = check_options('ids', None)
+        self._journal = None
+        self._resume = False
+        self._fixture_cache = None
+        self._has_dependencies = False
+        self._has_providers = False
+        self._limited = False
+
+        if check_options('tags', None) is not None:
+            self.tags(options['tags'])
+
+        if check_options('fixture_cache', None) is not None:
+            self.fixture_cache(options['fixture_cache'])
+
+        if check_options('journal', None) is not None:
+            self.journal(options['journal'], check_options('resume', False))
 
     @combine_args_self
     def suite(self, func, name=None):
@@ -155,6 +207,42 @@ class Runner(object):
 
         return func
 
+    @combine_args_self
+    def fixture(self, func, name=None, scope='test', persist=False,
+            inputs=()):
+        """Returns a decorator for adding a value provider.
+
+        Tests, hooks and other providers inside the current suite take
+        the value by naming an argument after the provider. The value
+        is built once per scope: ``'test'`` (shared by a test and its
+        hooks), ``'suite'`` (the suite of the test), ``'file'`` or
+        ``'session'``. If func is a generator, the value is what it
+        yields and the rest of it runs when the scope ends.
+
+        Values that take long to build can be kept on disk with
+        ``persist`` (see ``fixture_cache``). They are built again when
+        the source of func, the values it takes or its input files
+        change.
+
+        Keyword Args:
+            name (str): The argument name. Defaults to the name of func.
+            scope (str): How long a value is kept.
+            persist (bool): Whether to keep values on disk between runs.
+            inputs (Iterable[str]): Files the value is built from,
+                relative to the file of func.
+
+        Returns:
+            Callable: The decorator.
+        """
+
+        provider = Provider(func, name=name, scope=scope, persist=persist,
+                inputs=inputs)
+        self._current_suite.add_provider(provider)
+
+        self._has_providers = True
+
+        return func
+
     @combine_args_self
     def skip(self, func, condition=True):
         """Returns a decorator for skipping a fixture.
@@ -171,6 +259,204 @@ class Runner(object):
 
         return func
 
+    @combine_args_self
+    def tag(self, func, *tags):
+        """Returns a decorator for tagging a fixture.
+
+        Tags of a suite apply to everything inside it. Tests can be
+        picked by their tags with ``tags``.
+
+        Args:
+            *tags (str): The tags.
+
+        Returns:
+            Callable: The decorator.
+        """
+
+        func._tags = getattr(func, '_tags', ()) + tags
+
+        return func
+
+    @combine_args_self
+    def depends_on(self, func, *ids):
+        """Returns a decorator for making a test depend on others.
+
+        If a test or suite it depends on fails, the test is reported
+        as pending instead of running, and so are tests depending on
+        it. Ids are looked up inside the suites around the test first,
+        so siblings can be named on their own. Tests are moved after
+        what they depend on if needed.
+
+        Args:
+            *ids (str): Ids of the tests and suites, like
+                ``'suite::test'``.
+
+        Returns:
+            Callable: The decorator.
+        """
+
+        func._depends_on = getattr(func, '_depends_on', ()) + ids
+        self._has_dependencies = True
+
+        return func
+
+    def params(self, cases, ids=None):
+        """Returns a decorator for running a test once for every case.
+
+        Cases are taken from the iterable one at a time while the test
+        runs and each is reported like a test of its own, so a generator
+        of cases is never held in memory as a whole. A case is passed to
+        the leading arguments of the test, split up if it is a tuple.
+        Arguments after those can take fixtures. Setup and teardown
+        hooks run once around all the cases.
+
+        This takes no function itself, since the cases can be a
+        function.
+
+        Args:
+            cases (Iterable or Callable): The cases, or a function
+                returning them. A generator can only be run once, while
+                a function makes the cases again for every run.
+
+        Keyword Args:
+            ids (Iterable[str] or Callable): The id of each case, or a
+                function getting the id of a case. Defaults to the
+                position of the case.
+
+        Returns:
+            Callable: The decorator.
+        """
+
+        def decorator(func):
+            func._params = (cases, ids)
+
+            return func
+
+        return decorator
+
+    def batch(self, cases, size=1024, ids=None):
+        """Returns a decorator for running a test on batches of cases.
+
+        The test takes up to ``size`` cases at a time, as a column of
+        values for each of its leading arguments (a NumPy array if NumPy
+        has been imported, a list otherwise). Tuples are split over the
+        columns. It returns one result per case: False, a message or an
+        exception fails the case, while True, None or an empty message
+        passes it. Returning None passes the whole batch and raising
+        fails it. Every case is reported like a test, as with
+        ``params``.
+
+        Args:
+            cases (Iterable or Callable): The cases, or a function
+                returning them.
+
+        Keyword Args:
+            size (int): The number of cases in a batch.
+            ids (Iterable[str] or Callable): The id of each case, or a
+                function getting the id of a case. Defaults to the
+                position of the case.
+
+        Returns:
+            Callable: The decorator.
+        """
+
+        def decorator(func):
+            func._params = (cases, ids)
+            func._batch = size
+
+            return func
+
+        return decorator
+
+    def cases_from(self, path, format=None, ids=None, size=None):
+        """Returns a decorator for running a test once for every line
+        of a CSV or JSON Lines file.
+
+        The file is memory-mapped and read while the test runs, and an
+        index of where its lines start is kept next to it, so ranges of
+        cases picked with ``ids`` or ``shard`` are read without parsing
+        the rest of the file. Cases are passed like with ``params``
+        (see ``ccino.cases.CaseFile`` for how lines are read), or in
+        batches like with ``batch`` if a size is given.
+
+        Args:
+            path (str): The file, relative to the file of the test.
+
+        Keyword Args:
+            format (str): ``'csv'`` or ``'jsonl'``. Defaults to the
+                format of the file extension.
+            ids (Iterable[str] or Callable): The id of each case, or a
+                function getting the id of a case. Defaults to the
+                position of the case.
+            size (int): The number of cases in a batch, or None to pass
+                cases one at a time.
+
+        Returns:
+            Callable: The decorator.
+        """
+
+        def decorator(func):
+            code = getattr(func, '__code__', None)
+            source = path
+
+            if code is not None:
+                source = os.path.join(os.path.dirname(code.co_filename), path)
+
+            func._params = (CaseFile(source, format), ids)
+
+            if size is not None:
+                func._batch = size
+
+            return func
+
+        return decorator
+
+    @combine_args_self
+    def concurrent(self, func, max_workers=None):
+        """Returns a decorator for running a suite's tests on threads.
+
+        Each test still runs with its own setup and teardown hooks and
+        the results are reported in the order the tests were added.
+        Suites inside are not run concurrently unless they are
+        decorated as well.
+
+        Async tests in the suite are awaited together on the event
+        loop shared by the run, with at most ``max_workers`` of them
+        in progress at once.
+
+        Keyword Args:
+            max_workers (int): The maximum number of threads. Defaults
+                to the ``ThreadPoolExecutor`` default.
+
+        Returns:
+            Callable: The decorator.
+        """
+
+        func._concurrent = max_workers or True
+
+        return func
+
+    @combine_args_self
+    def gather(self, func, limit=None):
+        """Returns a decorator for awaiting a suite's async tests
+        together.
+
+        This is like ``concurrent``, except that without a limit every
+        test of the suite is in progress at once, so the suite takes
+        about as long as its slowest test.
+
+        Keyword Args:
+            limit (int): The maximum number of tests in progress at
+                once. Defaults to no limit.
+
+        Returns:
+            Callable: The decorator.
+        """
+
+        func._gather = True
+
+        return self.concurrent(func, max_workers=limit)
+
     @combine_args_self
     def raises(self, func, exception):
         """Returns a decorator for expecting a test exception.
@@ -218,6 +504,17 @@ class Runner(object):
 
         self._bail = stop
 
+    def bail_on_hook_failure(self, stop=True):
+        """Stop the tests from running when a hook fails, instead of
+        only skipping the rest of the hook's suite.
+
+        Keyword Args:
+            stop (bool): Whether the runner should bail on hook
+                failures.
+        """
+
+        self._bail_on_hook_failure = stop
+
     def reporter(self, reporter):
         """Specify the reporter to use.
 
@@ -268,13 +565,598 @@ class Runner(object):
 
         self._exc_context = show
 
+    def jobs(self, jobs=1):
+        """Specify the number of worker processes.
+
+        With more than one job the top level suites are run in
+        parallel worker processes. This falls back to running in
+        this process on platforms without ``fork``.
+
+        Keyword Args:
+            jobs (int): The number of processes to use.
+        """
+
+        self._jobs = jobs
+
+    def isolate(self, isolate=True):
+        """Specify if each test should run in its own process.
+
+        Tests are run in a process forked from this one, so changes
+        they make (and crashes) do not affect the rest of the run.
+        Hooks still run in this process. This does nothing on
+        platforms without ``fork``.
+
+        Keyword Args:
+            isolate (bool): Whether tests should be isolated.
+        """
+
+        self._isolate = isolate
+
+    def workers(self, addresses, paths, recursive=False):
+        """Run the top level suites on remote workers.
+
+        Workers are started with ``ccino worker --listen HOST:PORT``
+        and load the tests themselves, so they need the same files at
+        the same location as this process.
+
+        Args:
+            addresses (List[str]): ``'HOST:PORT'`` addresses of the
+                workers. An empty list runs everything here again.
+            paths (List[str]): The files and directories the tests
+                were loaded from.
+
+        Keyword Args:
+            recursive (bool): Whether subdirectories were loaded.
+        """
+
+        if addresses:
+            self._workers = (list(addresses), list(paths), recursive)
+        else:
+            self._workers = None
+
+    def shard(self, index, count, durations=None):
+        """Only run one of several shards of the tests.
+
+        The shards are picked by test id, so runs of every shard
+        (with the same tests and durations) run every test exactly
+        once. Durations in the cache are not used since each shard
+        can see a different cache.
+
+        Args:
+            index (int): The shard to run, from 1 to count.
+            count (int): The number of shards.
+
+        Keyword Args:
+            durations (:obj:`dict` or str or :obj:`None`): Durations in
+                seconds by runnable id, or the path of a JSON file with
+                them (like ``durations.json`` in the cache), to balance
+                the shards with. Every shard has to get the same
+                durations. None splits the tests into runs of about as
+                many tests.
+
+        Raises:
+            ValueError: If index is not between 1 and count or the
+                durations file is not valid JSON.
+            IOError: If the durations file cannot be read.
+        """
+
+        if not 1 <= index <= count:
+            raise ValueError('shard must be between 1 and {:d}'
+                    .format(count))
+
+        if durations is not None and not isinstance(durations, dict):
+            with open(durations, 'r') as durations_file:
+                durations = json.load(durations_file)
+
+        self._shard = (index, count)
+        self._shard_durations = durations
+
+    def grep(self, pattern):
+        """Only run the tests whose id matches a regular expression.
+
+        Ids are the names of the suites around a test and the test
+        joined with ``'::'``. The pattern can match anywhere in them.
+
+        Args:
+            pattern (:obj:`str` or :obj:`None`): The regular
+                expression. None runs every test.
+
+        Raises:
+            re.error: If pattern is not a valid regular expression.
+        """
+
+        if pattern is not None:
+            re.compile(pattern)
+
+        self._grep = pattern
+
+    def tags(self, expression):
+        """Only run the tests whose tags match an expression.
+
+        Expressions are made of tag names, ``and``, ``or``, ``not``
+        and parentheses, such as ``'db and not (slow or flaky)'``.
+
+        Args:
+            expression (:obj:`str` or :obj:`None`): The expression.
+                None runs every test.
+
+        Raises:
+            ValueError: If the expression is not valid.
+        """
+
+        if expression is not None:
+            self._tags = parse_tags(expression)
+        else:
+            self._tags = None
+
+    def ids(self, ids):
+        """Only run the tests with some ids or inside suites with them.
+
+        The id of a parametrized test can end with a range of its
+        cases, like ``'suite::test[10:20]'`` or ``'suite::test[42]'``.
+
+        Args:
+            ids (:obj:`List[str]` or :obj:`None`): The ids of tests and
+                suites, like ``'suite::test'``. None runs every test.
+        """
+
+        self._ids = list(ids) if ids is not None else None
+
+    def last_failed(self, last_failed=True):
+        """Specify if only the tests that failed last time should run.
+
+        Failures are kept in the cache. Tests in a suite whose hook
+        failed are run as well, and suite hooks run where they are
+        needed. Every test runs if none failed.
+
+        Keyword Args:
+            last_failed (bool): Whether only failed tests should run.
+        """
+
+        self._last_failed = last_failed
+
+    def failed_first(self, failed_first=True):
+        """Specify if the tests that failed last time should run
+        before the others.
+
+        Suites with failed tests inside are moved ahead of the other
+        suites as well.
+
+        Keyword Args:
+            failed_first (bool): Whether failed tests should run
+                first.
+        """
+
+        self._failed_first = failed_first
+
+    def record_coverage(self, recorder):
+        """Record the lines each test and hook runs for ``affected``.
+
+        The map of lines is saved to the cache after each run. Tests
+        are run one at a time in this process while recording, since
+        lines run elsewhere or at the same time cannot be told apart.
+
+        Args:
+            recorder (:obj:`ccino.affected.CoverageRecorder` or
+                :obj:`None`): The recorder, started before the tests
+                were loaded. None stops recording.
+        """
+
+        self._coverage = recorder
+
+    def affected(self, affected=True):
+        """Specify if only the tests affected by changes should run.
+
+        Changes are found by comparing the files against the map saved
+        by ``record_coverage``. Every test runs if there is no map.
+
+        Keyword Args:
+            affected (bool): Whether only affected tests should run.
+        """
+
+        self._affected = affected
+
+    def time_budget(self, seconds):
+        """Only run the tests most likely to fail that fit in a time
+        budget.
+
+        Durations and failure rates of earlier runs are kept in the
+        cache. The time the suite hooks around a test take counts
+        towards the budget as well. Tests that do not fit are reported
+        as pending and every test runs if no durations were recorded.
+
+        Args:
+            seconds (:obj:`float` or :obj:`None`): The time budget.
+                None runs every test.
+        """
+
+        self._time_budget = seconds
+
+    def fixture_cache(self, fixture_cache):
+        """Specify where to keep values of fixtures added with
+        ``persist``.
+
+        The directory can be shared by processes running at the same
+        time. The values used least recently are removed when it grows
+        too large.
+
+        Args:
+            fixture_cache (:obj:`ccino.persist.FixtureCache` or str or
+                :obj:`None`): The fixture cache or the path of its
+                directory. None builds the values every run.
+        """
+
+        if fixture_cache is not None and \
+                not isinstance(fixture_cache, FixtureCache):
+            fixture_cache = FixtureCache(fixture_cache)
+
+        self._fixture_cache = fixture_cache
+
+    def journal(self, journal, resume=False):
+        """Append the result of each test that finishes to a journal.
+
+        A run that was interrupted can be resumed from its journal.
+        Tests that finished are reported with their results from the
+        journal instead of running again, and only the hooks needed by
+        the tests that are left run.
+
+        Args:
+            journal (:obj:`ccino.journal.Journal` or str or
+                :obj:`None`): The journal or the path of its file. None
+                does not keep a journal.
+
+        Keyword Args:
+            resume (bool): Whether to resume from the results already
+                in the journal instead of starting it over.
+        """
+
+        if journal is not None and not isinstance(journal, Journal):
+            journal = Journal(journal)
+
+        self._journal = journal
+        self._resume = resume
+
+    def cache(self, cache):
+        """Specify where to keep results between runs.
+
+        Test and suite durations are saved after each run and used to
+        balance later parallel runs. The ids of failing tests and hooks
+        are saved as well for ``last_failed`` and ``failed_first``.
+
+        Args:
+            cache (:obj:`ccino.cache.Cache` or str or :obj:`None`):
+                The cache or the path of its directory. None disables
+                the cache.
+        """
+
+        if cache is not None and not isinstance(cache, Cache):
+            cache = Cache(cache)
+
+        self._cache = cache
+
+    def results(self, results):
+        """Specify where to keep the results of test files that passed.
+
+        Tests of a file that passed before, with the same contents of
+        the file and the local modules it imports, are reported as
+        passed without running. The directory can be shared between
+        machines.
+
+        Args:
+            results (:obj:`ccino.results.ResultCache` or str or
+                :obj:`None`): The result cache or the path of its
+                directory. None runs every test.
+        """
+
+        if results is not None and not isinstance(results, ResultCache):
+            results = ResultCache(results)
+
+        self._results = results
+
+    def plan(self):
+        """Pick the tests a run would pick, without running anything.
+
+        This works on tests collected with ``ccino.collect`` as well,
+        since their functions are not needed.
+
+        Returns:
+            List[:obj:`ccino.fixtures.Test`]: The picked tests in the
+            order they would run.
+        """
+
+        resolve_dependencies(self._root)
+
+        selected = self._select()
+
+        if selected is not None:
+            select(self._root, selected)
+
+        if self._failed_first and self._cache is not None and \
+                self._workers is None:
+            self._move_failed_first()
+            order_dependencies(self._root)
+
+        return get_tests(self._root)
+
+    def reset(self):
+        """Remove every fixture so tests can be loaded again.
+
+        Options are kept. Functions that were already added cannot be
+        added again, but loading their modules again makes new ones.
+        """
+
+        self._root = RootSuite()
+        self._current_suite = self._root
+
+    @property
+    def root(self):
+        """:obj:`ccino.fixtures.root.RootSuite`: The root suite that
+        fixtures are added to.
+        """
+
+        return self._root
+
+    def _select(self):
+        """Pick the tests to run.
+
+        Returns:
+            :obj:`list` or :obj:`None`: Indexes of the picked tests in
+            the list from ``ccino.selection.get_tests``, or None if
+            every test runs.
+        """
+
+        self._limited = False
+
+        use_failures = self._last_failed and self._cache is not None
+        use_filters = self._grep is not None or self._tags is not None or \
+                self._ids is not None
+        coverage_map = None
+
+        if self._affected and self._cache is not None:
+            coverage_map = self._cache.get('coverage_map')
+
+        if not use_failures and not use_filters and coverage_map is None \
+                and self._shard is None:
+            return None
+
+        tests = get_tests(self._root)
+        selected = None
+
+        if use_filters:
+            selected = self._filter(tests)
+
+        if use_failures:
+            failures = self._cache.get('failures', {})
+
+            picked = last_failed(self._root, tests, failures)
+
+            if picked and selected is not None:
+                picked = sorted(set(picked).intersection(selected))
+
+            selected = picked or selected
+
+        if coverage_map is not None:
+            picked = affected(self._root, tests, coverage_map)
+
+            if selected is not None:
+                picked = sorted(set(picked).intersection(selected))
+
+            selected = picked
+
+        if self._shard is not None:
+            index, count = self._shard
+
+            if selected is None:
+                selected = list(range(len(tests)))
+
+            counts = dict((i, tests[i].count_cases()) for i in selected)
+
+            # The cases of files are split between the shards instead
+            # of one shard running them all.
+            tables = [i for i in selected if counts[i] is not None and
+                    shard_cases(tests[i], counts[i], index, count)]
+            rest = [i for i in selected if counts[i] is None]
+
+            self._limited = self._limited or bool(tables)
+
+            picked = shard([tests[i] for i in rest], index, count,
+                    self._shard_durations)
+
+            selected = sorted([rest[i] for i in picked] + tables)
+
+        return selected
+
+    def _filter(self, tests):
+        """Pick the tests matching the grep pattern, tags and ids.
+
+        Returns:
+            List[int]: Indexes of the picked tests in ``tests``.
+        """
+
+        picked = range(len(tests))
+
+        if self._grep is not None:
+            picked = grep(tests, self._grep)
+
+        if self._tags is not None:
+            matching = set(match_tags(tests, self._tags))
+            picked = [i for i in picked if i in matching]
+
+        if self._ids is not None:
+            trie = IdTrie(tests)
+            found = set()
+
+            for runnable_id in self._ids:
+                indexes = trie.find(runnable_id)
+
+                if not indexes:
+                    indexes = self._find_cases(tests, trie, runnable_id)
+
+                found.update(indexes)
+
+            picked = [i for i in picked if i in found]
+
+        return list(picked)
+
+    def _find_cases(self, tests, trie, runnable_id):
+        """Find a parametrized test by an id ending with a range of its
+        cases, and limit it to the range.
+
+        Returns:
+            List[int]: The index of the test in ``tests``, or nothing.
+        """
+
+        runnable_id, case_range = split_case_range(runnable_id)
+
+        if case_range is None:
+            return []
+
+        indexes = [i for i in trie.find(runnable_id)
+                if tests[i].id == runnable_id and tests[i].params is not None]
+
+        for i in indexes:
+            tests[i].limit_cases(*case_range)
+            self._limited = True
+
+        return indexes
+
+    def _move_failed_first(self):
+        """Move the tests that failed last time ahead of the others."""
+
+        tests = get_tests(self._root)
+        failures = self._cache.get('failures', {})
+
+        first = set(tests[i]
+                for i in last_failed(self._root, tests, failures))
+
+        if first:
+            self._root.reorder(lambda test: test in first)
+
+    def _apply_time_budget(self, durations):
+        """Skip the tests that do not fit in the time budget.
+
+        Returns:
+            List[int]: Indexes of the skipped tests in the list from
+            ``ccino.selection.get_tests``.
+        """
+
+        tests = get_tests(self._root)
+
+        # Cached tests take no time.
+        candidates = [i for i, test in enumerate(tests) if not test.cached]
+
+        picked = time_budget([tests[i] for i in candidates],
+                self._time_budget, durations, self._cache.get('history', {}))
+
+        if picked is None:
+            return []
+
+        picked = set(candidates[i] for i in picked)
+        left_out = [i for i in candidates if i not in picked]
+
+        leave_out(self._root, left_out)
+
+        return left_out
+
+    def _record_failures(self, reporter):
+        """Save the failures of this run to the cache."""
+
+        failures = record_failures(self._root,
+                self._cache.get('failures', {}), reporter.errors)
+
+        self._cache.set('failures', failures)
+
+        history = record_history(self._root, self._cache.get('history', {}),
+                reporter.errors)
+
+        self._cache.set('history', history)
+
+    def _record_durations(self):
+        """Save the durations of this run to the cache."""
+
+        durations = self._cache.get('durations', {})
+
+        for runnable in self._root.walk():
+            if runnable.duration is not None and runnable is not self._root:
+                durations[runnable.id] = runnable.duration
+
+        self._cache.set('durations', durations)
+
+    def _resume_journal(self, reporter):
+        """Mark the tests that finished in the journal and open it for
+        the results of this run.
+
+        Returns:
+            List[Tuple[int, tuple]]: The finished tests, from
+            ``ccino.journal.find_done``.
+        """
+
+        done = []
+
+        if self._resume:
+            done = find_done(get_tests(self._root), self._journal.read())
+
+            mark_done(self._root, done)
+
+            if done:
+                reporter.notes.append('{:d} tests resumed from {}'.format(
+                        len(done), self._journal.path))
+
+        self._journal.open(append=self._resume)
+
+        reporter.journal(self._journal)
+
+        return done
+
+    def _dispatch(self, reporter, options, durations, selected, cached,
+            left_out, resumed, case_ranges):
+        """Run the root suite here, in worker processes, or on
+        remote workers.
+        """
+
+        if self._coverage is not None:
+            self._root.run(reporter, options)
+        elif self._workers is not None:
+            addresses, paths, recursive = self._workers
+
+            cached_cases = []
+
+            if cached:
+                cached_cases = get_cached_cases(self._root)
+
+            run_distributed(self._root, reporter, options, addresses,
+                    paths, recursive, durations, selected, cached, left_out,
+                    resumed, case_ranges, cached_cases)
+        elif self._jobs > 1 and can_fork():
+            run_parallel(self._root, reporter, options, self._jobs,
+                    durations)
+        else:
+            self._root.run(reporter, options)
+
     def run_tests(self):
         """Run the root suite.
 
         Returns:
             bool: If there were any failures.
+
+        Raises:
+            :obj:`ccino.exceptions.CcinoException`: If a dependency of
+                a test is unknown or the dependencies form a cycle, or
+                if the same goes for the providers of arguments.
         """
 
+        # Finding prerequisites walks the whole tree, so it is only
+        # done when depends_on was used.
+        if self._has_dependencies:
+            resolve_dependencies(self._root)
+
+        # Providers are found before running so mistakes show up
+        # before anything runs.
+        providers = None
+
+        if self._has_providers and resolve_providers(self._root):
+            providers = ProviderCache(self._root, self._fixture_cache)
+
         reporter = get_reporter(self._reporter)
 
         reporter.output(self._output)
@@ -286,16 +1168,103 @@ class Runner(object):
         t = Timer()
         t.start()
 
+        options = dict(
+            bail=self._bail,
+            bail_on_hook_failure=self._bail_on_hook_failure,
+            # Lines run in other processes are not recorded.
+            isolate=self._isolate and self._coverage is None,
+            loop=EventLoop(),
+            coverage=self._coverage,
+            providers=providers
+        )
+
         try:
             with redirect_print(self._stdout):
-                self._root.run(reporter, dict(
-                    bail=self._bail
-                ))
+                durations = {}
+
+                if self._cache is not None:
+                    durations = self._cache.get('durations', {})
+
+                selected = self._select()
+
+                # Nothing runs (not even root hooks) if no tests were
+                # picked.
+                if selected is None or select(self._root, selected):
+                    # Remote workers load the tests in the original
+                    # order, so suites can only be moved locally.
+                    if self._failed_first and self._cache is not None \
+                            and self._workers is None:
+                        self._move_failed_first()
+
+                        if self._has_dependencies:
+                            order_dependencies(self._root)
+
+                    case_ranges = []
+
+                    if self._limited:
+                        case_ranges = get_case_ranges(self._root)
+
+                    cached = []
+
+                    # Recorded coverage needs every test to run.
+                    if self._results is not None and self._coverage is None:
+                        result_options = {'isolate': self._isolate}
+
+                        if case_ranges:
+                            result_options['cases'] = case_ranges
+
+                        cached = self._results.apply(self._root,
+                                result_options)
+
+                        reporter.results(self._results)
+
+                    resumed = []
+
+                    if self._journal is not None:
+                        resumed = self._resume_journal(reporter)
+
+                    left_out = []
+
+                    if self._time_budget is not None and \
+                            self._cache is not None:
+                        left_out = self._apply_time_budget(durations)
+
+                        if left_out:
+                            reporter.notes.append(
+                                '{:d} of {:d} tests left out by the {} time '
+                                'budget'.format(len(left_out),
+                                    len(get_tests(self._root)),
+                                    format_seconds_short(self._time_budget))
+                            )
+
+                    try:
+                        self._dispatch(reporter, options, durations,
+                                selected, cached, left_out, resumed,
+                                case_ranges)
+                    finally:
+                        if providers is not None:
+                            providers.close(reporter)
 
         except CcinoBail as e: pass
 
+        finally:
+            options['loop'].close()
+
+            if self._journal is not None:
+                self._journal.close()
+
         t.stop()
 
+        if self._results is not None and self._coverage is None:
+            self._results.record(self._root, reporter.errors)
+
+        if self._cache is not None:
+            self._record_durations()
+            self._record_failures(reporter)
+
+            if self._coverage is not None:
+                self._cache.set('coverage_map', self._coverage.get_map())
+
         reporter.base_end(t.get_time())
 
         return reporter.num_failures == 0
@@ -322,6 +1291,14 @@ EXPORTED_RUNNER_METHODS = [
     'before_each',
     'after_each',
     'skip',
+    'tag',
+    'depends_on',
+    'fixture',
+    'params',
+    'batch',
+    'cases_from',
+    'concurrent',
+    'gather',
     'raises',
     'returns'
 ]
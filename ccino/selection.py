@@ -0,0 +1,625 @@
+"""Pick which tests of a collected tree are run."""
+
+from __future__ import absolute_import, division
+
+import heapq
+import re
+
+from .fixtures import Case, Hook, Suite, Test
+
+
+# Failure rate assumed for tests without history, so new tests are
+# picked early.
+NEW_TEST_RATE = 0.5
+
+# How much the latest run counts in the failure rate of a test.
+RATE_WEIGHT = 0.3
+
+# Value of tests that have not failed for a long time, so the rest of
+# a budget is still filled with tests.
+MIN_VALUE = 0.01
+
+# Ids of parametrized tests with a range of their cases, like
+# 'suite::test[10:20]' or 'suite::test[42]'.
+CASE_RANGE_PATTERN = re.compile(r'^(.*)\[(\d*)(:?)(\d*)\]$')
+
+
+def get_tests(root):
+    """Get every test under a root suite.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+
+    Returns:
+        List[:obj:`ccino.fixtures.Test`]: The tests in the order they
+        were added.
+    """
+
+    return [runnable for runnable in root.walk()
+            if isinstance(runnable, Test)]
+
+
+def select(root, indexes):
+    """Remove every test that was not selected from a root suite.
+
+    Suites left without tests are removed as well, so their hooks only
+    run where some of their tests do.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+        indexes (Iterable[int]): Indexes of the tests to keep in the
+            list from ``get_tests``.
+
+    Returns:
+        int: The number of tests left.
+    """
+
+    tests = get_tests(root)
+    selected = set(tests[i] for i in indexes)
+
+    return root.prune(lambda test: test in selected)
+
+
+def grep(tests, pattern):
+    """Pick the tests whose id matches a regular expression.
+
+    The pattern is searched for anywhere in the id, which has the names
+    of the suites around the test and the test joined with ``'::'``.
+
+    Args:
+        tests (List[:obj:`ccino.fixtures.Test`]): The tests.
+        pattern (str or :obj:`re.RegexObject`): The regular expression.
+
+    Returns:
+        List[int]: Indexes of the picked tests in ``tests``, in order.
+
+    Raises:
+        re.error: If pattern is not a valid regular expression.
+    """
+
+    search = re.compile(pattern).search
+
+    return [i for i, test in enumerate(tests) if search(test.id)]
+
+
+def split_case_range(runnable_id):
+    """Split a range of cases off the id of a parametrized test.
+
+    ``'test[42]'`` is the case at position 42 and ``'test[10:20]'`` the
+    cases from 10 up to 20, where either end can be left out.
+
+    Args:
+        runnable_id (str): The id.
+
+    Returns:
+        tuple: The id without the range, and the positions of the first
+        case and the one after the last (None for the end), or None if
+        the id has no range.
+    """
+
+    match = CASE_RANGE_PATTERN.match(runnable_id)
+
+    if match is None:
+        return runnable_id, None
+
+    runnable_id, start, colon, stop = match.groups()
+
+    if not colon:
+        if not start:
+            return match.group(0), None
+
+        return runnable_id, (int(start), int(start) + 1)
+
+    return runnable_id, (int(start or 0), int(stop) if stop else None)
+
+
+def shard_cases(test, count_cases, index, count):
+    """Limit a test taking its cases from a file to the share of its
+    cases for one shard.
+
+    Args:
+        test (:obj:`ccino.fixtures.Test`): The test.
+        count_cases (int): The number of cases in the file.
+        index (int): The shard, from 1 to count.
+        count (int): The number of shards.
+
+    Returns:
+        bool: Whether the shard has any of the cases.
+    """
+
+    start, stop = test.case_range or (0, None)
+    stop = count_cases if stop is None else min(stop, count_cases)
+    size = max(stop - start, 0)
+
+    first = start + size * (index - 1) // count
+    last = start + size * index // count
+
+    test.limit_cases(first, last)
+
+    return last > first
+
+
+def get_case_ranges(root):
+    """Get the ranges of cases parametrized tests are limited to.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+
+    Returns:
+        List[Tuple[int, int, int]]: Indexes of the limited tests in the
+        list from ``get_tests``, with the positions of their first case
+        and the one after the last (None for the end).
+    """
+
+    return [(i,) + test.case_range for i, test in enumerate(get_tests(root))
+            if test.case_range is not None]
+
+
+def limit_cases(root, ranges):
+    """Limit parametrized tests to ranges of their cases.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+        ranges (List[Tuple[int, int, int]]): Ranges from
+            ``get_case_ranges``.
+    """
+
+    tests = get_tests(root)
+
+    for index, start, stop in ranges:
+        tests[index].limit_cases(start, stop)
+
+
+def match_tags(tests, match):
+    """Pick the tests whose tags match an expression.
+
+    Args:
+        tests (List[:obj:`ccino.fixtures.Test`]): The tests.
+        match (Callable): Called with the tags of each test, like the
+            result of ``ccino.tags.parse_tags``.
+
+    Returns:
+        List[int]: Indexes of the picked tests in ``tests``, in order.
+    """
+
+    return [i for i, test in enumerate(tests) if match(test.tags)]
+
+
+class IdTrie(object):
+    """Prefix tree of the paths of tests.
+
+    Each node is a suite or test name, so a suite id finds every test
+    inside it and lookups only walk the names of the id.
+    """
+
+    def __init__(self, tests):
+        """Create a new IdTrie.
+
+        Args:
+            tests (List[:obj:`ccino.fixtures.Test`]): The tests.
+        """
+
+        # Nodes are [children by name, indexes of tests ending there].
+        self._root = [{}, []]
+
+        for i, test in enumerate(tests):
+            node = self._root
+
+            for name in test.path:
+                children = node[0]
+
+                if name not in children:
+                    children[name] = [{}, []]
+
+                node = children[name]
+
+            node[1].append(i)
+
+    def find(self, runnable_id):
+        """Find the tests with an id or inside a suite with an id.
+
+        Args:
+            runnable_id (str): The id of a test or suite.
+
+        Returns:
+            List[int]: Indexes of the found tests, in order.
+        """
+
+        node = self._root
+
+        for name in runnable_id.split('::'):
+            node = node[0].get(name)
+
+            if node is None:
+                return []
+
+        found = []
+        stack = [node]
+
+        while stack:
+            children, indexes = stack.pop()
+
+            found.extend(indexes)
+            stack.extend(children.values())
+
+        return sorted(found)
+
+
+def last_failed(root, tests, failures):
+    """Pick the tests that failed in an earlier run.
+
+    Tests in a suite with a failing hook are picked as well, since the
+    hook stopped them from running.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+        tests (List[:obj:`ccino.fixtures.Test`]): The tests.
+        failures (dict): Ids of the failing tests and hooks under
+            ``'tests'`` and ``'hooks'``.
+
+    Returns:
+        List[int]: Indexes of the picked tests in ``tests``, in order.
+    """
+
+    failed_tests = set(failures.get('tests', ()))
+    failed_hooks = set(failures.get('hooks', ()))
+
+    blocked = set()
+
+    if failed_hooks:
+        for runnable in root.walk():
+            if isinstance(runnable, Hook) and runnable.id in failed_hooks:
+                blocked.add(runnable.parent)
+
+    picked = []
+
+    for i, test in enumerate(tests):
+        if test.id in failed_tests:
+            picked.append(i)
+            continue
+
+        suite = test.parent
+
+        while suite is not None and suite not in blocked:
+            suite = suite.parent
+
+        if suite is not None:
+            picked.append(i)
+
+    return picked
+
+
+def record_failures(root, failures, errors):
+    """Update the failures of earlier runs with the results of a run.
+
+    Tests that ran are taken out and so are failing hooks of suites
+    where a test ran, then the failures of the run are added.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite
+            that was run.
+        failures (dict): Ids of the failing tests and hooks under
+            ``'tests'`` and ``'hooks'``.
+        errors (list): ``(runnable, error)`` pairs of the failures of
+            the run, like ``BaseReporter.errors``.
+
+    Returns:
+        dict: The updated failures.
+    """
+
+    failed_tests = set(failures.get('tests', ()))
+    failed_hooks = set(failures.get('hooks', ()))
+
+    ran = set()
+
+    for test in get_tests(root):
+        if test.duration is None:
+            continue
+
+        failed_tests.discard(test.id)
+
+        suite = test.parent
+
+        while suite is not None and suite not in ran:
+            ran.add(suite)
+            suite = suite.parent
+
+    for runnable in root.walk():
+        if isinstance(runnable, Hook) and runnable.parent in ran:
+            failed_hooks.discard(runnable.id)
+
+    for runnable, _ in errors:
+        if isinstance(runnable, Hook):
+            failed_hooks.add(runnable.id)
+        elif isinstance(runnable, Case):
+            failed_tests.add(runnable.test.id)
+        else:
+            failed_tests.add(runnable.id)
+
+    return {'tests': sorted(failed_tests), 'hooks': sorted(failed_hooks)}
+
+
+def shard(tests, index, count, durations=None):
+    """Pick the tests of one shard.
+
+    Every shard picks from the same order (by test id) so the shards
+    together pick every test exactly once, as long as they see the
+    same tests and durations.
+
+    Without durations, each shard gets a run of about as many tests in
+    that order, which keeps the tests of a suite together. With
+    durations, the longest remaining test goes to the shard with the
+    least time so far (the longest processing time rule) so the shards
+    finish at about the same time. Tests without a recorded duration
+    are assumed to take the average duration.
+
+    Args:
+        tests (List[:obj:`ccino.fixtures.Test`]): The tests.
+        index (int): The shard to pick, from 1 to count.
+        count (int): The number of shards.
+
+    Keyword Args:
+        durations (dict): Previous durations in seconds by runnable
+            id.
+
+    Returns:
+        List[int]: Indexes of the picked tests in ``tests``, in order.
+
+    Raises:
+        ValueError: If index is not between 1 and count.
+    """
+
+    if not 1 <= index <= count:
+        raise ValueError('shard must be between 1 and {:d}'.format(count))
+
+    # The index breaks ties between tests with the same id.
+    order = sorted(range(len(tests)), key=lambda i: (tests[i].id, i))
+
+    known = [durations[test.id] for test in tests
+            if durations and test.id in durations]
+
+    if not known:
+        start = (index - 1) * len(order) // count
+        end = index * len(order) // count
+
+        return sorted(order[start:end])
+
+    average = sum(known) / len(known)
+
+    estimates = [durations.get(test.id, average) for test in tests]
+    loads = [0] * count
+    picked = []
+
+    # sorted is stable, so equal estimates keep the id order.
+    for i in sorted(order, key=lambda i: -estimates[i]):
+        least = loads.index(min(loads))
+        loads[least] += estimates[i]
+
+        if least == index - 1:
+            picked.append(i)
+
+    return sorted(picked)
+
+
+def record_history(root, history, errors):
+    """Update the failure rates of earlier runs with the results of a
+    run.
+
+    The rate of a test is a moving average of whether it failed, so
+    recent runs count the most. Tests that did not run keep their
+    rate.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite
+            that was run.
+        history (dict): Failure rates from 0 to 1 by test id.
+        errors (list): ``(runnable, error)`` pairs of the failures of
+            the run, like ``BaseReporter.errors``.
+
+    Returns:
+        dict: The updated failure rates.
+    """
+
+    history = dict(history)
+    failed = set(runnable.test if isinstance(runnable, Case) else runnable
+            for runnable, _ in errors)
+
+    for test in get_tests(root):
+        if test.duration is None:
+            continue
+
+        rate = history.get(test.id, NEW_TEST_RATE)
+        outcome = 1 if test in failed else 0
+
+        history[test.id] = rate + RATE_WEIGHT * (outcome - rate)
+
+    return history
+
+
+def _get_costs(tests, durations):
+    """Get the cost of each test and the shared cost of each suite.
+
+    Returns:
+        :obj:`tuple` or :obj:`None`: The estimated seconds of each
+        test with its setup and teardown hooks, and of the suite setup
+        and teardown hooks of each suite, or None if no test has a
+        recorded duration.
+    """
+
+    known = [durations[test.id] for test in tests if test.id in durations]
+
+    if not known:
+        return None
+
+    average = sum(known) / len(known)
+
+    hook_costs = {}
+    suite_costs = {}
+    costs = []
+
+    for test in tests:
+        cost = durations.get(test.id, average)
+        suite = test.parent
+
+        while suite is not None:
+            if suite not in hook_costs:
+                hook_costs[suite] = sum(durations.get(hook.id, 0)
+                        for hook in suite._setups + suite._teardowns)
+                suite_costs[suite] = sum(durations.get(hook.id, 0)
+                        for hook in suite._suite_setups +
+                        suite._suite_teardowns)
+
+            cost += hook_costs[suite]
+            suite = suite.parent
+
+        costs.append(cost)
+
+    return costs, suite_costs
+
+
+def time_budget(tests, seconds, durations, history=None):
+    """Pick the tests that find the most failures in a time budget.
+
+    This is a knapsack where the value of a test is its failure rate
+    and the cost is its duration with the setup and teardown hooks
+    around it. The suite setup and teardown hooks of a suite are paid
+    once, by the first test picked inside it. Tests are picked
+    greedily by value per second of what they add to the cost, which
+    goes down for the other tests of a suite once its hooks are paid.
+
+    Tests without a recorded duration are assumed to take the average
+    duration and tests without history to fail half of the time.
+
+    Args:
+        tests (List[:obj:`ccino.fixtures.Test`]): The tests.
+        seconds (float): The time budget.
+        durations (dict): Previous durations in seconds by runnable
+            id.
+
+    Keyword Args:
+        history (dict): Failure rates from 0 to 1 by test id, from
+            ``record_history``.
+
+    Returns:
+        :obj:`list` or :obj:`None`: Indexes of the picked tests in
+        ``tests`` in order, or None if no test has a recorded
+        duration.
+    """
+
+    estimates = _get_costs(tests, durations or {})
+
+    if estimates is None:
+        return None
+
+    costs, suite_costs = estimates
+    history = history or {}
+
+    values = [max(history.get(test.id, NEW_TEST_RATE), MIN_VALUE)
+            for test in tests]
+
+    members = {}
+
+    for i, test in enumerate(tests):
+        suite = test.parent
+
+        while suite is not None:
+            members.setdefault(suite, []).append(i)
+            suite = suite.parent
+
+    paid = set()
+
+    def get_cost(i):
+        cost = costs[i]
+        suite = tests[i].parent
+
+        while suite is not None and suite not in paid:
+            cost += suite_costs[suite]
+            suite = suite.parent
+
+        return cost
+
+    def get_density(i):
+        cost = get_cost(i)
+
+        return values[i] / cost if cost > 0 else float('inf')
+
+    # Densities only go up as suites are paid, so each test is pushed
+    # again when a suite around it is and older entries are stale.
+    densities = [get_density(i) for i in range(len(tests))]
+    heap = [(-densities[i], i) for i in range(len(tests))]
+    heapq.heapify(heap)
+
+    left = seconds
+    picked = []
+
+    while heap:
+        density, i = heapq.heappop(heap)
+
+        if densities[i] is None or -density != densities[i]:
+            continue
+
+        densities[i] = None
+        cost = get_cost(i)
+
+        if cost > left:
+            continue
+
+        left -= cost
+        picked.append(i)
+
+        suite = tests[i].parent
+
+        while suite is not None and suite not in paid:
+            paid.add(suite)
+
+            for j in members[suite]:
+                if densities[j] is not None:
+                    densities[j] = get_density(j)
+                    heapq.heappush(heap, (-densities[j], j))
+
+            suite = suite.parent
+
+    return sorted(picked)
+
+
+def leave_out(root, indexes):
+    """Skip tests that were left out of a run, so they are reported as
+    pending.
+
+    Suites where every test was left out are skipped as well, so
+    their hooks do not run.
+
+    Args:
+        root (:obj:`ccino.fixtures.root.RootSuite`): The root suite.
+        indexes (Iterable[int]): Indexes of the tests to skip in the
+            list from ``get_tests``.
+    """
+
+    tests = get_tests(root)
+    skipped = set(tests[i] for i in indexes)
+
+    if skipped:
+        _leave_out(root, skipped)
+
+
+def _leave_out(suite, skipped):
+    """Skip tests inside a suite and the suite itself if none are left.
+
+    Returns:
+        bool: Whether any test inside the suite still runs.
+    """
+
+    runs = False
+
+    for test in suite.tests:
+        if isinstance(test, Suite):
+            runs = _leave_out(test, skipped) or runs
+        elif test in skipped:
+            test.skip()
+        else:
+            runs = True
+
+    if not runs:
+        suite.skip()
+
+    return runs
@@ -0,0 +1,238 @@
+"""Keep a warm process around to run tests from without imports."""
+
+from __future__ import absolute_import
+
+import errno
+import importlib
+import os
+import socket
+import sys
+import traceback
+
+from .cache import DEFAULT_CACHE_DIR
+from .distributed import Channel, _reap_sessions
+from .exceptions import CcinoException
+from .util import make_dirs
+
+
+DEFAULT_SOCKET = os.path.join(DEFAULT_CACHE_DIR, 'serve.sock')
+
+
+class _ChannelStream(object):
+    """Stream that sends written text to a client."""
+
+    encoding = 'utf-8'
+
+    def __init__(self, channel, kind):
+        self._channel = channel
+        self._kind = kind
+
+    def write(self, string):
+        if isinstance(string, bytes):
+            string = string.decode(self.encoding, 'replace')
+
+        if string:
+            self._channel.send((self._kind, string))
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+def _bind(path):
+    """Listen on a Unix socket, replacing a stale socket file.
+
+    Raises:
+        :obj:`ccino.exceptions.CcinoException`: If a server is already
+            listening on the path.
+    """
+
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            probe.connect(path)
+        except (IOError, OSError):
+            os.unlink(path)
+        else:
+            raise CcinoException('Already serving on {}'.format(path))
+        finally:
+            probe.close()
+
+    directory = os.path.dirname(path)
+
+    if directory:
+        make_dirs(directory)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(16)
+
+    return server
+
+
+def serve(path=DEFAULT_SOCKET, preload=()):
+    """Run tests for clients that connect, until interrupted.
+
+    The modules in preload are imported once here. Every client gets a
+    process forked from this one, so those imports are already done.
+
+    Args:
+        path (str): The Unix socket to listen on.
+        preload (List[str]): Names of modules to import up front.
+    """
+
+    for name in preload:
+        importlib.import_module(name)
+
+    path = os.path.abspath(path)
+    server = _bind(path)
+
+    sys.stderr.write('ccino serving on {}\n'.format(path))
+    sys.stderr.flush()
+
+    try:
+        while True:
+            try:
+                conn = server.accept()[0]
+            except (IOError, OSError) as e:
+                if e.errno == errno.EINTR:
+                    continue
+
+                raise
+
+            _reap_sessions()
+
+            if os.fork() == 0:
+                server.close()
+
+                try:
+                    _serve_client(conn)
+                finally:
+                    os._exit(0)
+
+            conn.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def _serve_client(sock):
+    """Run the command line interface for a client.
+
+    The client sends its arguments, working directory, environment, and
+    whether its stdout is a terminal. Written text is sent back as
+    ``('stdout', text)`` and ``('stderr', text)`` messages, followed by
+    ``('exit', code)``.
+    """
+
+    from . import main_runner
+    from .cli import run
+
+    channel = Channel(sock)
+
+    try:
+        request = channel.recv()
+    except EOFError:
+        return
+
+    os.chdir(request['cwd'])
+    os.environ.clear()
+    os.environ.update(request['env'])
+
+    sys.path.insert(0, request['cwd'])
+    sys.argv = [request['prog']] + request['args']
+
+    sys.stdout = _ChannelStream(channel, 'stdout')
+    sys.stderr = _ChannelStream(channel, 'stderr')
+
+    # The runner was made before the streams were replaced.
+    main_runner.output(sys.stdout)
+    main_runner.stdout(sys.stdout)
+
+    # The client's terminal decides the color unless it is set.
+    if request['tty']:
+        main_runner.color(True)
+
+    code = 0
+
+    try:
+        run(request['args'], prog_name=request['prog'])
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            code = e.code
+        elif e.code is not None:
+            sys.stderr.write('{}\n'.format(e.code))
+            code = 1
+    except Exception:
+        traceback.print_exc()
+        code = 1
+
+    try:
+        channel.send(('exit', code))
+    finally:
+        channel.close()
+
+
+def connect(path, args, prog):
+    """Run tests in a ``ccino serve`` process.
+
+    Text the tests write is written here as it arrives.
+
+    Args:
+        path (str): The Unix socket the server listens on.
+        args (List[str]): The command line arguments to run with.
+        prog (str): The program name to show in messages.
+
+    Returns:
+        int: The exit code of the run.
+
+    Raises:
+        :obj:`ccino.exceptions.CcinoException`: If nothing is serving
+            on the path or the server went away.
+    """
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    try:
+        sock.connect(path)
+    except (IOError, OSError) as e:
+        sock.close()
+
+        raise CcinoException('Could not connect to {}: {}'.format(path, e))
+
+    channel = Channel(sock)
+
+    try:
+        channel.send({
+            'args': list(args),
+            'prog': prog,
+            'cwd': os.getcwd(),
+            'env': dict(os.environ),
+            'tty': sys.stdout.isatty()
+        })
+
+        while True:
+            kind, payload = channel.recv()
+
+            if kind == 'exit':
+                return payload
+
+            stream = sys.stderr if kind == 'stderr' else sys.stdout
+
+            stream.write(payload)
+            stream.flush()
+    except EOFError:
+        raise CcinoException('The server closed the connection.')
+    finally:
+        channel.close()
@@ -0,0 +1,127 @@
+"""Boolean expressions over the tags of tests."""
+
+from __future__ import absolute_import
+
+import re
+
+
+# Names, parentheses, or anything else (which is an error).
+TOKEN_PATTERN = re.compile(r'\s*(?:([^\s()]+)|(\()|(\))|(\S))')
+
+OPERATORS = ('and', 'or', 'not')
+
+
+def _tokenize(expression):
+    tokens = []
+
+    for name, opening, closing, other in TOKEN_PATTERN.findall(expression):
+        if other:
+            raise ValueError('unexpected {!r} in tags'.format(other))
+
+        tokens.append(name or opening or closing)
+
+    return tokens
+
+
+class _Parser(object):
+    """Recursive descent parser for tag expressions.
+
+    ``or`` binds loosest, then ``and``, then ``not``. Each rule returns
+    a function that is called with a set of tags.
+    """
+
+    def __init__(self, tokens):
+        self._tokens = tokens
+        self._position = 0
+
+    def _peek(self):
+        if self._position < len(self._tokens):
+            return self._tokens[self._position]
+
+        return None
+
+    def _take(self):
+        token = self._peek()
+        self._position += 1
+
+        return token
+
+    def parse(self):
+        match = self._parse_or()
+
+        if self._peek() is not None:
+            raise ValueError('unexpected {!r} in tags'.format(self._peek()))
+
+        return match
+
+    def _parse_or(self):
+        matches = [self._parse_and()]
+
+        while self._peek() == 'or':
+            self._take()
+            matches.append(self._parse_and())
+
+        if len(matches) == 1:
+            return matches[0]
+
+        return lambda tags: any(match(tags) for match in matches)
+
+    def _parse_and(self):
+        matches = [self._parse_not()]
+
+        while self._peek() == 'and':
+            self._take()
+            matches.append(self._parse_not())
+
+        if len(matches) == 1:
+            return matches[0]
+
+        return lambda tags: all(match(tags) for match in matches)
+
+    def _parse_not(self):
+        if self._peek() == 'not':
+            self._take()
+            match = self._parse_not()
+
+            return lambda tags: not match(tags)
+
+        return self._parse_atom()
+
+    def _parse_atom(self):
+        token = self._take()
+
+        if token == '(':
+            match = self._parse_or()
+
+            if self._take() != ')':
+                raise ValueError('missing ) in tags')
+
+            return match
+
+        if token is None:
+            raise ValueError('tags ended too soon')
+
+        if token == ')' or token in OPERATORS:
+            raise ValueError('unexpected {!r} in tags'.format(token))
+
+        return lambda tags: token in tags
+
+
+def parse_tags(expression):
+    """Parse a boolean expression over tags.
+
+    Expressions are made of tag names, ``and``, ``or``, ``not`` and
+    parentheses, such as ``'db and not (slow or flaky)'``.
+
+    Args:
+        expression (str): The expression.
+
+    Returns:
+        Callable: Called with a set of tags, returns whether they
+        match the expression.
+
+    Raises:
+        ValueError: If the expression is not valid.
+    """
+
+    return _Parser(_tokenize(expression)).parse()
@@ -2,7 +2,8 @@
 
 from __future__ import absolute_import
 
+from .files import get_temp_path, make_dirs
 from .get_func_args import get_func_args, get_num_args
-from .load_module import load_module
+from .load_module import load_module, load_paths, find_modules
 from .make_builtin import make_builtin
 from .redirect_print import redirect_print
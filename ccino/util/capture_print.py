@@ -0,0 +1,74 @@
+import threading
+from contextlib import contextmanager
+
+try:
+    from contextvars import ContextVar
+except ImportError:
+    ContextVar = None
+
+
+class CaptureStream(object):
+    """Stream that sends printed text to a capture target.
+
+    The capture target is kept separately for each thread (and for
+    each asyncio task where ``contextvars`` is available) so code
+    running at the same time can be captured separately. Text written
+    while nothing is captured goes to the wrapped stream.
+    """
+
+    def __init__(self, stream):
+        """Create a new CaptureStream.
+
+        Args:
+            stream: The stream to write uncaptured text to.
+        """
+
+        self._stream = stream
+
+        if ContextVar is not None:
+            self._target = ContextVar('ccino_capture', default=None)
+        else:
+            self._local = threading.local()
+
+    def _get_target(self):
+        if ContextVar is not None:
+            return self._target.get()
+
+        return getattr(self._local, 'target', None)
+
+    def write(self, string):
+        target = self._get_target()
+
+        if target is None:
+            target = self._stream
+
+        target.write(string)
+
+    def flush(self):
+        if hasattr(self._stream, 'flush'):
+            self._stream.flush()
+
+    @contextmanager
+    def capture(self, target):
+        """Capture text printed by the current thread or task.
+
+        Args:
+            target: An object with a ``write`` method to send the
+                text to.
+        """
+
+        if ContextVar is not None:
+            token = self._target.set(target)
+
+            try:
+                yield
+            finally:
+                self._target.reset(token)
+        else:
+            previous = getattr(self._local, 'target', None)
+            self._local.target = target
+
+            try:
+                yield
+            finally:
+                self._local.target = previous
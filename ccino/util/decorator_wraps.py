@@ -69,6 +69,14 @@ def combine_args(dec, method=False):
         two: 2
     """
 
+    required = 0
+
+    if method: required += 1
+
+    # The name of the argument taking the function, read once since
+    # reading signatures is slow.
+    func_arg = []
+
     @wraps(dec)
     def wrapped_dec(*args, **kwargs):
         # If the function was provided, return the decorator with all
@@ -78,13 +86,15 @@ def combine_args(dec, method=False):
         # accepts the function and then returns the original
         # decorator with all the arguments.
 
-        required = 0
+        if len(args) > required and isfunction(args[required]):
+            return dec(*args, **kwargs)
 
-        if method: required += 1
+        if kwargs:
+            if not func_arg:
+                func_arg.append(get_func_args(dec)[required])
 
-        if (len(args) > required and isfunction(args[required])) or \
-                get_func_args(dec)[required] in kwargs:
-            return dec(*args, **kwargs)
+            if func_arg[0] in kwargs:
+                return dec(*args, **kwargs)
 
         def inner_wrap(func):
             added_args = (func, ) + args[required:]
@@ -0,0 +1,140 @@
+import inspect
+import os
+import sys
+import threading
+
+
+def _import_asyncio():
+    """Import asyncio, which is slow to import, once it is needed.
+
+    Returns:
+        module: asyncio, or None if it is not available.
+    """
+
+    try:
+        import asyncio
+    except ImportError:
+        return None
+
+    return asyncio
+
+
+def iscoroutine(obj):
+    """Check if an object is a coroutine that needs to be awaited.
+
+    Args:
+        obj: The object to check.
+
+    Returns:
+        bool: Whether obj is a coroutine.
+    """
+
+    asyncio = sys.modules.get('asyncio')
+
+    if asyncio is not None:
+        return asyncio.iscoroutine(obj)
+
+    # Only ``async def`` coroutines can be made without asyncio.
+    return hasattr(inspect, 'iscoroutine') and inspect.iscoroutine(obj)
+
+
+class EventLoop(object):
+    """Event loop shared by the async tests and hooks of a run.
+
+    The asyncio loop is created the first time it is needed so runs
+    without async tests never make one. It is driven by the thread
+    that created this object. Coroutines from other threads (such as
+    tests in concurrent suites) are handed to the loop and awaited
+    there while that thread waits on them with ``wait``.
+
+    A forked process gets a new loop the first time it needs one.
+    """
+
+    def __init__(self):
+        """Create a new EventLoop."""
+
+        self._loop = None
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._thread = threading.current_thread()
+
+    def _get_loop(self):
+        if self._pid != os.getpid():
+            self._loop = None
+            self._lock = threading.Lock()
+            self._pid = os.getpid()
+            self._thread = threading.current_thread()
+
+        # Threads may ask for the loop before the driving thread does
+        # and they all have to get the same one.
+        with self._lock:
+            if self._loop is None:
+                self._loop = _import_asyncio().new_event_loop()
+
+            return self._loop
+
+    def run(self, coroutine):
+        """Run a coroutine to completion.
+
+        Args:
+            coroutine: The coroutine to run.
+
+        Returns:
+            Object: The result of the coroutine.
+        """
+
+        loop = self._get_loop()
+
+        if threading.current_thread() is self._thread:
+            return loop.run_until_complete(coroutine)
+
+        return _import_asyncio().run_coroutine_threadsafe(coroutine, loop) \
+                .result()
+
+    def wait(self, future):
+        """Wait for a ``concurrent.futures.Future`` to finish.
+
+        The loop is run while waiting so coroutines handed over by
+        other threads can make progress. This must be called from the
+        thread driving the loop.
+
+        Args:
+            future (:obj:`concurrent.futures.Future`): The future.
+
+        Returns:
+            Object: The result of the future.
+        """
+
+        asyncio = _import_asyncio()
+
+        if asyncio is None:
+            return future.result()
+
+        loop = self._get_loop()
+
+        return loop.run_until_complete(asyncio.wrap_future(future, loop=loop))
+
+    def close(self):
+        """Close the loop if one was made by this process."""
+
+        if self._loop is not None and self._pid == os.getpid():
+            self._loop.close()
+
+        self._loop = None
+
+
+def get_event_loop(options):
+    """Get the event loop for a run.
+
+    Args:
+        options (dict): ccino runner options.
+
+    Returns:
+        :obj:`EventLoop`: The loop kept in the options, made if there
+        was none.
+    """
+
+    if 'loop' not in options:
+        options['loop'] = EventLoop()
+
+    return options['loop']
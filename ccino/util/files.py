@@ -0,0 +1,43 @@
+from __future__ import absolute_import
+
+import errno
+import os
+import threading
+
+
+def make_dirs(path):
+    """Make a directory and the directories around it, unless it
+    already exists.
+
+    Processes and threads making the same directory at the same time
+    do not fail.
+
+    Args:
+        path (str): The directory.
+
+    Raises:
+        OSError: If the directory cannot be made.
+    """
+
+    try:
+        os.makedirs(path)
+    except OSError as e:
+        if e.errno != errno.EEXIST or not os.path.isdir(path):
+            raise
+
+
+def get_temp_path(path):
+    """Get the path to write a file to before moving it into place.
+
+    The path is unique to the process and thread, so files written at
+    the same time do not overwrite each other before they are moved.
+
+    Args:
+        path (str): Where the file goes.
+
+    Returns:
+        str: The temporary path, next to path.
+    """
+
+    return '{}.{:d}.{:d}.tmp'.format(path, os.getpid(),
+            threading.current_thread().ident)
@@ -35,3 +35,50 @@ def load_module(path):
         SourceFileLoader(module_name, path).load_module()
     else:
         load_source(module_name, path)
+
+
+def find_modules(paths, recursive):
+    """Find the files that loading files and directories would load.
+
+    Args:
+        paths (List[str]): The paths to load.
+        recursive (bool): Whether to load subdirectories.
+
+    Returns:
+        List[str]: The file paths in the order they would be loaded.
+    """
+
+    modules = []
+
+    for path in paths:
+        if os.path.isfile(path):
+            modules.append(path)
+        elif os.path.isdir(path):
+            for inner_path in sorted(os.listdir(path)):
+                inner_path = os.path.join(path, inner_path)
+
+                if os.path.isfile(inner_path) and inner_path.endswith('.py'):
+                    modules.append(inner_path)
+                elif os.path.isdir(inner_path) and recursive:
+                    modules.extend(find_modules([inner_path], recursive))
+
+    return modules
+
+
+def load_paths(paths, recursive):
+    """Load files and directories.
+
+    Args:
+        paths (List[str]): The paths to load.
+        recursive (bool): Whether to load subdirectories.
+
+    Returns:
+        int: The number of modules loaded.
+    """
+
+    modules = find_modules(paths, recursive)
+
+    for path in modules:
+        load_module(path)
+
+    return len(modules)
@@ -10,6 +10,9 @@ else:
     from time import clock
 
 
+now = perf_counter if PYTHON_3_3 else clock
+
+
 class Timer(object):
     """Simple timer that can be started and stopped."""
 
@@ -0,0 +1,299 @@
+"""Run tests again when their files change."""
+
+from __future__ import absolute_import
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+import traceback
+
+from .imports import ImportGraph
+from .util import find_modules, load_paths
+
+
+# Seconds between checking files when inotify is not available.
+POLL_INTERVAL = 0.5
+
+# Seconds to wait for more changes before running, so saving several
+# files at once only runs the tests once.
+SETTLE_TIME = 0.1
+
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+
+_IN_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | \
+        _IN_DELETE
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class _InotifyWatcher(object):
+    """Watcher that uses Linux inotify through ctypes.
+
+    The directories of the watched files are watched so files replaced
+    by renaming (as many editors save) are still seen.
+    """
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6',
+                use_errno=True)
+
+        # Raises AttributeError where inotify is not available.
+        self._add_watch = libc.inotify_add_watch
+        self._fd = libc.inotify_init1(os.O_CLOEXEC)
+
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        self._directories = {}
+
+    def watch(self, paths):
+        """Start watching files and directories.
+
+        Args:
+            paths (Iterable[str]): The paths to watch.
+        """
+
+        for path in paths:
+            directory = path if os.path.isdir(path) else \
+                    os.path.dirname(path)
+
+            if directory in self._directories.values():
+                continue
+
+            encoded = directory
+
+            if not isinstance(encoded, bytes):
+                encoded = encoded.encode(sys.getfilesystemencoding())
+
+            descriptor = self._add_watch(self._fd, encoded, _IN_MASK)
+
+            if descriptor >= 0:
+                self._directories[descriptor] = directory
+
+    def _read(self, timeout):
+        try:
+            ready = select.select([self._fd], [], [], timeout)[0]
+        except (IOError, OSError, select.error) as e:
+            if e.args[0] == errno.EINTR:
+                return []
+
+            raise
+
+        if not ready:
+            return None
+
+        data = os.read(self._fd, 65536)
+        changed = []
+        offset = 0
+
+        while offset < len(data):
+            descriptor, _, _, length = \
+                    _EVENT_HEADER.unpack_from(data, offset)
+
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if descriptor in self._directories and name:
+                changed.append(os.path.join(self._directories[descriptor],
+                        name.decode(sys.getfilesystemencoding())))
+
+        return changed
+
+    def wait(self):
+        """Wait for watched files to change.
+
+        Returns:
+            Set[str]: Paths that changed in the watched directories.
+        """
+
+        changed = set()
+
+        while not changed:
+            changed.update(self._read(None) or [])
+
+        while True:
+            more = self._read(SETTLE_TIME)
+
+            if more is None:
+                return changed
+
+            changed.update(more)
+
+    def close(self):
+        os.close(self._fd)
+
+
+class _PollWatcher(object):
+    """Watcher that checks modification times.
+
+    Only the watched files and their directories are checked, so a
+    check costs one ``stat`` call for each of them.
+    """
+
+    def __init__(self):
+        self._mtimes = {}
+
+    def _mtime(self, path):
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def watch(self, paths):
+        """Start watching files and directories.
+
+        Args:
+            paths (Iterable[str]): The paths to watch.
+        """
+
+        for path in paths:
+            for watched in (path, os.path.dirname(path)):
+                if watched not in self._mtimes:
+                    self._mtimes[watched] = self._mtime(watched)
+
+    def _check(self):
+        changed = set()
+
+        for path, mtime in self._mtimes.items():
+            current = self._mtime(path)
+
+            if current != mtime:
+                self._mtimes[path] = current
+                changed.add(path)
+
+        return changed
+
+    def wait(self):
+        """Wait for watched files to change.
+
+        Returns:
+            Set[str]: Paths that changed.
+        """
+
+        changed = set()
+
+        while not changed:
+            time.sleep(POLL_INTERVAL)
+            changed = self._check()
+
+        while True:
+            time.sleep(SETTLE_TIME)
+            more = self._check()
+
+            if not more:
+                return changed
+
+            changed.update(more)
+
+    def close(self):
+        pass
+
+
+def make_watcher():
+    """Make the best file watcher for this platform.
+
+    Returns:
+        Object: An inotify watcher where available, otherwise a
+        watcher that polls modification times.
+    """
+
+    try:
+        return _InotifyWatcher()
+    except (AttributeError, OSError):
+        return _PollWatcher()
+
+
+def _notify(message):
+    sys.stderr.write('ccino: {}\n'.format(message))
+    sys.stderr.flush()
+
+
+def watch(runner, paths, recursive, watcher=None):
+    """Run tests again whenever their files change, until interrupted.
+
+    The test files and the local modules they import are watched. When
+    some change, only the test files affected by the change are loaded
+    again (into a fresh root suite) and run. Local modules affected by
+    the change are imported again as well.
+
+    Args:
+        runner (:obj:`ccino.runner.Runner`): The runner the tests were
+            loaded into and run with.
+        paths (List[str]): The files and directories the tests were
+            loaded from.
+        recursive (bool): Whether subdirectories were loaded.
+
+    Keyword Args:
+        watcher: The file watcher. Defaults to ``make_watcher()``.
+    """
+
+    if watcher is None:
+        watcher = make_watcher()
+
+    tests = [os.path.abspath(path) for path in find_modules(paths, recursive)]
+
+    directories = [os.path.abspath(path) for path in paths
+            if os.path.isdir(path)]
+
+    # Modules next to the tests are local even outside the working
+    # directory.
+    roots = [os.getcwd()] + [os.path.dirname(os.path.abspath(path))
+            for path in paths]
+
+    graph = ImportGraph(tests, roots)
+
+    _notify('watching for changes, press Ctrl-C to stop')
+
+    try:
+        while True:
+            watcher.watch(graph.files + directories)
+
+            changed = watcher.wait()
+
+            current = [os.path.abspath(path)
+                    for path in find_modules(paths, recursive)]
+            affected = graph.affected(changed)
+
+            # Changed modules, and modules that use them, are imported
+            # again by the test files that are loaded again.
+            for path in affected:
+                name = graph.module_name(path)
+
+                if name is not None:
+                    sys.modules.pop(name, None)
+
+            rerun = [path for path in current
+                    if path in affected or path not in tests]
+
+            tests = current
+
+            if not rerun:
+                continue
+
+            _notify('running {:d} changed file{}'
+                    .format(len(rerun), '' if len(rerun) == 1 else 's'))
+
+            runner.reset()
+
+            try:
+                load_paths(rerun, False)
+            except Exception:
+                traceback.print_exc()
+            else:
+                runner.run_tests()
+
+            graph = ImportGraph(tests, roots)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
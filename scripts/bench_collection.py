@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""Measure collection time and memory for a generated test tree.
+
+Usage: bench_collection.py [TESTS] [TESTS_PER_SUITE]
+
+The tree is collected through the runner decorators the same way test
+files are, with a setup and teardown hook in every suite. The resident
+set size is read from /proc where available.
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from ccino.runner import Runner
+from ccino.util.timer import now
+
+
+def get_rss():
+    """Get the resident set size of this process in MiB, or None."""
+
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+    except (IOError, OSError):
+        return None
+
+    return pages * os.sysconf('SC_PAGE_SIZE') / 1024.0 / 1024.0
+
+
+def collect(runner, tests, per_suite):
+    for first in range(0, tests, per_suite):
+        def suite_func():
+            @runner.setup
+            def setup():
+                pass
+
+            @runner.teardown
+            def teardown():
+                pass
+
+            for index in range(first, min(first + per_suite, tests)):
+                def test_func():
+                    pass
+
+                runner.test('test {:d}'.format(index % per_suite))(test_func)
+
+        runner.suite(suite_func, 'suite {:d}'.format(first // per_suite))
+
+
+def main(argv):
+    tests = int(argv[1]) if len(argv) > 1 else 1000000
+    per_suite = int(argv[2]) if len(argv) > 2 else 1000
+
+    runner = Runner()
+
+    rss_before = get_rss()
+    start = now()
+
+    collect(runner, tests, per_suite)
+
+    elapsed = now() - start
+    rss_after = get_rss()
+
+    print('tests:      {:d} in suites of {:d}'.format(tests, per_suite))
+    print('collection: {:.2f}s ({:.2f}us per test)'
+            .format(elapsed, elapsed / tests * 1e6))
+
+    if rss_before is not None:
+        print('rss:        {:.1f} MiB ({:.0f} bytes per test)'
+                .format(rss_after, (rss_after - rss_before) * 1024 * 1024 /
+                tests))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
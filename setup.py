@@ -61,7 +61,7 @@ setup(
     install_requires=[load_requirements()],
     entry_points='''
         [console_scripts]
-        ccino=ccino.cli:run
+        ccino=ccino.cli:main
     ''',
     license='MIT'
 )
@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+
+from ccino.affected import LOAD_CONTEXT, affected, changed_lines, hash_lines
+from ccino.runner import Runner
+from ccino.selection import get_tests
+
+
+def write(path, lines):
+    with open(path, 'w') as source_file:
+        source_file.write('\n'.join(lines) + '\n')
+
+
+def make_runner():
+    runner = Runner()
+
+    @runner.suite('one')
+    def one_suite():
+        @runner.setup
+        def one_setup():
+            pass
+
+        @runner.test('a')
+        def a_test():
+            pass
+
+    @runner.suite('two')
+    def two_suite():
+        @runner.test('b')
+        def b_test():
+            pass
+
+        @runner.test('c')
+        def c_test():
+            pass
+
+    return runner
+
+
+def pick(coverage_map):
+    root = make_runner().root
+    tests = get_tests(root)
+
+    return [tests[i].id for i in affected(root, tests, coverage_map)]
+
+
+@suite('affected')
+def affected_suite():
+
+    @setup
+    def make_dir(test):
+        global source_dir, source
+
+        source_dir = tempfile.mkdtemp()
+        source = os.path.join(source_dir, 'module.py')
+
+        write(source, ['one', 'two', 'three', 'four'])
+
+    @teardown
+    def remove_dir(test):
+        shutil.rmtree(source_dir)
+
+    @test('should find changed lines')
+    def test_changed_lines():
+        files = {source: hash_lines(source)}
+
+        assert changed_lines(files) == {}
+
+        write(source, ['one', 'two', 'new', 'four'])
+        assert changed_lines(files) == {source: set([3])}
+
+        write(source, ['zero', 'one', 'two', 'three', 'four'])
+        assert changed_lines(files) == {source: set([0, 1])}
+
+        os.remove(source)
+        assert changed_lines(files) == {source: None}
+
+    @test('should pick tests and hooks that ran changed lines')
+    def test_pick():
+        coverage_map = {
+            'files': {source: hash_lines(source)},
+            'contexts': {
+                LOAD_CONTEXT: {source: [1]},
+                'one::one_setup': {source: [2]},
+                'one::a': {},
+                'two::b': {source: [3]},
+                'two::c': {source: [4]}
+            }
+        }
+
+        assert pick(coverage_map) == []
+
+        write(source, ['one', 'two', 'three', 'changed'])
+        assert pick(coverage_map) == ['two::c']
+
+        write(source, ['one', 'changed', 'three', 'four'])
+        assert pick(coverage_map) == ['one::a']
+
+        write(source, ['changed', 'two', 'three', 'four'])
+        assert pick(coverage_map) == ['one::a', 'two::b', 'two::c']
+
+    @test('should pick tests that were not recorded')
+    def test_unrecorded():
+        coverage_map = {
+            'files': {source: hash_lines(source)},
+            'contexts': {'two::b': {source: [3]}}
+        }
+
+        assert pick(coverage_map) == ['one::a', 'two::c']
@@ -0,0 +1,124 @@
+import sys
+
+# Coroutine functions are a syntax error before Python 3.5, so the tests
+# are only compiled where they can run.
+PYTHON_3_5 = sys.version_info >= (3, 5)
+
+
+SOURCE = r'''
+import asyncio
+from io import StringIO
+
+from ccino.runner import Runner
+from ccino.util.timer import now
+
+
+def run(runner):
+    runner.output(StringIO())
+    runner.stdout(StringIO())
+
+    return runner.run_tests()
+
+
+@suite('async')
+def async_suite():
+
+    @test('should await async tests and hooks')
+    def test_awaits():
+        runner = Runner()
+        calls = []
+
+        @runner.setup
+        async def awaits_setup():
+            await asyncio.sleep(0)
+            calls.append('setup')
+
+        @runner.test('passes')
+        async def awaits_passes():
+            await asyncio.sleep(0)
+            calls.append('test')
+
+        assert run(runner)
+        assert calls == ['setup', 'test']
+
+    @test('should fail async tests that raise')
+    def test_fails():
+        runner = Runner()
+
+        @runner.test('fails')
+        async def fails_test():
+            await asyncio.sleep(0)
+            assert False
+
+        assert not run(runner)
+
+    @test('should check what async tests return and raise')
+    def test_returns_raises():
+        runner = Runner()
+
+        @runner.test('returns')
+        @runner.returns(3)
+        async def returns_test():
+            return 3
+
+        @runner.test('raises')
+        @runner.raises(KeyError)
+        async def raises_test():
+            raise KeyError()
+
+        assert run(runner)
+
+    @test('should use one event loop for the run')
+    def test_one_loop():
+        runner = Runner()
+        loops = []
+
+        @runner.test('first')
+        async def first_test():
+            loops.append(asyncio.get_event_loop())
+
+        @runner.test('second')
+        async def second_test():
+            loops.append(asyncio.get_event_loop())
+
+        assert run(runner)
+        assert loops[0] is loops[1]
+
+    @test('should await gathered tests together')
+    def test_gather():
+        runner = Runner()
+
+        @runner.suite('gathered')
+        @runner.gather(limit=20)
+        def gathered_suite():
+            for i in range(20):
+                @runner.test('sleeps {:d}'.format(i))
+                async def gathered_sleeps():
+                    await asyncio.sleep(0.1)
+
+        start = now()
+
+        assert run(runner)
+        assert now() - start < 1
+
+    @test('should await every gathered test at once without a limit')
+    def test_gather_all():
+        runner = Runner()
+
+        @runner.suite('gathered')
+        @runner.gather
+        def gathered_suite():
+            for i in range(100):
+                @runner.test('sleeps {:d}'.format(i))
+                async def gathered_sleeps():
+                    await asyncio.sleep(0.2)
+
+        start = now()
+
+        assert run(runner)
+        assert now() - start < 1
+'''
+
+
+if PYTHON_3_5:
+    exec(compile(SOURCE, __file__, 'exec'))
@@ -0,0 +1,172 @@
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+
+PYTHON_3 = sys.version_info[0] == 3
+
+
+if PYTHON_3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+
+from ccino.cases import CaseFile
+from ccino.results import ResultCache
+from ccino.runner import Runner
+
+
+def write(path, text):
+    with open(path, 'w') as case_file:
+        case_file.write(text)
+
+
+def run(runner):
+    output = StringIO()
+    stdout = StringIO()
+
+    runner.output(output)
+    runner.stdout(stdout)
+    runner.color(False)
+
+    runner.run_tests()
+
+    return output.getvalue(), stdout.getvalue().split('\n')[:-1]
+
+
+def make_runner(path):
+    runner = Runner()
+
+    @runner.suite('table')
+    def table_suite():
+        @runner.cases_from(path)
+        @runner.test('squares')
+        def squares_test(n, square):
+            print(n)
+            assert int(n) ** 2 == int(square)
+
+        @runner.test('other')
+        def other_test():
+            print('other')
+
+    return runner
+
+
+@suite('cases from files')
+def cases_suite():
+
+    @fixture
+    def directory():
+        path = tempfile.mkdtemp()
+        yield path
+        shutil.rmtree(path)
+
+    @fixture
+    def table(directory):
+        path = os.path.join(directory, 'table.csv')
+
+        write(path, 'n,square\n' + ''.join('{:d},{:d}\n'.format(i, i * i)
+                for i in range(10)))
+
+        return path
+
+    @test('should read ranges of CSV and JSON Lines files')
+    def test_read(directory, table):
+        cases = CaseFile(table)
+
+        assert len(cases) == 10
+        assert list(cases)[:2] == [('0', '0'), ('1', '1')]
+        assert list(cases.read(8)) == [('8', '64'), ('9', '81')]
+        assert list(cases.read(3, 5)) == [('3', '9'), ('4', '16')]
+
+        path = os.path.join(directory, 'quoted.csv')
+        write(path, 'a,b\n"x\ny",1\n\nz,2\n')
+
+        cases = CaseFile(path)
+
+        assert len(cases) == 2
+        assert list(cases) == [('x\ny', '1'), ('z', '2')]
+        assert list(cases.read(1)) == [('z', '2')]
+
+        path = os.path.join(directory, 'cases.jsonl')
+        write(path, '[1, 2]\n\n{"a": 3}\r\n"x"')
+
+        cases = CaseFile(path)
+
+        assert len(cases) == 3
+        assert list(cases) == [(1, 2), {'a': 3}, 'x']
+        assert list(cases.read(1, 2)) == [{'a': 3}]
+
+    @test('should keep the index until the file changes')
+    def test_index(table):
+        cases = CaseFile(table)
+        len(cases)
+
+        assert os.path.exists(cases.index_path)
+
+        # Without its last offset, the index counts one case less.
+        with open(cases.index_path, 'rb') as index_file:
+            data = index_file.read()
+
+        with open(cases.index_path, 'wb') as index_file:
+            index_file.write(data[:-4])
+
+        assert len(CaseFile(table)) == 9
+
+        with open(table, 'a') as case_file:
+            case_file.write('10,100\n')
+
+        os.utime(table, (0, 0))
+
+        assert len(CaseFile(table)) == 11
+        assert list(CaseFile(table).read(10)) == [('10', '100')]
+
+    @test('should only run the cases of an id with a range')
+    def test_ids(table):
+        runner = make_runner(table)
+        runner.ids(['table::squares[4:6]', 'table::other'])
+
+        output, stdout = run(runner)
+
+        assert stdout == ['4', '5', 'other']
+        assert 'squares[4]' in output
+
+    @test('should split the cases of files between shards')
+    def test_shard(table):
+        ran = []
+
+        for index in range(1, 4):
+            runner = make_runner(table)
+            runner.shard(index, 3)
+
+            ran.extend(run(runner)[1])
+
+        assert sorted(ran) == sorted([str(i) for i in range(10)] +
+                ['other'])
+
+    @test('should keep the cases of cached results until the file changes')
+    def test_results(directory, table):
+        results = ResultCache(os.path.join(directory, 'results'))
+
+        def run_cached():
+            runner = make_runner(table)
+            runner.results(results)
+
+            return run(runner)
+
+        run_cached()
+        output, stdout = run_cached()
+
+        assert stdout == []
+        assert 'squares[9]' in output
+        assert '11 passing' in output
+
+        write(table, 'n,square\n3,10\n')
+
+        output, stdout = run_cached()
+
+        assert stdout == ['3', 'other']
+        assert '1 failing' in output
@@ -0,0 +1,130 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from ccino import imports
+from ccino.cache import Cache
+from ccino.changed import select_changed
+from ccino.imports import StaticImportGraph
+
+
+def write(path, text):
+    directory = os.path.dirname(path)
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    with open(path, 'w') as source_file:
+        source_file.write(text)
+
+
+def make_tree(root):
+    write(os.path.join(root, 'pkg', '__init__.py'), '')
+    write(os.path.join(root, 'pkg', 'base.py'), 'VALUE = 1\n')
+    write(os.path.join(root, 'pkg', 'uses_base.py'), 'from . import base\n')
+    write(os.path.join(root, 'other.py'), 'import os\n')
+    write(os.path.join(root, 'test', 'test_base.py'),
+            'from pkg.uses_base import base\n')
+    write(os.path.join(root, 'test', 'test_other.py'), 'import other\n')
+
+
+def git(root, *args):
+    with open(os.devnull, 'w') as devnull:
+        subprocess.check_call(['git', '-c', 'user.name=ccino',
+                '-c', 'user.email=ccino@localhost'] + list(args),
+                cwd=root, stdout=devnull, stderr=devnull)
+
+
+@suite('changed since')
+def changed_suite():
+
+    @setup
+    def make_dir(test):
+        global tree
+
+        tree = os.path.realpath(tempfile.mkdtemp())
+        make_tree(tree)
+
+    @teardown
+    def remove_dir(test):
+        shutil.rmtree(tree)
+
+    @test('should find imports without importing them')
+    def test_static_graph():
+        tests = [os.path.join(tree, 'test', 'test_base.py'),
+                os.path.join(tree, 'test', 'test_other.py')]
+
+        graph = StaticImportGraph(tests, [tree])
+
+        assert 'pkg.base' not in sys.modules
+
+        affected = graph.affected([os.path.join(tree, 'pkg', 'base.py')])
+
+        assert sorted(os.path.relpath(path, tree) for path in affected) == [
+            os.path.join('pkg', 'base.py'),
+            os.path.join('pkg', 'uses_base.py'),
+            os.path.join('test', 'test_base.py')
+        ]
+
+    @test('should only parse files that changed since the last graph')
+    def test_parsed_again():
+        tests = [os.path.join(tree, 'test', 'test_base.py')]
+        parsed = StaticImportGraph(tests, [tree]).parsed
+
+        calls = []
+        get_imports = imports.get_imports
+
+        def counting_get_imports(path, package=None):
+            calls.append(path)
+            return get_imports(path, package)
+
+        imports.get_imports = counting_get_imports
+
+        try:
+            graph = StaticImportGraph(tests, [tree], parsed)
+            assert not graph.changed
+            assert calls == []
+
+            changed = os.path.join(tree, 'pkg', 'base.py')
+            write(changed, 'import other\n')
+
+            # Make sure the modification time is different.
+            mtime = os.stat(changed).st_mtime + 10
+            os.utime(changed, (mtime, mtime))
+
+            graph = StaticImportGraph(tests, [tree], parsed)
+        finally:
+            imports.get_imports = get_imports
+
+        # other.py is new in the graph.
+        assert calls == [changed, os.path.join(tree, 'other.py')]
+
+    @test('should pick test files reaching files changed since a ref')
+    def test_select_changed():
+        git(tree, 'init')
+        git(tree, 'add', '.')
+        git(tree, 'commit', '-m', 'init')
+
+        cwd = os.getcwd()
+        os.chdir(tree)
+
+        try:
+            cache = Cache(os.path.join(tree, '.ccino_cache'))
+
+            assert select_changed(['test'], False, 'HEAD', cache) == []
+
+            write(os.path.join(tree, 'pkg', 'base.py'), 'VALUE = 2\n')
+
+            assert select_changed(['test'], False, 'HEAD', cache) == \
+                    [os.path.join(tree, 'test', 'test_base.py')]
+
+            write(os.path.join(tree, 'test', 'test_new.py'), '')
+
+            assert select_changed(['test'], False, 'HEAD', cache) == [
+                os.path.join(tree, 'test', 'test_base.py'),
+                os.path.join(tree, 'test', 'test_new.py')
+            ]
+        finally:
+            os.chdir(cwd)
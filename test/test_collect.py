@@ -0,0 +1,201 @@
+import os
+import shutil
+import tempfile
+
+from ccino.collect import collect_file, collect_paths
+from ccino.exceptions import NotStatic
+from ccino.fixtures.root import RootSuite
+from ccino.runner import Runner
+
+
+STATIC_SOURCE = '''
+import sys
+
+HELPER = 1
+
+
+@suite_setup
+def root_setup():
+    print('root setup')
+
+
+@tag('db')
+@describe('users')
+def users_suite():
+    @before_each('connect')
+    def connect(test):
+        pass
+
+    @it('logs in')
+    def login_test():
+        assert False
+
+    @skip
+    @raises(KeyError)
+    @test
+    def missing_test():
+        {}['key']
+
+    @skip(False)
+    @suite(name='nested')
+    def nested_suite():
+        @tag('slow', 'flaky')
+        @returns(sys.maxsize)
+        @test('export')
+        async def export_test():
+            return sys.maxsize
+
+
+@test('top')
+def top_test():
+    raise Exception('not run')
+'''
+
+
+def write(name, text):
+    path = os.path.join(source_dir, name)
+
+    with open(path, 'w') as source_file:
+        source_file.write(text)
+
+    return path
+
+
+def describe_tree(root):
+    return [(type(runnable).__name__, runnable.id, sorted(runnable.tags),
+            bool(getattr(runnable.func, '_skip', False)))
+            for runnable in root.walk() if runnable is not root]
+
+
+def refuses(source):
+    root = RootSuite()
+
+    try:
+        collect_file(write('test_refused.py', source), root)
+    except NotStatic:
+        return root.tests == []
+
+    return False
+
+
+@suite('static collection')
+def collect_suite():
+
+    @setup
+    def make_dir(test):
+        global source_dir
+
+        source_dir = tempfile.mkdtemp()
+
+    @teardown
+    def remove_dir(test):
+        shutil.rmtree(source_dir)
+
+    @test('should build the tree without running the file')
+    def test_collect():
+        root = RootSuite()
+
+        assert collect_file(write('test_static.py', STATIC_SOURCE),
+                root) == 2
+
+        assert describe_tree(root) == [
+            ('Hook', 'root_setup', [], False),
+            ('Suite', 'users', ['db'], False),
+            ('Hook', 'users::connect', ['db'], False),
+            ('Test', 'users::logs in', ['db'], False),
+            ('Test', 'users::missing_test', ['db'], True),
+            ('Suite', 'users::nested', ['db'], False),
+            ('Test', 'users::nested::export', ['db', 'flaky', 'slow'], False),
+            ('Test', 'top', [], False)
+        ]
+
+    @test('should refuse files it cannot follow')
+    def test_refused():
+        # Tests made in a loop.
+        assert refuses('for i in range(3):\n'
+                '    @test(str(i))\n'
+                '    def a_test():\n'
+                '        pass\n')
+
+        # Conditions known only when running.
+        assert refuses('import sys\n'
+                '@skip(sys.platform == "win32")\n'
+                '@test("a")\n'
+                'def a_test():\n'
+                '    pass\n')
+
+        # Tests added by calling the functions.
+        assert refuses('@test("a")\n'
+                'def a_test():\n'
+                '    pass\n'
+                'test("b")(lambda: None)\n')
+
+        # Tests added by helpers.
+        assert refuses('def add_tests():\n'
+                '    @test("a")\n'
+                '    def a_test():\n'
+                '        pass\n')
+
+    @test('should refuse files binding the names of the decorators')
+    def test_bound():
+        assert refuses('test = lambda *a, **k: (lambda f: f)\n'
+                '@test("a")\n'
+                'def a_test():\n'
+                '    pass\n')
+
+        assert refuses('@suite("a")\n'
+                'def a_suite():\n'
+                '    def test(name):\n'
+                '        return lambda f: f\n'
+                '    @test("b")\n'
+                '    def b_test():\n'
+                '        pass\n')
+
+        for binding in ('from helpers import tag as skip',
+                'import skip', 'for skip in []: pass',
+                'def helper():\n    global skip'):
+            assert refuses(binding + '\n'
+                    '@skip\n'
+                    '@test("a")\n'
+                    'def a_test():\n'
+                    '    pass\n')
+
+    @test('should follow files with the names bound in other functions')
+    def test_bound_elsewhere():
+        root = RootSuite()
+
+        collect_file(write('test_bound.py', '@setup\n'
+                'def a_setup(test):\n'
+                '    test = None\n'
+                '@test("a")\n'
+                'def a_test():\n'
+                '    pass\n'), root)
+
+        assert [runnable.id for runnable in root.walk()] == \
+                ['', 'a_setup', 'a']
+
+    @test('should import the files it cannot follow')
+    def test_fallback():
+        static = write('test_a.py', '@test("a")\ndef a_test():\n    pass\n')
+        dynamic = write('test_b.py', 'def add_tests():\n'
+                '    @test("b")\n'
+                '    def b_test():\n'
+                '        pass\n'
+                'IMPORTED = True\n')
+
+        root = RootSuite()
+        imported = collect_paths([source_dir], False, root)
+
+        assert [path for path, _ in imported] == [dynamic]
+        assert [test.id for test in root.tests] == ['a']
+
+    @test('should plan runs of collected tests')
+    def test_plan():
+        runner = Runner(tags='not slow', grep='users')
+
+        collect_file(write('test_static.py', STATIC_SOURCE), runner.root)
+
+        assert [test.id for test in runner.plan()] == [
+            'users::logs in',
+            'users::missing_test'
+        ]
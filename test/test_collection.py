@@ -0,0 +1,78 @@
+from ccino.fixtures import Hook, Suite, Test
+from ccino.util import decorator_wraps
+
+
+@suite('collection')
+def collection_suite():
+
+    @test('should not give runnables a __dict__')
+    def test_slots():
+        def test_func():
+            pass
+
+        def suite_func():
+            pass
+
+        for runnable in (Test(test_func), Suite(suite_func)):
+            assert not hasattr(runnable, '__dict__')
+
+    @test('should only allocate hooks when they are added')
+    def test_lazy_hooks():
+        def first_func():
+            pass
+
+        def second_func():
+            pass
+
+        def hook_func():
+            pass
+
+        first = Suite(first_func)
+        second = Suite(second_func)
+
+        assert first._setups is second._setups
+
+        first.add_setup(Hook(hook_func))
+
+        assert len(first._setups) == 1
+        assert len(second._setups) == 0
+
+    @test('should share equal names')
+    def test_interned_names():
+        def first_func():
+            pass
+
+        def second_func():
+            pass
+
+        first = Test(first_func, name=''.join(['same', ' name']))
+        second = Test(second_func, name=''.join(['same', ' name']))
+
+        assert first.name is second.name
+
+    @test('should read a decorator signature once')
+    def test_signature_cached():
+        calls = []
+        get_func_args = decorator_wraps.get_func_args
+
+        def counting_get_func_args(func):
+            calls.append(func)
+            return get_func_args(func)
+
+        decorator_wraps.get_func_args = counting_get_func_args
+
+        try:
+            @decorator_wraps.combine_args
+            def wrap(func, name=None):
+                return name
+
+            def func():
+                pass
+
+            for _ in range(3):
+                assert wrap(name='name')(func) == 'name'
+                assert wrap(func=func, name='name') == 'name'
+        finally:
+            decorator_wraps.get_func_args = get_func_args
+
+        assert len(calls) == 1
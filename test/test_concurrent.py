@@ -0,0 +1,123 @@
+from __future__ import print_function
+
+import re
+import sys
+import threading
+
+
+PYTHON_3 = sys.version_info[0] == 3
+
+
+if PYTHON_3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+
+from ccino.runner import Runner
+
+
+@suite('concurrent')
+def concurrent_suite():
+
+    @test('should run tests at the same time')
+    @skip(not PYTHON_3)
+    def test_same_time():
+        runner = Runner()
+        barrier = threading.Barrier(3, timeout=5)
+
+        @runner.suite('waits')
+        @runner.concurrent(max_workers=3)
+        def waits_suite():
+            @runner.test('first')
+            def waits_first():
+                barrier.wait()
+
+            @runner.test('second')
+            def waits_second():
+                barrier.wait()
+
+            @runner.test('third')
+            def waits_third():
+                barrier.wait()
+
+        runner.output(StringIO())
+        runner.stdout(StringIO())
+
+        assert runner.run_tests()
+
+    @test('should report in the order tests were added')
+    def test_order():
+        runner = Runner()
+        second_done = threading.Event()
+
+        @runner.suite('ordered')
+        @runner.concurrent
+        def ordered_suite():
+            @runner.setup
+            def ordered_setup():
+                print('setup')
+
+            @runner.test('first')
+            def ordered_first():
+                second_done.wait(5)
+                print('first')
+
+            @runner.test('second')
+            def ordered_second():
+                print('second')
+                second_done.set()
+
+            @runner.suite('inner')
+            def inner_suite():
+                @runner.test('third')
+                def inner_third():
+                    print('third')
+
+        report_io = StringIO()
+        stdout_io = StringIO()
+
+        runner.output(report_io)
+        runner.stdout(stdout_io)
+        runner.reporter('debug')
+
+        assert runner.run_tests()
+
+        report = report_io.getvalue()
+
+        assert re.search('first.*second.*inner.*third', report, re.DOTALL)
+        assert stdout_io.getvalue() == \
+                'setup\nfirst\nsetup\nsecond\nsetup\nthird\n'
+
+    @test('should wait for prerequisites in the same suite')
+    def test_depends():
+        runner = Runner()
+
+        @runner.suite('linked')
+        @runner.concurrent(max_workers=3)
+        def linked_suite():
+            @runner.test('connects')
+            def linked_connects():
+                print('connects')
+                assert False
+
+            @runner.depends_on('connects')
+            @runner.test('sends')
+            def linked_sends():
+                print('sends')
+
+            @runner.test('other')
+            def linked_other():
+                print('other')
+
+        report_io = StringIO()
+        stdout_io = StringIO()
+
+        runner.output(report_io)
+        runner.stdout(stdout_io)
+        runner.color(False)
+
+        assert not runner.run_tests()
+
+        assert stdout_io.getvalue() == 'connects\nother\n'
+        assert '- sends (linked::connects failed)' in report_io.getvalue()
@@ -0,0 +1,148 @@
+from __future__ import print_function
+
+import sys
+
+PYTHON_3 = sys.version_info[0] == 3
+
+
+if PYTHON_3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+
+from ccino.exceptions import CcinoException
+from ccino.runner import Runner
+from ccino.selection import get_tests
+
+
+def run(runner, reporter='default'):
+    output = StringIO()
+    stdout = StringIO()
+
+    runner.output(output)
+    runner.stdout(stdout)
+    runner.reporter(reporter)
+    runner.color(False)
+
+    runner.run_tests()
+
+    return output.getvalue(), stdout.getvalue().split('\n')[:-1]
+
+
+def make_runner(connects=True, **options):
+    runner = Runner(**options)
+
+    @runner.suite('network')
+    def network_suite():
+        @runner.depends_on('can connect')
+        @runner.test('can send')
+        def send_test():
+            print('send')
+
+        @runner.test('can connect')
+        def connect_test():
+            print('connect')
+            assert connects
+
+        @runner.depends_on('can send')
+        @runner.test('can receive')
+        def receive_test():
+            print('receive')
+
+    @runner.suite('other')
+    def other_suite():
+        @runner.depends_on('network')
+        @runner.test('uses network')
+        def uses_test():
+            print('uses')
+
+        @runner.test('alone')
+        def alone_test():
+            print('alone')
+
+    return runner
+
+
+def raises_exception(runner):
+    try:
+        run(runner)
+    except CcinoException:
+        return True
+
+    return False
+
+
+@suite('depends on')
+def depends_suite():
+
+    @test('should run prerequisites first')
+    def test_order():
+        runner = make_runner()
+        output, stdout = run(runner)
+
+        assert stdout == ['connect', 'send', 'receive', 'uses', 'alone']
+        assert [test.id for test in get_tests(runner.root)] == [
+            'network::can connect',
+            'network::can send',
+            'network::can receive',
+            'other::uses network',
+            'other::alone'
+        ]
+
+    @test('should leave out tests whose prerequisites failed')
+    def test_failed():
+        output, stdout = run(make_runner(connects=False))
+
+        assert stdout == ['connect', 'alone']
+        assert '- can send (network::can connect failed)' in output
+        assert '- can receive (network::can send failed)' in output
+        assert '- uses network (network failed)' in output
+        assert '3 pending' in output
+
+    @test('should leave out tests whose prerequisites failed in workers')
+    def test_failed_parallel():
+        serial = run(make_runner(connects=False))
+        parallel = run(make_runner(connects=False, jobs=2))
+
+        assert parallel[0].split('passing')[0] == \
+                serial[0].split('passing')[0]
+        assert parallel[1] == ['connect', 'alone']
+
+    @test('should refuse cycles and unknown tests')
+    def test_refused():
+        runner = Runner()
+
+        @runner.suite('cycle')
+        def cycle_suite():
+            @runner.depends_on('b')
+            @runner.test('a')
+            def a_test():
+                pass
+
+            @runner.depends_on('a')
+            @runner.test('b')
+            def b_test():
+                pass
+
+        assert raises_exception(runner)
+
+        runner = Runner()
+
+        @runner.depends_on('missing')
+        @runner.test('a')
+        def a_test():
+            pass
+
+        assert raises_exception(runner)
+
+        runner = Runner()
+
+        @runner.suite('suite')
+        def own_suite():
+            @runner.depends_on('suite')
+            @runner.test('a')
+            def a_test():
+                pass
+
+        assert raises_exception(runner)
@@ -0,0 +1,88 @@
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from ccino.parallel import can_fork
+
+
+TESTS = '''
+from __future__ import print_function
+
+@suite_setup
+def root_setup():
+    print('root setup')
+
+@suite('one')
+def one_suite():
+    @test('passes')
+    def one_passes():
+        print('one passes')
+
+    @test('fails')
+    def one_fails():
+        assert False
+
+@suite('two')
+def two_suite():
+    @suite_setup
+    def two_setup():
+        print('two setup')
+
+    @test('passes')
+    def two_passes():
+        pass
+'''
+
+
+def ccino(args, **kwargs):
+    command = [sys.executable, '-m', 'ccino'] + list(args)
+
+    return subprocess.Popen(command, universal_newlines=True, **kwargs)
+
+
+def report(*args):
+    process = ccino(('--no-config', '-C') + args, stdout=subprocess.PIPE)
+    output = process.communicate()[0]
+
+    return process.returncode, re.sub(r'\(\d+[^)]*s\)', '', output)
+
+
+def start_worker():
+    worker = ccino(['worker', '--listen', '127.0.0.1:0'],
+            stderr=subprocess.PIPE)
+
+    line = worker.stderr.readline()
+
+    return worker, re.search(r'listening on (\S+)', line).group(1)
+
+
+@suite('distributed')
+def distributed_suite():
+
+    @test('should report the same as a serial run')
+    @skip(not can_fork())
+    def test_same_report():
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'test_remote.py')
+
+        with open(path, 'w') as test_file:
+            test_file.write(TESTS)
+
+        workers = [start_worker(), start_worker()]
+
+        try:
+            serial = report(path)
+            distributed = report(path, '--workers',
+                    ','.join(address for _, address in workers))
+        finally:
+            for worker, _ in workers:
+                worker.kill()
+                worker.wait()
+
+            shutil.rmtree(directory)
+
+        assert serial == distributed
+        assert serial[0] == 1
@@ -0,0 +1,128 @@
+from __future__ import print_function
+
+import sys
+
+PYTHON_3 = sys.version_info[0] == 3
+
+
+if PYTHON_3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+
+from ccino.runner import Runner
+from ccino.selection import IdTrie, get_tests
+from ccino.tags import parse_tags
+
+
+def make_runner(**options):
+    runner = Runner(output=StringIO(), **options)
+
+    @runner.tag('db')
+    @runner.suite('users')
+    def users_suite():
+        @runner.suite_setup
+        def users_setup():
+            print('users setup')
+
+        @runner.setup
+        def user_setup():
+            print('user setup')
+
+        @runner.test('login')
+        def login_test():
+            print('login')
+
+        @runner.tag('slow')
+        @runner.test('export')
+        def export_test():
+            print('export')
+
+    @runner.suite('math')
+    def math_suite():
+        @runner.suite_setup
+        def math_setup():
+            print('math setup')
+
+        @runner.test('add')
+        def add_test():
+            print('add')
+
+        @runner.suite('login')
+        def nested_suite():
+            @runner.test('sum')
+            def sum_test():
+                print('sum')
+
+    return runner
+
+
+def run(**options):
+    stdout = StringIO()
+    runner = make_runner(stdout=stdout, **options)
+
+    runner.run_tests()
+
+    return stdout.getvalue().split('\n')[:-1]
+
+
+@suite('grep')
+def grep_suite():
+
+    @test('should parse tag expressions')
+    def test_parse_tags():
+        match = parse_tags('db and not (slow or flaky)')
+
+        assert match(set(['db']))
+        assert not match(set(['db', 'slow']))
+        assert not match(set(['flaky']))
+
+        assert parse_tags('a or b and c')(set(['a']))
+        assert not parse_tags('not a')(set(['a']))
+
+    @test('should refuse bad tag expressions')
+    def test_bad_tags():
+        for expression in ('', 'a and', '(a', 'a)', 'a b', 'or a', 'a & b'):
+            try:
+                parse_tags(expression)
+            except ValueError:
+                pass
+            else:
+                assert False, expression
+
+    @test('should find tests and suites by id')
+    def test_trie():
+        tests = get_tests(make_runner().root)
+        trie = IdTrie(tests)
+
+        assert trie.find('users::login') == [0]
+        assert trie.find('math') == [2, 3]
+        assert trie.find('math::login') == [3]
+        assert trie.find('math::log') == []
+        assert trie.find('nothing') == []
+
+    @test('should only run tests matching the pattern')
+    def test_grep():
+        assert run(grep='login') == ['users setup', 'user setup', 'login',
+                'math setup', 'sum']
+        assert run(grep='^math::add$') == ['math setup', 'add']
+
+    @test('should only run tests matching the tags')
+    def test_tags():
+        assert run(tags='db and not slow') == ['users setup', 'user setup',
+                'login']
+        assert run(tags='not db') == ['math setup', 'add', 'sum']
+
+    @test('should only run tests with the ids')
+    def test_ids():
+        assert run(ids=['users::export']) == ['users setup', 'user setup',
+                'export']
+        assert run(ids=['math::login', 'users::login']) == ['users setup',
+                'user setup', 'login', 'math setup', 'sum']
+
+    @test('should combine the filters')
+    def test_combined():
+        assert run(grep='login', tags='db') == ['users setup', 'user setup',
+                'login']
+        assert run(grep='add', ids=['users']) == []
@@ -0,0 +1,117 @@
+from __future__ import print_function
+
+import sys
+
+PYTHON_3 = sys.version_info[0] == 3
+
+
+if PYTHON_3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+
+from ccino.runner import Runner
+
+
+def make_runner(fail, **options):
+    runner = Runner(color=False, **options)
+    connects = []
+
+    @runner.suite('db')
+    def db_suite():
+        @runner.suite_setup
+        def db_setup():
+            print('db setup')
+            assert fail != 'suite setup'
+
+        @runner.setup
+        def connect(test):
+            print('connect')
+            connects.append(test)
+            assert fail != 'setup'
+            assert fail != 'second setup' or len(connects) < 2
+
+        @runner.teardown
+        def disconnect(test):
+            print('disconnect')
+
+        @runner.suite_teardown
+        def db_teardown():
+            print('db teardown')
+
+        @runner.test('query')
+        def query_test():
+            print('query')
+
+        @runner.suite('nested')
+        def nested_suite():
+            @runner.suite_setup
+            def nested_setup():
+                print('nested setup')
+
+            @runner.suite_teardown
+            def nested_cleanup():
+                print('nested cleanup')
+
+            @runner.teardown
+            def nested_teardown(test):
+                print('nested teardown')
+
+            @runner.test('insert')
+            def insert_test():
+                print('insert')
+
+    @runner.suite('math')
+    def math_suite():
+        @runner.test('add')
+        def add_test():
+            print('add')
+
+    return runner
+
+
+def run(fail, **options):
+    output = StringIO()
+    stdout = StringIO()
+
+    make_runner(fail, output=output, stdout=stdout, **options).run_tests()
+
+    return stdout.getvalue().split('\n')[:-1], output.getvalue()
+
+
+@suite('hook failures')
+def hook_failure_suite():
+
+    @test('should skip the rest of the suite after a suite setup fails')
+    def test_suite_setup():
+        stdout, output = run('suite setup')
+
+        assert stdout == ['db setup', 'db teardown', 'add']
+        assert '1 passing' in output
+        assert '1 failing' in output
+        assert '2 pending' in output
+
+    @test('should run the teardowns after a setup fails')
+    def test_setup():
+        stdout, output = run('setup')
+
+        assert stdout == ['db setup', 'connect', 'disconnect', 'db teardown',
+                'add']
+        assert '2 pending' in output
+
+    @test('should clean up running suites inside after a setup fails')
+    def test_nested_setup():
+        stdout, output = run('second setup')
+
+        assert stdout == ['db setup', 'connect', 'query', 'disconnect',
+                'nested setup', 'connect', 'disconnect', 'nested teardown',
+                'nested cleanup', 'db teardown', 'add']
+        assert '1 pending' in output
+
+    @test('should stop the run when asked to')
+    def test_bail():
+        stdout, output = run('setup', bail_on_hook_failure=True)
+
+        assert stdout == ['db setup', 'connect']
+        assert 'pending' not in output
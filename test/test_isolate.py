@@ -0,0 +1,77 @@
+from __future__ import print_function
+
+import os
+import sys
+
+
+PYTHON_3 = sys.version_info[0] == 3
+
+
+if PYTHON_3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+
+from ccino.parallel import can_fork
+from ccino.runner import Runner
+
+
+@suite('isolate')
+def isolate_suite():
+
+    @test('should keep changes made by tests out of the run')
+    @skip(not can_fork())
+    def test_changes():
+        runner = Runner(isolate=True)
+        state = []
+
+        @runner.setup
+        def changes_setup():
+            print('setup {:d}'.format(len(state)))
+
+        @runner.test('changes')
+        def changes_test():
+            state.append(1)
+            print('changed')
+
+        @runner.test('sees no changes')
+        def changes_none():
+            assert not state
+
+        stdout_io = StringIO()
+
+        runner.output(StringIO())
+        runner.stdout(stdout_io)
+
+        assert runner.run_tests()
+        assert stdout_io.getvalue() == 'setup 0\nchanged\nsetup 0\n'
+
+    @test('should fail tests that kill their process')
+    @skip(not can_fork())
+    def test_crash():
+        runner = Runner(isolate=True)
+        ran = []
+
+        @runner.test('exits')
+        def crash_exits():
+            os._exit(3)
+
+        @runner.test('passes')
+        def crash_passes():
+            pass
+
+        @runner.teardown
+        def crash_teardown():
+            ran.append(1)
+
+        report_io = StringIO()
+
+        runner.output(report_io)
+        runner.stdout(StringIO())
+        runner.color(False)
+
+        assert not runner.run_tests()
+        assert 'test process exited with code 3' in report_io.getvalue()
+        assert '1 passing' in report_io.getvalue()
+        assert ran == [1, 1]
@@ -0,0 +1,141 @@
+from __future__ import print_function
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+PYTHON_3 = sys.version_info[0] == 3
+
+
+if PYTHON_3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+
+from ccino.journal import Journal
+from ccino.runner import Runner
+
+
+def make_runner(path, resume=False):
+    runner = Runner(journal=path, resume=resume, color=False)
+
+    @runner.suite('a')
+    def a_suite():
+        @runner.suite_setup
+        def a_setup():
+            print('a setup')
+
+        @runner.test('one')
+        def one_test():
+            print('one')
+
+        @runner.test('two')
+        def two_test():
+            print('two')
+            assert False
+
+    @runner.suite('b')
+    def b_suite():
+        @runner.suite_setup
+        def b_setup():
+            print('b setup')
+
+        @runner.test('three')
+        def three_test():
+            print('three')
+
+        @runner.test('four')
+        def four_test():
+            print('four')
+
+    return runner
+
+
+def run(path, resume=False):
+    output = StringIO()
+    stdout = StringIO()
+
+    runner = make_runner(path, resume)
+    runner.output(output)
+    runner.stdout(stdout)
+    runner.run_tests()
+
+    return stdout.getvalue().split('\n')[:-1], output.getvalue()
+
+
+def read_ids(path):
+    with open(path) as journal_file:
+        return [json.loads(line)['id'] for line in journal_file
+                if line.endswith('}\n')]
+
+
+@suite('journal')
+def journal_suite():
+
+    @setup
+    def make_dir(test):
+        global journal_dir
+
+        journal_dir = tempfile.mkdtemp()
+
+    @teardown
+    def remove_dir(test):
+        shutil.rmtree(journal_dir)
+
+    @test('should write each finished test')
+    def test_write():
+        path = os.path.join(journal_dir, 'journal')
+
+        run(path)
+
+        assert read_ids(path) == ['a::one', 'a::two', 'b::three', 'b::four']
+
+        records = Journal(path).read()
+
+        assert records['a::one'] == [('pass', None)]
+        assert records['a::two'][0][0] == 'fail'
+
+    @test('should resume with the tests that did not finish')
+    def test_resume():
+        path = os.path.join(journal_dir, 'journal')
+
+        run(path)
+
+        # Like a run killed during b::three, in the middle of a line.
+        with open(path) as journal_file:
+            lines = journal_file.readlines()[:2]
+
+        with open(path, 'w') as journal_file:
+            journal_file.writelines(lines + ['{"id": "b::th'])
+
+        stdout, output = run(path, resume=True)
+
+        assert stdout == ['b setup', 'three', 'four']
+        assert '3 passing' in output
+        assert '2 tests resumed from' in output
+        assert '1 failing' in output
+        assert 'AssertionError' in output
+
+        assert read_ids(path) == ['a::one', 'a::two', 'b::three', 'b::four']
+
+    @test('should start over without resuming')
+    def test_start_over():
+        path = os.path.join(journal_dir, 'journal')
+
+        run(path)
+        stdout, output = run(path)
+
+        assert stdout == ['a setup', 'one', 'two', 'b setup', 'three', 'four']
+        assert len(read_ids(path)) == 4
+
+    @test('should run everything when the journal is missing')
+    def test_missing():
+        path = os.path.join(journal_dir, 'missing')
+
+        stdout, output = run(path, resume=True)
+
+        assert stdout == ['a setup', 'one', 'two', 'b setup', 'three', 'four']
+        assert 'resumed' not in output
@@ -0,0 +1,124 @@
+from __future__ import print_function
+
+import shutil
+import sys
+import tempfile
+
+
+PYTHON_3 = sys.version_info[0] == 3
+
+
+if PYTHON_3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+
+from ccino.cache import Cache
+from ccino.runner import Runner
+
+
+def make_runner(cache, failing, **options):
+    runner = Runner(cache=cache, **options)
+
+    @runner.suite('one')
+    def one_suite():
+        @runner.suite_setup
+        def one_setup():
+            print('one setup')
+
+        for name in ('a', 'b', 'c'):
+            @runner.test(name)
+            def one_test(test):
+                print('one ' + test.name)
+
+                assert test.name not in failing
+
+    @runner.suite('two')
+    def two_suite():
+        @runner.setup
+        def two_setup():
+            print('two setup')
+
+            assert 'two setup' not in failing
+
+        @runner.test('d')
+        def two_test():
+            print('two d')
+
+    @runner.suite('three')
+    def three_suite():
+        @runner.test('e')
+        def three_test():
+            print('three e')
+
+    return runner
+
+
+def run(runner):
+    stdout_io = StringIO()
+
+    runner.output(StringIO())
+    runner.stdout(stdout_io)
+
+    runner.run_tests()
+
+    return stdout_io.getvalue().split('\n')[:-1]
+
+
+@suite('last failed')
+def last_failed_suite():
+
+    @setup
+    def make_cache(test):
+        global cache_dir
+
+        cache_dir = tempfile.mkdtemp()
+
+    @teardown
+    def remove_cache(test):
+        shutil.rmtree(cache_dir)
+
+    @test('should only run the tests that failed')
+    def test_last_failed():
+        cache = Cache(cache_dir)
+
+        run(make_runner(cache, ['b', 'two setup']))
+
+        assert cache.get('failures') == {
+            'tests': ['one::b'],
+            'hooks': ['two::two_setup']
+        }
+
+        assert run(make_runner(cache, ['b'], last_failed=True)) == \
+                ['one setup', 'one b', 'two setup', 'two d']
+
+        assert cache.get('failures') == {'tests': ['one::b'], 'hooks': []}
+
+        assert run(make_runner(cache, [], last_failed=True)) == \
+                ['one setup', 'one b']
+
+        assert cache.get('failures') == {'tests': [], 'hooks': []}
+
+        assert len(run(make_runner(cache, [], last_failed=True))) == 7
+
+    @test('should keep failures of tests that did not run')
+    def test_keep_failures():
+        cache = Cache(cache_dir)
+
+        run(make_runner(cache, ['a', 'c']))
+        run(make_runner(cache, ['a'], last_failed=True, bail=True))
+
+        assert cache.get('failures')['tests'] == ['one::a', 'one::c']
+
+    @test('should run the tests that failed first')
+    def test_failed_first():
+        cache = Cache(cache_dir)
+
+        run(make_runner(cache, ['c']))
+        cache.set('failures', {'tests': ['one::c', 'three::e'], 'hooks': []})
+
+        assert run(make_runner(cache, [], failed_first=True)) == [
+            'one setup', 'one c', 'one a', 'one b', 'three e', 'two setup',
+            'two d'
+        ]
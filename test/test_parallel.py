@@ -0,0 +1,119 @@
+from __future__ import print_function
+
+import os
+import re
+import sys
+
+
+PYTHON_3 = sys.version_info[0] == 3
+
+
+if PYTHON_3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+
+from ccino.parallel import can_fork, schedule
+from ccino.runner import Runner
+
+
+def make_runner(**options):
+    runner = Runner(**options)
+
+    @runner.suite_setup
+    def root_setup():
+        print('root setup')
+
+    @runner.suite('one')
+    def one_suite():
+        @runner.suite_setup
+        def one_setup():
+            print('one setup')
+
+        @runner.test('passes')
+        def one_passes():
+            print('one passes')
+
+        @runner.test('fails')
+        def one_fails():
+            assert False
+
+    @runner.suite('two')
+    def two_suite():
+        @runner.test('pending')
+        @runner.skip
+        def two_pending():
+            pass
+
+        @runner.test('passes')
+        def two_passes():
+            print('two passes')
+
+    @runner.test('top level')
+    def top_level():
+        print('top level')
+
+    return runner
+
+
+def run(runner):
+    report_io = StringIO()
+    stdout_io = StringIO()
+
+    runner.output(report_io)
+    runner.stdout(stdout_io)
+
+    runner.reporter('debug')
+
+    success = runner.run_tests()
+
+    report = re.sub(r'took \d+\.\d+ seconds', '', report_io.getvalue())
+
+    return success, report, stdout_io.getvalue()
+
+
+@suite('parallel')
+def parallel_suite():
+
+    @test('should report the same as a serial run')
+    @skip(not can_fork())
+    def test_same_report():
+        serial = run(make_runner())
+        parallel = run(make_runner(jobs=3))
+
+        assert serial == parallel
+        assert not parallel[0]
+
+    @test('should report a dead worker as a failure')
+    @skip(not can_fork())
+    def test_dead_worker():
+        runner = Runner(jobs=2)
+
+        @runner.suite('dies')
+        def dies_suite():
+            @runner.test('exits')
+            def dies_exits():
+                os._exit(3)
+
+        @runner.suite('lives')
+        def lives_suite():
+            @runner.test('passes')
+            def lives_passes():
+                pass
+
+        success, report, stdout = run(runner)
+
+        assert not success
+        assert 'test \'dies\' failed (0)' in report
+        assert 'test \'passes\' passed' in report
+
+    @test('should start the longest units first')
+    def test_schedule():
+        runner = make_runner()
+        units = runner._root.tests
+
+        durations = {'one': 1.0, 'two': 3.0}
+
+        assert schedule(units, durations) == [1, 2, 0]
+        assert schedule(units, {}) == [0, 1, 2]
@@ -0,0 +1,200 @@
+from __future__ import print_function
+
+import gc
+import sys
+import weakref
+
+PYTHON_3 = sys.version_info[0] == 3
+
+
+if PYTHON_3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+
+from ccino.reporters.event import EventRecorder
+from ccino.runner import Runner
+
+
+class Row(object):
+    """Case value that can be watched with a weak reference."""
+
+    def __init__(self, number):
+        self.number = number
+
+
+def run(runner):
+    output = StringIO()
+    stdout = StringIO()
+
+    runner.output(output)
+    runner.stdout(stdout)
+    runner.color(False)
+
+    runner.run_tests()
+
+    return output.getvalue(), stdout.getvalue().split('\n')[:-1]
+
+
+def record(runner):
+    recorder = EventRecorder()
+
+    runner.root.run(recorder.reporter,
+            {'bail': False, 'bail_on_hook_failure': False, 'isolate': False,
+            'loop': None, 'coverage': None, 'providers': None})
+
+    return [event for event in recorder.events
+            if event[0].startswith('test_')]
+
+
+@suite('params')
+def params_suite():
+
+    @test('should report every case as a test')
+    def test_cases():
+        runner = Runner()
+
+        @runner.fixture
+        def offset():
+            return 1
+
+        @runner.suite('math')
+        def math_suite():
+            @runner.setup
+            def math_setup():
+                print('setup')
+
+            @runner.params(lambda: ((i, i + 1) for i in range(3)),
+                    ids=lambda case: 'n={:d}'.format(case[0]))
+            @runner.test('adds')
+            def adds_test(n, expected, offset):
+                print(n)
+                assert n + offset == expected
+                assert n != 1
+
+            @runner.params(['a', 'b'], ids=['first', 'second'])
+            @runner.test('names')
+            def names_test(name):
+                print(name)
+
+            @runner.params(iter(()))
+            @runner.test('empty')
+            def empty_test(case):
+                pass
+
+        output, stdout = run(runner)
+
+        assert stdout == ['setup', '0', '1', '2', 'setup', 'a', 'b', 'setup']
+        assert 'adds[n=0]' in output
+        assert '0) adds[n=1]' in output
+        assert 'names[second]' in output
+        assert '- empty (no cases)' in output
+        assert '4 passing' in output
+        assert '1 failing' in output
+
+    @test('should only keep the values of failed cases')
+    def test_memory():
+        runner = Runner()
+        rows = []
+
+        def make_rows():
+            for i in range(100):
+                row = Row(i)
+                rows.append(weakref.ref(row))
+                yield row
+
+        @runner.params(make_rows)
+        @runner.test('rows')
+        def rows_test(row):
+            assert row.number != 42
+
+        events = record(runner)
+        gc.collect()
+
+        assert len(events) == 100
+        assert [i for i, row in enumerate(rows) if row() is not None] == [42]
+        assert [case.id for kind, case, _ in events
+                if kind == 'test_fail'] == ['rows[42]']
+        assert runner.root.tests[0].failed
+
+    @test('should fail the test when making the cases fails')
+    def test_broken():
+        runner = Runner()
+
+        def make_rows():
+            yield 1
+            raise ValueError('bad table')
+
+        @runner.params(make_rows)
+        @runner.test('rows')
+        def rows_test(row):
+            pass
+
+        events = record(runner)
+
+        assert [(kind, runnable.name) for kind, runnable, _ in events] == [
+            ('test_pass', 'rows[0]'),
+            ('test_fail', 'rows')
+        ]
+        assert 'bad table' in events[1][2][0]
+
+
+@suite('batch')
+def batch_suite():
+
+    @test('should report every case of a batch as a test')
+    def test_batches():
+        runner = Runner()
+        sizes = []
+
+        @runner.batch(lambda: ((i, i * i) for i in range(10)), size=4)
+        @runner.test('squares')
+        def squares_test(n, square):
+            sizes.append(len(n))
+
+            return [a * a == b and a != 5 for a, b in zip(n, square)]
+
+        @runner.batch(range(3), size=2, ids=['a', 'b', 'c'])
+        @runner.test('messages')
+        def messages_test(n):
+            return [None, ValueError('bad'), 'one is bad'][:len(n)]
+
+        events = record(runner)
+
+        assert sizes == [4, 4, 2]
+        assert [(kind, case.name) for kind, case, _ in events
+                if kind == 'test_fail'] == [
+            ('test_fail', 'squares[5]'),
+            ('test_fail', 'messages[b]')
+        ]
+        assert len(events) == 13
+        assert events[-2][2][0] == 'ValueError: bad\n'
+        assert events[-1][0] == 'test_pass'
+
+    @test('should fail every case of a batch that raises')
+    def test_raises():
+        runner = Runner()
+
+        @runner.batch(range(5), size=2)
+        @runner.test('numbers')
+        def numbers_test(n):
+            assert 3 not in n
+
+        @runner.batch(range(2))
+        @runner.test('short')
+        def short_test(n):
+            return [True]
+
+        events = record(runner)
+
+        assert [(kind, case.name) for kind, case, _ in events] == [
+            ('test_pass', 'numbers[0]'),
+            ('test_pass', 'numbers[1]'),
+            ('test_fail', 'numbers[2]'),
+            ('test_fail', 'numbers[3]'),
+            ('test_pass', 'numbers[4]'),
+            ('test_fail', 'short[0]'),
+            ('test_fail', 'short[1]')
+        ]
+        assert 'returned 1 results' in events[-1][2][0]
@@ -0,0 +1,188 @@
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+PYTHON_3 = sys.version_info[0] == 3
+
+
+if PYTHON_3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+
+from ccino.cache import Cache
+from ccino.fixtures import Provider
+from ccino.persist import FixtureCache
+from ccino.results import ResultCache
+from ccino.runner import Runner
+
+
+def run(runner):
+    output = StringIO()
+    stdout = StringIO()
+
+    runner.output(output)
+    runner.stdout(stdout)
+    runner.color(False)
+
+    runner.run_tests()
+
+    return output.getvalue(), stdout.getvalue().split('\n')[:-1]
+
+
+def make_runner(path, data_path):
+    runner = Runner()
+    runner.fixture_cache(path)
+
+    @runner.fixture(scope='session', persist=True, inputs=[data_path])
+    def data():
+        print('build data')
+
+        with open(data_path) as data_file:
+            return {'rows': data_file.read().split(), 'raw': bytearray(64)}
+
+    @runner.fixture(persist=True)
+    def count(data):
+        print('build count')
+        return len(data['rows'])
+
+    @runner.test('reads')
+    def reads_test(data, count):
+        print('{} {:d} {:d}'.format(data['rows'][0], count,
+                len(data['raw'])))
+
+    return runner
+
+
+def write(path, text):
+    with open(path, 'w') as data_file:
+        data_file.write(text)
+
+
+@suite('persistent fixtures')
+def persist_suite():
+
+    @fixture
+    def directory():
+        path = tempfile.mkdtemp()
+        yield path
+        shutil.rmtree(path)
+
+    @test('should build values once across runs')
+    def test_kept(directory):
+        path = os.path.join(directory, 'fixtures')
+        data_path = os.path.join(directory, 'data.txt')
+        write(data_path, 'a b c')
+
+        output, stdout = run(make_runner(path, data_path))
+
+        assert stdout == ['build data', 'build count', 'a 3 64']
+
+        output, stdout = run(make_runner(path, data_path))
+
+        assert stdout == ['a 3 64']
+        assert '1 passing' in output
+
+    @test('should build values again when inputs change')
+    def test_inputs(directory):
+        path = os.path.join(directory, 'fixtures')
+        data_path = os.path.join(directory, 'data.txt')
+        write(data_path, 'a b c')
+
+        run(make_runner(path, data_path))
+        write(data_path, 'x y')
+
+        output, stdout = run(make_runner(path, data_path))
+
+        assert stdout == ['build data', 'build count', 'x 2 64']
+
+    @test('should run cached tests again when inputs change')
+    def test_results(directory):
+        path = os.path.join(directory, 'fixtures')
+        data_path = os.path.join(directory, 'data.txt')
+        results = ResultCache(os.path.join(directory, 'results'))
+        write(data_path, 'a b c')
+
+        def run_cached():
+            runner = make_runner(path, data_path)
+            runner.results(results)
+
+            return run(runner)[1]
+
+        run_cached()
+
+        assert run_cached() == []
+
+        write(data_path, 'x y')
+
+        assert run_cached() == ['build data', 'build count', 'x 2 64']
+
+    @test('should remove the least recently used values')
+    def test_evict(directory):
+        cache = FixtureCache(directory)
+        provider = Provider(lambda: None, name='value')
+
+        keys = [cache.get_key(provider, [i]) for i in range(3)]
+
+        for i, key in enumerate(keys):
+            assert cache.save(key, bytearray(100))
+            os.utime(cache._file(key), (i, i))
+
+        # Room for the three values there are.
+        size = os.path.getsize(cache._file(keys[0]))
+        cache = FixtureCache(directory, max_size=3 * size)
+
+        assert cache.load(keys[0])[0]
+        assert cache.save(cache.get_key(provider, [3]), bytearray(100))
+
+        assert cache.load(keys[0])[0]
+        assert not cache.load(keys[1])[0]
+
+        cache.clear()
+
+        assert not cache.load(keys[0])[0]
+        assert os.listdir(directory) == []
+
+    @test('should save the same values from several threads at once')
+    def test_threads(directory):
+        fixtures = FixtureCache(os.path.join(directory, 'fixtures'))
+        cache = Cache(os.path.join(directory, 'cache'))
+        key = fixtures.get_key(Provider(lambda: None, name='value'), [])
+        errors = []
+
+        def save():
+            try:
+                for i in range(20):
+                    assert fixtures.save(key, bytearray(1000))
+                    cache.set('value', i)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=save) for _ in range(8)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert fixtures.load(key) == (True, bytearray(1000))
+        assert cache.get('value') in range(20)
+
+    @test('should refuse generators')
+    def test_generator():
+        def value():
+            yield 1
+
+        try:
+            Provider(value, persist=True)
+        except ValueError:
+            return
+
+        assert False
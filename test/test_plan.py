@@ -0,0 +1,125 @@
+from __future__ import print_function
+
+from ccino.fixtures import runnable as runnable_module
+from ccino.fixtures.plan import RUN
+from ccino.reporters.event import EventRecorder
+from ccino.runner import Runner
+
+
+def make_runner():
+    runner = Runner()
+
+    @runner.suite('outer')
+    def outer_suite():
+        @runner.suite_setup('outer suite setup')
+        def outer_suite_setup():
+            pass
+
+        @runner.setup('outer setup')
+        def outer_setup():
+            pass
+
+        @runner.teardown('outer teardown')
+        def outer_teardown():
+            pass
+
+        @runner.test('first')
+        def first_test():
+            pass
+
+        @runner.suite('inner')
+        def inner_suite():
+            @runner.setup('inner setup')
+            def inner_setup():
+                pass
+
+            @runner.test('second')
+            def second_test(test):
+                pass
+
+        @runner.skip
+        @runner.suite('skipped')
+        def skipped_suite():
+            @runner.suite_setup('skipped suite setup')
+            def skipped_suite_setup():
+                pass
+
+            @runner.setup('skipped setup')
+            def skipped_setup():
+                pass
+
+            @runner.test('third')
+            def third_test():
+                pass
+
+    return runner
+
+
+def run(runner):
+    recorder = EventRecorder()
+
+    runner.root.run(recorder.reporter,
+            {'bail': False, 'bail_on_hook_failure': False, 'isolate': False,
+            'loop': None, 'coverage': None, 'providers': None})
+
+    return [(kind, runnable.name) for kind, runnable, _ in recorder.events]
+
+
+@suite('plan')
+def plan_suite():
+
+    @test('should report events in the running order')
+    def test_order():
+        assert run(make_runner()) == [
+            ('suite_start', 'root'),
+            ('suite_start', 'outer'),
+            ('hook_pass', 'outer suite setup'),
+            ('hook_pass', 'outer setup'),
+            ('test_pass', 'first'),
+            ('hook_pass', 'outer teardown'),
+            ('suite_start', 'inner'),
+            ('hook_pass', 'outer setup'),
+            ('hook_pass', 'inner setup'),
+            ('test_pass', 'second'),
+            ('hook_pass', 'outer teardown'),
+            ('suite_end', 'inner'),
+            ('suite_start', 'skipped'),
+            ('test_pending', 'third'),
+            ('suite_end', 'skipped'),
+            ('suite_end', 'outer'),
+            ('suite_end', 'root')
+        ]
+
+    @test('should leave hooks of skipped suites out of the plan')
+    def test_skipped_hooks():
+        plan = make_runner().root.compile()
+        names = [runnable.name for kind, runnable in plan.steps
+                if kind == RUN]
+
+        assert 'skipped suite setup' not in names
+        assert 'skipped setup' not in names
+        assert 'third' in names
+
+    @test('should read the number of arguments once')
+    def test_arity_cached():
+        calls = []
+        get_num_args = runnable_module.get_num_args
+
+        def counting_get_num_args(func):
+            calls.append(func)
+            return get_num_args(func)
+
+        runnable_module.get_num_args = counting_get_num_args
+
+        try:
+            runner = make_runner()
+
+            run(runner)
+            first = len(calls)
+
+            run(runner)
+        finally:
+            runnable_module.get_num_args = get_num_args
+
+        assert first > 0
+        assert len(calls) == first
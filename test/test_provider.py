@@ -0,0 +1,246 @@
+from __future__ import print_function
+
+import sys
+import threading
+
+PYTHON_3 = sys.version_info[0] == 3
+
+
+if PYTHON_3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+
+from ccino.exceptions import CcinoException
+from ccino.parallel import can_fork
+from ccino.runner import Runner
+
+
+def run(runner):
+    output = StringIO()
+    stdout = StringIO()
+
+    runner.output(output)
+    runner.stdout(stdout)
+    runner.color(False)
+
+    runner.run_tests()
+
+    return output.getvalue(), stdout.getvalue().split('\n')[:-1]
+
+
+def make_runner():
+    runner = Runner()
+    counts = {'db': 0, 'table': 0, 'row': 0}
+
+    @runner.fixture(scope='session')
+    def db():
+        counts['db'] += 1
+        print('open db')
+        yield 'db'
+        print('close db')
+
+    @runner.suite('users')
+    def users_suite():
+        @runner.fixture(scope='suite')
+        def table(db):
+            counts['table'] += 1
+            return db + '.users'
+
+        @runner.fixture
+        def row(table):
+            counts['row'] += 1
+            print('make row')
+            yield table + '[0]'
+            print('drop row')
+
+        @runner.setup
+        def check_row(row):
+            print('setup ' + row)
+
+        @runner.test('reads')
+        def reads_test(row, table):
+            print('reads ' + row)
+
+        @runner.test('writes')
+        def writes_test(row):
+            print('writes ' + row)
+
+    @runner.suite('other')
+    def other_suite():
+        @runner.suite_setup
+        def other_setup(db):
+            print('other setup ' + db)
+
+        @runner.test('takes itself')
+        def itself_test(test):
+            print(test.name)
+
+    return runner, counts
+
+
+def raises_exception(runner):
+    try:
+        run(runner)
+    except CcinoException:
+        return True
+
+    return False
+
+
+@suite('providers')
+def provider_suite():
+
+    @test('should build values once per scope')
+    def test_scopes():
+        runner, counts = make_runner()
+        output, stdout = run(runner)
+
+        assert counts == {'db': 1, 'table': 1, 'row': 2}
+        assert '3 passing' in output
+
+        assert stdout == [
+            'open db',
+            'make row',
+            'setup db.users[0]',
+            'reads db.users[0]',
+            'drop row',
+            'make row',
+            'setup db.users[0]',
+            'writes db.users[0]',
+            'drop row',
+            'other setup db',
+            'takes itself',
+            'close db'
+        ]
+
+    @test('should fail tests whose values could not be built')
+    def test_broken():
+        runner = Runner()
+
+        @runner.fixture
+        def broken():
+            raise KeyError('broken')
+
+        @runner.test('a')
+        def a_test(broken):
+            pass
+
+        @runner.test('b')
+        def b_test():
+            pass
+
+        output, stdout = run(runner)
+
+        assert '1 passing' in output
+        assert '1 failing' in output
+        assert 'KeyError' in output
+
+    @test('should build values for different tests at the same time')
+    @skip(not PYTHON_3)
+    def test_concurrent():
+        runner = Runner()
+        barrier = threading.Barrier(2, timeout=5)
+
+        @runner.suite('waits')
+        @runner.concurrent(max_workers=2)
+        def waits_suite():
+            @runner.fixture
+            def waits():
+                barrier.wait()
+
+            @runner.test('first')
+            def first_test(waits):
+                pass
+
+            @runner.test('second')
+            def second_test(waits):
+                pass
+
+        output, stdout = run(runner)
+
+        assert '2 passing' in output
+
+    @test('should share session values with worker processes')
+    @skip(not can_fork())
+    def test_jobs():
+        runner, counts = make_runner()
+        runner.jobs(2)
+
+        output, stdout = run(runner)
+
+        assert '3 passing' in output
+        assert stdout.count('open db') == 1
+        assert stdout.count('close db') == 1
+        assert stdout[0] == 'open db' and stdout[-1] == 'close db'
+
+    @test('should report values finished by worker processes')
+    @skip(not can_fork())
+    def test_jobs_close():
+        runner = Runner(jobs=2)
+
+        @runner.fixture(scope='file')
+        def data():
+            print('open data')
+            yield 'data'
+            print('close data')
+
+        for name in ('a', 'b'):
+            @runner.suite(name)
+            def data_suite():
+                @runner.test('reads')
+                def reads_test(data):
+                    pass
+
+        output, stdout = run(runner)
+
+        assert '2 passing' in output
+        assert stdout.count('open data') == 2
+        assert stdout.count('close data') == 2
+
+    @test('should refuse unknown arguments, cycles and short scopes')
+    def test_refused():
+        runner = Runner()
+
+        @runner.fixture
+        def known():
+            pass
+
+        @runner.test('a')
+        def a_test(known, unknown):
+            pass
+
+        assert raises_exception(runner)
+
+        runner = Runner()
+
+        @runner.fixture
+        def first(second):
+            pass
+
+        @runner.fixture
+        def second(first):
+            pass
+
+        @runner.test('a')
+        def b_test(first):
+            pass
+
+        assert raises_exception(runner)
+
+        runner = Runner()
+
+        @runner.fixture
+        def short():
+            pass
+
+        @runner.fixture(scope='session')
+        def long(short):
+            pass
+
+        @runner.test('a')
+        def c_test(long):
+            pass
+
+        assert raises_exception(runner)
@@ -0,0 +1,124 @@
+from __future__ import print_function
+
+import os
+import shutil
+import sys
+import tempfile
+
+
+PYTHON_3 = sys.version_info[0] == 3
+
+
+if PYTHON_3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+
+from ccino.results import ResultCache
+from ccino.runner import Runner
+
+
+TEST_SOURCE = '''
+import helper
+
+
+def add_tests(runner):
+    @runner.suite('suite')
+    def suite():
+        @runner.suite_setup
+        def suite_setup():
+            print('setup')
+
+        @runner.test('test')
+        def test():
+            print('test')
+
+            assert helper.VALUE == 1
+
+    @runner.test('top level test')
+    def top_level_test():
+        print('top level')
+'''
+
+
+def write(path, text):
+    with open(path, 'w') as source_file:
+        source_file.write(text)
+
+
+def load_tests(runner):
+    sys.modules.pop('helper', None)
+
+    namespace = {'__name__': 'generated_test'}
+    path = os.path.join(source_dir, 'test_generated.py')
+
+    with open(path) as source_file:
+        code = compile(source_file.read(), path, 'exec')
+
+    exec(code, namespace)
+
+    namespace['add_tests'](runner)
+
+
+def run(**options):
+    runner = Runner(results=ResultCache(results_dir), **options)
+
+    load_tests(runner)
+
+    stdout_io = StringIO()
+
+    runner.output(StringIO())
+    runner.stdout(stdout_io)
+
+    passed = runner.run_tests()
+
+    return passed, stdout_io.getvalue().split('\n')[:-1]
+
+
+@suite('result cache')
+def result_cache_suite():
+
+    @setup
+    def make_dirs(test):
+        global source_dir, results_dir
+
+        source_dir = tempfile.mkdtemp()
+        results_dir = tempfile.mkdtemp()
+
+        write(os.path.join(source_dir, 'test_generated.py'), TEST_SOURCE)
+        write(os.path.join(source_dir, 'helper.py'), 'VALUE = 1\n')
+
+        sys.path.insert(0, source_dir)
+
+    @teardown
+    def remove_dirs(test):
+        sys.path.remove(source_dir)
+        sys.modules.pop('helper', None)
+
+        shutil.rmtree(source_dir)
+        shutil.rmtree(results_dir)
+
+    @test('should report passed files as passed without running them')
+    def test_cached():
+        assert run() == (True, ['setup', 'test', 'top level'])
+        assert run() == (True, [])
+
+    @test('should run files again when an imported module changes')
+    def test_changed_module():
+        assert run() == (True, ['setup', 'test', 'top level'])
+
+        write(os.path.join(source_dir, 'helper.py'), 'VALUE = 2\n')
+
+        assert run() == (False, ['setup', 'test', 'top level'])
+        assert run() == (False, ['setup', 'test', 'top level'])
+
+        write(os.path.join(source_dir, 'helper.py'), 'VALUE = 1\n')
+
+        assert run() == (True, [])
+
+    @test('should key results by options')
+    def test_options():
+        assert run() == (True, ['setup', 'test', 'top level'])
+        assert run(isolate=True) == (True, ['setup', 'test', 'top level'])
+        assert run(isolate=True) == (True, [])
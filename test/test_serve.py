@@ -0,0 +1,70 @@
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from ccino.parallel import can_fork
+
+
+TESTS = '''
+from __future__ import print_function
+
+@suite('served')
+def served_suite():
+    @test('passes')
+    def served_passes():
+        print('served passes')
+
+    @test('fails')
+    def served_fails():
+        assert False
+'''
+
+
+def ccino(args, **kwargs):
+    command = [sys.executable, '-m', 'ccino'] + list(args)
+
+    return subprocess.Popen(command, universal_newlines=True, **kwargs)
+
+
+def report(*args):
+    process = ccino(args, stdout=subprocess.PIPE)
+    output = process.communicate()[0]
+
+    return process.returncode, re.sub(r'\(\d+[^)]*s\)', '', output)
+
+
+@suite('serve')
+def serve_suite():
+
+    @test('should run tests for clients that connect')
+    @skip(not can_fork())
+    def test_connect():
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'test_served.py')
+        socket_path = os.path.join(directory, 'serve.sock')
+
+        with open(path, 'w') as test_file:
+            test_file.write(TESTS)
+
+        server = ccino(['serve', '--socket', socket_path],
+                stderr=subprocess.PIPE)
+
+        try:
+            server.stderr.readline()
+
+            direct = report('--no-config', '-C', path)
+            served = report('--connect', socket_path, '--no-config', '-C',
+                    path)
+            served_again = report('--no-config', '-C', path,
+                    '--connect=' + socket_path)
+        finally:
+            server.kill()
+            server.wait()
+
+            shutil.rmtree(directory)
+
+        assert direct == served == served_again
+        assert direct[0] == 1
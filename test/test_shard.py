@@ -0,0 +1,141 @@
+from __future__ import print_function
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+
+PYTHON_3 = sys.version_info[0] == 3
+
+
+if PYTHON_3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+
+from ccino.cache import Cache
+from ccino.runner import Runner
+from ccino.selection import get_tests, shard
+
+
+def make_runner(index=None, count=None, durations=None, **options):
+    runner = Runner(**options)
+
+    if index is not None:
+        runner.shard(index, count, durations=durations)
+
+    @runner.suite('one')
+    def one_suite():
+        @runner.suite_setup
+        def one_setup():
+            print('one setup')
+
+        for i in range(4):
+            @runner.test('test {:d}'.format(i))
+            def one_test():
+                print('one test')
+
+    @runner.suite('two')
+    def two_suite():
+        @runner.suite_setup
+        def two_setup():
+            print('two setup')
+
+        @runner.test('test')
+        def two_test():
+            print('two test')
+
+    return runner
+
+
+def run(runner):
+    stdout_io = StringIO()
+
+    runner.output(StringIO())
+    runner.stdout(stdout_io)
+
+    assert runner.run_tests()
+
+    return stdout_io.getvalue()
+
+
+@suite('shard')
+def shard_suite():
+
+    @test('should pick every test exactly once')
+    def test_exactly_once():
+        tests = get_tests(make_runner().root)
+        durations = {tests[0].id: 3, tests[2].id: 1}
+
+        for count in (1, 2, 3, 7):
+            for known in (None, durations):
+                picked = []
+
+                for index in range(1, count + 1):
+                    picked += shard(tests, index, count, known)
+
+                assert sorted(picked) == list(range(len(tests)))
+
+    @test('should balance shards by duration')
+    def test_balance():
+        tests = get_tests(make_runner().root)
+        durations = dict(zip([test.id for test in tests], [5, 1, 1, 1, 1]))
+
+        assert shard(tests, 1, 2, durations) == [0]
+        assert shard(tests, 2, 2, durations) == [1, 2, 3, 4]
+
+    @test('should only run suite hooks on shards that need them')
+    def test_hooks():
+        first = run(make_runner(1, 2))
+        second = run(make_runner(2, 2))
+
+        assert first == 'one setup\n' + 'one test\n' * 2
+        assert second == 'one setup\n' + 'one test\n' * 2 + \
+                'two setup\ntwo test\n'
+
+    @test('should not balance shards with durations in the cache')
+    def test_cache():
+        cache_dir = tempfile.mkdtemp()
+
+        try:
+            cache = Cache(cache_dir)
+            ids = [test.id for test in get_tests(make_runner().root)]
+            cache.set('durations', dict(zip(ids, [5, 1, 1, 1, 1])))
+
+            # The first shard records its own durations before the
+            # second one starts.
+            first = run(make_runner(1, 2, cache=cache))
+            second = run(make_runner(2, 2, cache=cache))
+
+            assert first == 'one setup\n' + 'one test\n' * 2
+            assert second == 'one setup\n' + 'one test\n' * 2 + \
+                    'two setup\ntwo test\n'
+        finally:
+            shutil.rmtree(cache_dir)
+
+    @test('should balance shards with a durations file')
+    def test_durations_file():
+        directory = tempfile.mkdtemp()
+
+        try:
+            ids = [test.id for test in get_tests(make_runner().root)]
+            path = os.path.join(directory, 'durations.json')
+
+            with open(path, 'w') as durations_file:
+                json.dump(dict(zip(ids, [5, 1, 1, 1, 1])), durations_file)
+
+            first = make_runner(1, 2, durations=path).plan()
+            second = make_runner(2, 2, durations=path).plan()
+
+            assert [test.id for test in first] == ids[:1]
+            assert [test.id for test in second] == ids[1:]
+        finally:
+            shutil.rmtree(directory)
+
+    @test('should reject shards out of range')
+    @raises(ValueError)
+    def test_out_of_range():
+        Runner().shard(3, 2)
@@ -0,0 +1,141 @@
+from __future__ import print_function
+
+import shutil
+import sys
+import tempfile
+
+PYTHON_3 = sys.version_info[0] == 3
+
+
+if PYTHON_3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+
+from ccino.cache import Cache
+from ccino.runner import Runner
+from ccino.selection import get_tests, record_history, time_budget
+
+
+def make_runner(**options):
+    runner = Runner(**options)
+
+    @runner.suite('cheap')
+    def cheap_suite():
+        @runner.test('a')
+        def a_test():
+            print('a')
+
+        @runner.test('b')
+        def b_test():
+            print('b')
+
+    @runner.suite('slow')
+    def slow_suite():
+        @runner.suite_setup
+        def slow_setup():
+            print('slow setup')
+
+        @runner.test('c')
+        def c_test():
+            print('c')
+
+        @runner.test('d')
+        def d_test():
+            print('d')
+
+    return runner
+
+
+def pick(seconds, durations, history=None):
+    tests = get_tests(make_runner().root)
+    picked = time_budget(tests, seconds, durations, history)
+
+    if picked is None:
+        return None
+
+    return [tests[i].id for i in picked]
+
+
+DURATIONS = {
+    'cheap::a': 1,
+    'cheap::b': 1,
+    'slow::c': 1,
+    'slow::d': 1,
+    'slow::slow_setup': 5
+}
+
+
+@suite('time budget')
+def time_budget_suite():
+
+    @test('should pick the most failures per second')
+    def test_pick():
+        history = {'cheap::a': 0.1, 'cheap::b': 0.8, 'slow::c': 0.9}
+
+        assert pick(1, DURATIONS, history) == ['cheap::b']
+        assert pick(2, DURATIONS, history) == ['cheap::a', 'cheap::b']
+        assert pick(7, DURATIONS, history) == ['cheap::b', 'slow::c']
+        assert pick(8, DURATIONS, history) == \
+                ['cheap::b', 'slow::c', 'slow::d']
+
+    @test('should pay for suite hooks once')
+    def test_suite_hooks():
+        assert pick(0.5, DURATIONS) == []
+        assert pick(8, DURATIONS) == ['cheap::a', 'cheap::b', 'slow::c']
+        assert pick(9, DURATIONS) == \
+                ['cheap::a', 'cheap::b', 'slow::c', 'slow::d']
+
+    @test('should pick every test without durations')
+    def test_no_durations():
+        assert pick(1, {}) is None
+
+    @test('should keep a moving failure rate')
+    def test_history():
+        runner = make_runner(output=StringIO(), stdout=StringIO())
+        runner.run_tests()
+
+        root = runner.root
+        tests = get_tests(root)
+
+        history = record_history(root, {'cheap::a': 1}, [(tests[1], None)])
+
+        assert dict((key, round(rate, 6)) for key, rate in history.items()) \
+                == {'cheap::a': 0.7, 'cheap::b': 0.65, 'slow::c': 0.35,
+                    'slow::d': 0.35}
+
+    @test('should time hooks')
+    def test_hook_durations():
+        runner = make_runner(output=StringIO(), stdout=StringIO())
+        runner.run_tests()
+
+        hooks = [runnable for runnable in runner.root.walk()
+                if runnable.name == 'slow_setup']
+
+        assert hooks[0].duration is not None
+
+    @test('should report tests left out as pending')
+    def test_run():
+        cache_dir = tempfile.mkdtemp()
+
+        try:
+            cache = Cache(cache_dir)
+            cache.set('durations', DURATIONS)
+
+            output = StringIO()
+            stdout = StringIO()
+
+            runner = make_runner(cache=cache, time_budget=3, output=output,
+                    stdout=stdout, reporter='min', color=False)
+
+            assert runner.run_tests()
+
+            assert stdout.getvalue().split('\n')[:-1] == ['a', 'b']
+            assert '2 pending' in output.getvalue()
+            assert '2 of 4 tests left out by the 3s time budget' in \
+                    output.getvalue()
+
+            assert sorted(cache.get('history')) == ['cheap::a', 'cheap::b']
+        finally:
+            shutil.rmtree(cache_dir)
@@ -0,0 +1,130 @@
+import os
+import shutil
+import sys
+import tempfile
+import types
+
+
+PYTHON_3 = sys.version_info[0] == 3
+
+
+if PYTHON_3:
+    from io import StringIO
+else:
+    from StringIO import StringIO
+
+
+from ccino.imports import ImportGraph
+from ccino.runner import Runner
+from ccino.watch import _PollWatcher, watch
+
+
+TEST_FILE = '''
+import watched_helper
+from watched_runner import runner, ran
+
+@runner.test('{name}')
+def watched_test():
+    ran.append(('{name}', watched_helper.VALUE))
+'''
+
+
+class FakeWatcher(object):
+    """Reports each of a list of changes, then stops the watch."""
+
+    def __init__(self, changes):
+        self._changes = list(changes)
+
+    def watch(self, paths):
+        pass
+
+    def wait(self):
+        if not self._changes:
+            raise KeyboardInterrupt()
+
+        return self._changes.pop(0)
+
+    def close(self):
+        pass
+
+
+def write(path, text):
+    with open(path, 'w') as source_file:
+        source_file.write(text)
+
+
+@suite('watch')
+def watch_suite():
+
+    @suite_setup
+    def watch_setup():
+        watch_suite.directory = tempfile.mkdtemp()
+        directory = watch_suite.directory
+
+        write(os.path.join(directory, 'watched_helper.py'), 'VALUE = 1\n')
+        write(os.path.join(directory, 'test_uses.py'),
+                TEST_FILE.format(name='uses'))
+        write(os.path.join(directory, 'test_plain.py'),
+                'from watched_runner import runner\n')
+
+        sys.path.insert(0, directory)
+
+    @suite_teardown
+    def watch_teardown():
+        sys.path.remove(watch_suite.directory)
+        sys.modules.pop('watched_helper', None)
+        sys.modules.pop('watched_runner', None)
+
+        shutil.rmtree(watch_suite.directory)
+
+    @test('should find local modules the tests import')
+    def test_graph():
+        directory = watch_suite.directory
+        helper = os.path.join(directory, 'watched_helper.py')
+        uses = os.path.join(directory, 'test_uses.py')
+        plain = os.path.join(directory, 'test_plain.py')
+
+        import watched_helper
+
+        graph = ImportGraph([uses, plain], [directory])
+
+        assert graph.module_name(helper) == 'watched_helper'
+        assert graph.affected([helper]) == set([helper, uses])
+        assert graph.affected([plain]) == set([plain])
+
+    @test('should only run affected test files again')
+    def test_rerun():
+        directory = watch_suite.directory
+        helper = os.path.join(directory, 'watched_helper.py')
+
+        runner = Runner()
+        runner.output(StringIO())
+
+        state = types.ModuleType('watched_runner')
+        state.runner = runner
+        state.ran = []
+
+        sys.modules['watched_runner'] = state
+
+        write(helper, 'VALUE = 20\n')
+
+        watcher = FakeWatcher([
+            set([helper]),
+            set([os.path.join(directory, 'test_plain.py')])
+        ])
+
+        watch(runner, [directory], False, watcher)
+
+        assert state.ran == [('uses', 20)]
+
+    @test('should notice changed modification times')
+    def test_poll():
+        path = os.path.join(watch_suite.directory, 'test_plain.py')
+
+        watcher = _PollWatcher()
+        watcher.watch([path])
+
+        os.utime(path, (0, 0))
+
+        assert path in watcher._check()
+        assert not watcher._check()